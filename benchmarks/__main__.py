@@ -0,0 +1,113 @@
+"""
+Run the offline benchmark suite and write one JSON report.
+
+Usage:
+    python -m benchmarks [--quick] [--out bench.json] [--compare baseline.json] [--tolerance 0.2]
+
+With --compare, metrics that got worse than the baseline by more than the
+tolerance are listed and the exit code is 1, so the suite can gate releases.
+"""
+import argparse
+import datetime
+import os
+import platform
+import subprocess
+import sys
+
+from benchmarks import embeddings, ingest, llm_client, pipeline, query_latency, retrieval_modes, vector_backends
+from benchmarks.common import write_results
+
+# Metric name fragments where lower is better; everything else numeric is higher-is-better
+_LOWER_IS_BETTER = ("p50", "p95", "p99", "mean", "seconds", "_ms", "_mb", "avg_prompt_chars")
+_HIGHER_IS_BETTER = ("_per_s", "hit_rate", "precision", "mrr", "recall")
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+def _flatten(tree, prefix=""):
+    if isinstance(tree, dict):
+        for key, value in tree.items():
+            yield from _flatten(value, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(tree, (int, float)) and not isinstance(tree, bool):
+        yield prefix, float(tree)
+
+def compare(current: dict, baseline: dict, tolerance: float):
+    """
+    List metrics that regressed by more than `tolerance` (relative).
+    """
+    base = dict(_flatten(baseline.get("results", baseline)))
+    regressions = []
+    for name, value in _flatten(current.get("results", current)):
+        old = base.get(name)
+        leaf = name.rsplit(".", 1)[-1]
+        if old is None or old == 0:
+            continue
+        if any(fragment in leaf for fragment in _HIGHER_IS_BETTER):
+            change = (old - value) / abs(old)
+        elif any(fragment in leaf or fragment in name for fragment in _LOWER_IS_BETTER):
+            change = (value - old) / abs(old)
+        else:
+            continue
+        if change > tolerance:
+            regressions.append((name, old, value, change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="small sizes, for a smoke run")
+    parser.add_argument("--out", default=os.path.join("benchmarks", "results", f"{datetime.date.today()}.json"))
+    parser.add_argument("--compare", default=None, help="baseline report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.quick:
+        results = {
+            "ingest": ingest.run(txt_sizes=(50_000,), pdf_pages=(20,)),
+            "query_latency": query_latency.run(sizes=(100, 500), n_queries=50),
+            "retrieval_modes": retrieval_modes.run(n_notes=200, n_queries=50),
+            "pipeline": pipeline.run(n_notes=200, n_queries=5, latency=0.05),
+            "llm_client": llm_client.run(callers=8, latency=0.02),
+            "vector_backends": vector_backends.run(sizes=(2000,), n_queries=50),
+            "embeddings": embeddings.run(n_texts=128, batch_sizes=(32,), threads=(1, 2)),
+        }
+    else:
+        results = {
+            "ingest": ingest.run(txt_sizes=(200_000, 1_000_000), pdf_pages=(50, 500)),
+            "query_latency": query_latency.run(sizes=(100, 1000, 5000), n_queries=200),
+            "retrieval_modes": retrieval_modes.run(n_notes=500, n_queries=100),
+            "pipeline": pipeline.run(n_notes=500, n_queries=20, latency=0.4),
+            "llm_client": llm_client.run(callers=32, latency=0.05),
+            "vector_backends": vector_backends.run(sizes=(5000, 20000), n_queries=200),
+            "embeddings": embeddings.run(n_texts=512, batch_sizes=(16, 32, 64), threads=(1, 2, 4)),
+        }
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    write_results(report, args.out)
+
+    if args.compare:
+        import json
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:.4g} -> {new:.4g} ({change:+.0%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import json
+import os
+import statistics
+import tempfile
+from typing import Dict, List
+
+from core.config import Config
+
+def isolate_storage(directory: str = None) -> str:
+    """
+    Point every on-disk store in Config at a scratch directory so benchmarks
+    never touch the real memory.
+    
+    Returns:
+        str: The scratch directory.
+    """
+    directory = directory or tempfile.mkdtemp(prefix="nexus-bench-")
+    Config.CHROMA_PERSIST_DIRECTORY = os.path.join(directory, "chroma_db")
+    Config.VECTOR_INDEX_DIRECTORY = os.path.join(directory, "vector_index")
+    Config.EMBEDDING_CACHE_PATH = os.path.join(directory, "embedding_cache.db")
+    Config.INGEST_MANIFEST_PATH = os.path.join(directory, "ingest_manifest.db")
+    Config.POSITION_INDEX_PATH = os.path.join(directory, "positions.db")
+    Config.WRITER_LOCK_PATH = os.path.join(directory, "writer.lock")
+    Config.BM25_INDEX_DIRECTORY = os.path.join(directory, "bm25_index")
+    Config.RESPONSE_CACHE_PATH = os.path.join(directory, "response_cache.json")
+    return directory
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """
+    p50/p95/p99 and mean of a list of latencies, in milliseconds.
+    """
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "p50": pick(0.50) * 1000,
+        "p95": pick(0.95) * 1000,
+        "p99": pick(0.99) * 1000,
+        "mean": statistics.fmean(ordered) * 1000,
+    }
+
+def write_results(results: Dict, path: str = None):
+    """
+    Print results and optionally write them as JSON.
+    """
+    text = json.dumps(results, indent=2)
+    print(text)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
@@ -0,0 +1,102 @@
+import random
+from typing import List, Tuple
+
+_SERVICES = ["billing", "auth", "search", "ingest", "scheduler", "gateway", "storage", "notifier", "reports", "payments"]
+_SYMPTOMS = [
+    "requests time out after the retry budget is exhausted",
+    "the worker crashes while decoding a malformed payload",
+    "latency spikes whenever the cache is cold",
+    "connections are refused during certificate rotation",
+    "jobs are silently dropped when the queue is full",
+    "memory grows until the container is killed",
+]
+_FIXES = [
+    "raise the pool size and redeploy",
+    "roll back to the previous release",
+    "clear the stale lock in the coordinator",
+    "rotate the credentials and restart the service",
+    "increase the batch timeout in the config",
+    "re-run the migration with the repair flag",
+]
+_WORDS = (
+    "memory context retrieval answer question note document system design cache latency index vector "
+    "prompt session history summary token budget chunk source page paragraph sentence review release"
+).split()
+
+def make_notes(n: int, seed: int = 7) -> List[Tuple[str, str]]:
+    """
+    Synthetic incident notes, each tagged with a unique error code.
+    Many notes share wording, so only the code tells them apart.
+    
+    Returns:
+        List[Tuple[str, str]]: (error_code, note_text) pairs.
+    """
+    rng = random.Random(seed)
+    notes = []
+    codes = rng.sample(range(10000, 99999), n)
+    for code in codes:
+        error_code = f"ERR-{code}"
+        service = rng.choice(_SERVICES)
+        notes.append((
+            error_code,
+            f"Incident {error_code} in the {service} service: {rng.choice(_SYMPTOMS)}. "
+            f"Resolution: {rng.choice(_FIXES)}. Owner: team-{service}."
+        ))
+    return notes
+
+def make_paragraphs(n_chars: int, seed: int = 3) -> str:
+    """
+    Pseudo-prose of roughly n_chars characters, in sentences and paragraphs.
+    """
+    rng = random.Random(seed)
+    parts, size = [], 0
+    while size < n_chars:
+        sentence = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 18))).capitalize() + "."
+        if rng.random() < 0.15:
+            sentence += "\n\n"
+        parts.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(parts)[:n_chars]
+
+def make_txt(n_chars: int, seed: int = 3) -> bytes:
+    """
+    A UTF-8 TXT file of about n_chars characters.
+    """
+    return make_paragraphs(n_chars, seed).encode("utf-8")
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(n_pages: int, lines_per_page: int = 40, seed: int = 5) -> bytes:
+    """
+    A minimal text PDF (Helvetica, one content stream per page) that pypdf can extract.
+    """
+    rng = random.Random(seed)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{4 + 2 * i} 0 R" for i in range(n_pages)), n_pages),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page in range(n_pages):
+        lines = [
+            " ".join(rng.choice(_WORDS) for _ in range(12))
+            for _ in range(lines_per_page)
+        ]
+        lines[0] = f"Page {page + 1}: " + lines[0]
+        body = "BT /F1 10 Tf 12 TL 40 760 Td " + " ".join(f"({_pdf_escape(line)}) '" for line in lines) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {5 + 2 * page} 0 R "
+            "/Resources << /Font << /F1 3 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += b"".join(f"{offset:010d} 00000 n \n".encode("latin-1") for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
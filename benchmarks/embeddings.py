@@ -0,0 +1,55 @@
+"""
+Embedding throughput of the EmbeddingEngine across batch sizes and thread
+counts, plus the cost of a warm (fully cached) pass over the same texts.
+
+Usage:
+    python -m benchmarks.embeddings [--texts 512] [--batch-sizes 16 32 64] [--threads 1 2 4] [--out results.json]
+"""
+import argparse
+import os
+import time
+
+from benchmarks.common import isolate_storage, write_results
+from benchmarks.corpus import make_notes
+
+def run(n_texts: int = 512, batch_sizes=(16, 32, 64), threads=(1, 2, 4)) -> dict:
+    scratch = isolate_storage()
+    from core.config import Config
+    from core.embeddings import EmbeddingCache, EmbeddingEngine, load_model
+
+    texts = [text for _, text in make_notes(n_texts)]
+    function = load_model(Config.EMBEDDING_MODEL)
+    # Load the model outside the timed passes
+    EmbeddingEngine(batch_size=1, threads=1, function=function).embed(["warm-up"])
+
+    results = {"model": Config.EMBEDDING_MODEL, "texts": len(texts), "runs": {}}
+    for batch_size in batch_sizes:
+        for thread_count in threads:
+            cache = EmbeddingCache(os.path.join(scratch, f"embeddings_b{batch_size}_t{thread_count}.db"))
+            engine = EmbeddingEngine(batch_size=batch_size, threads=thread_count, cache=cache, function=function)
+            start = time.perf_counter()
+            engine.embed(texts)
+            cold = time.perf_counter() - start
+            start = time.perf_counter()
+            engine.embed(texts)
+            warm = time.perf_counter() - start
+            results["runs"][f"batch{batch_size}_threads{thread_count}"] = {
+                "cold_seconds": cold,
+                "warm_seconds": warm,
+                "embeddings_per_s": len(texts) / cold if cold else 0.0,
+                "cached_per_s": len(texts) / warm if warm else 0.0,
+            }
+            cache.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[16, 32, 64])
+    parser.add_argument("--threads", type=int, nargs="*", default=[1, 2, 4])
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    write_results(run(args.texts, args.batch_sizes, args.threads), args.out)
+
+if __name__ == "__main__":
+    main()
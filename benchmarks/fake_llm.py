@@ -0,0 +1,109 @@
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, Iterator, List
+
+DEFAULT_RESPONSE = (
+    "<THOUGHT>\nThe user is asking about something in memory. I will check the context "
+    "and answer briefly.\n</THOUGHT>\n\n<ANSWER>\nHere is a concise answer based on your notes. "
+    "It mentions the relevant incident, the owning team and the recommended fix.\n</ANSWER>"
+)
+
+class FakeGeminiClient:
+    """
+    Offline stand-in for GeminiClient with configurable latency and streaming.
+    
+    Latency model: a fixed time to first token, then the response streamed
+    at a fixed rate in chunks of `chunk_chars` characters.
+    """
+    def __init__(
+        self,
+        first_token_latency: float = 0.4,
+        chars_per_second: float = 2000.0,
+        chunk_chars: int = 40,
+        response: str = DEFAULT_RESPONSE,
+    ):
+        """
+        Args:
+            first_token_latency (float): Seconds before the first chunk.
+            chars_per_second (float): Streaming rate after the first chunk (0 = instant).
+            chunk_chars (int): Size of each streamed chunk.
+            response (str): Text returned for every prompt.
+        """
+        self.first_token_latency = first_token_latency
+        self.chars_per_second = chars_per_second
+        self.chunk_chars = chunk_chars
+        self.response = response
+        self.calls = 0
+        self.prompt_chars = 0
+
+    def _chunk_delay(self, size: int) -> float:
+        return size / self.chars_per_second if self.chars_per_second else 0.0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        self.prompt_chars += len(prompt)
+        time.sleep(self.first_token_latency + self._chunk_delay(len(self.response)))
+        return self.response
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        self.calls += 1
+        self.prompt_chars += len(prompt)
+        time.sleep(self.first_token_latency)
+        for start in range(0, len(self.response), self.chunk_chars):
+            chunk = self.response[start:start + self.chunk_chars]
+            yield chunk
+            time.sleep(self._chunk_delay(len(chunk)))
+
+    def generate_chat(self, parsed_history: List[Dict[str, str]], user_message: str) -> str:
+        return self.generate(user_message)
+
+class FakeRateLimitError(Exception):
+    """
+    Transient upstream error, shaped like google.api_core's ResourceExhausted (HTTP 429).
+    """
+    code = 429
+
+def _fake_response(text: str):
+    part = SimpleNamespace(text=text)
+    return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+class FakeGenerativeModel:
+    """
+    Offline stand-in for genai.GenerativeModel, for driving the real
+    GeminiClient (limiter, retries, deduplication) without network access.
+    """
+    def __init__(self, latency: float = 0.05, fail_first: int = 0, chunk_chars: int = 40, response: str = DEFAULT_RESPONSE):
+        """
+        Args:
+            latency (float): Seconds per call.
+            fail_first (int): Number of initial calls that raise FakeRateLimitError.
+            chunk_chars (int): Size of each streamed chunk.
+            response (str): Text returned for every prompt.
+        """
+        self.latency = latency
+        self.fail_first = fail_first
+        self.chunk_chars = chunk_chars
+        self.response = response
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str, stream: bool = False, request_options: Dict = None):
+        with self._lock:
+            self.calls += 1
+            failing = self.calls <= self.fail_first
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            if failing:
+                raise FakeRateLimitError("429 Resource has been exhausted")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        if stream:
+            return [_fake_response(self.response[start:start + self.chunk_chars])
+                    for start in range(0, len(self.response), self.chunk_chars)]
+        return _fake_response(self.response)
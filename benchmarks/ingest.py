@@ -0,0 +1,57 @@
+"""
+Ingest throughput of MemoryManager.process_file for synthetic TXT and PDF files.
+
+Usage:
+    python -m benchmarks.ingest [--txt-chars 200000 1000000] [--pdf-pages 50 500] [--out results.json]
+"""
+import argparse
+import io
+import time
+
+from benchmarks.common import isolate_storage, write_results
+from benchmarks.corpus import make_pdf, make_txt
+
+def _measure(memory, data: bytes, filename: str, pages: int = None) -> dict:
+    start = time.perf_counter()
+    ok = memory.process_file(io.BytesIO(data), filename)
+    elapsed = time.perf_counter() - start
+    chunks = len((memory.manifest.get(filename) or {}).get("ids", []))
+    result = {
+        "ok": ok,
+        "bytes": len(data),
+        "chunks": chunks,
+        "seconds": elapsed,
+        "mb_per_s": len(data) / elapsed / 1e6 if elapsed else 0.0,
+        "chunks_per_s": chunks / elapsed if elapsed else 0.0,
+    }
+    if pages:
+        result["pages"] = pages
+        result["pages_per_s"] = pages / elapsed if elapsed else 0.0
+    # Re-ingesting identical bytes should be close to free
+    start = time.perf_counter()
+    memory.process_file(io.BytesIO(data), filename)
+    result["reingest_seconds"] = time.perf_counter() - start
+    return result
+
+def run(txt_sizes=(200_000,), pdf_pages=(50,)) -> dict:
+    isolate_storage()
+    from core.memory import MemoryManager
+
+    memory = MemoryManager(collection_name="bench_ingest")
+    results = {"txt": {}, "pdf": {}}
+    for size in txt_sizes:
+        results["txt"][str(size)] = _measure(memory, make_txt(size), f"bench_{size}.txt")
+    for pages in pdf_pages:
+        results["pdf"][str(pages)] = _measure(memory, make_pdf(pages), f"bench_{pages}.pdf", pages=pages)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--txt-chars", type=int, nargs="*", default=[200_000])
+    parser.add_argument("--pdf-pages", type=int, nargs="*", default=[50])
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    write_results(run(args.txt_chars, args.pdf_pages), args.out)
+
+if __name__ == "__main__":
+    main()
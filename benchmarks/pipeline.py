@@ -0,0 +1,74 @@
+"""
+Stage timings of Orchestrator.process_query against the offline Gemini stand-in.
+
+Usage:
+    python -m benchmarks.pipeline [--notes 500] [--queries 20] [--latency 0.4] [--out results.json]
+"""
+import argparse
+import random
+import time
+from collections import defaultdict
+
+from benchmarks.common import isolate_storage, percentiles, write_results
+from benchmarks.corpus import make_notes
+from benchmarks.fake_llm import FakeGeminiClient
+
+STAGES = ("_retrieve", "_build_prompt", "generate", "_parse_response")
+
+def _timed(fn, samples):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - start)
+    return wrapper
+
+def run(n_notes: int = 500, n_queries: int = 20, latency: float = 0.4) -> dict:
+    isolate_storage()
+    from core.config import Config
+    Config.RESPONSE_CACHE_MODE = "off"
+    from core.orchestrator import Orchestrator
+
+    llm = FakeGeminiClient(first_token_latency=latency)
+    orchestrator = Orchestrator(llm=llm)
+    notes = make_notes(n_notes)
+    orchestrator.memory._store_chunks([text for _, text in notes], [{"source": code} for code, _ in notes])
+
+    # Wrap each stage on the instance so the class itself is untouched
+    samples = defaultdict(list)
+    for stage in STAGES:
+        owner = llm if stage == "generate" else orchestrator
+        setattr(owner, stage, _timed(getattr(owner, stage), samples[stage]))
+
+    rng = random.Random(17)
+    history = []
+    totals = []
+    for code, _ in rng.sample(notes, min(n_queries, len(notes))):
+        query = f"What happened with {code}?"
+        history.append({"role": "user", "content": query})
+        start = time.perf_counter()
+        response = orchestrator.process_query(query, chat_history=history, session_id="bench")
+        totals.append(time.perf_counter() - start)
+        history.append({"role": "assistant", "content": response})
+
+    return {
+        "notes": n_notes,
+        "queries": len(totals),
+        "llm_latency_s": latency,
+        "total_ms": percentiles(totals),
+        "stages_ms": {stage.strip("_"): percentiles(values) for stage, values in samples.items()},
+        "avg_prompt_chars": llm.prompt_chars / max(llm.calls, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notes", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.4)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    write_results(run(args.notes, args.queries, args.latency), args.out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+query_context latency percentiles as the collection grows, uncached and
+served from the retrieval cache.
+
+Usage:
+    python -m benchmarks.query_latency [--sizes 100 1000 5000] [--queries 200] [--out results.json]
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import isolate_storage, percentiles, write_results
+from benchmarks.corpus import make_notes
+
+def run(sizes=(100, 1000), n_queries: int = 200, modes=("vector", "hybrid")) -> dict:
+    isolate_storage()
+    from core.memory import MemoryManager
+
+    memory = MemoryManager(collection_name="bench_query")
+    notes = make_notes(max(sizes))
+    rng = random.Random(13)
+    results = {}
+    loaded = 0
+    for size in sorted(sizes):
+        batch = notes[loaded:size]
+        if batch:
+            memory._store_chunks([text for _, text in batch], [{"source": code} for code, _ in batch])
+        loaded = size
+        queries = [f"How was {code} resolved?" for code, _ in rng.choices(notes[:size], k=n_queries)]
+        results[str(size)] = {}
+        for mode in modes:
+            latencies, cached = [], []
+            for query in queries:
+                memory.store.results.clear()
+                start = time.perf_counter()
+                memory.query_context(query, mode=mode)
+                latencies.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                memory.query_context(query, mode=mode)
+                cached.append(time.perf_counter() - start)
+            results[str(size)][mode] = percentiles(latencies)
+            results[str(size)][f"{mode}_cached"] = percentiles(cached)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="*", default=[100, 1000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    write_results(run(args.sizes, args.queries), args.out)
+
+if __name__ == "__main__":
+    main()
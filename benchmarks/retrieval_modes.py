@@ -0,0 +1,56 @@
+"""
+Compare vector, lexical (BM25) and hybrid retrieval on a synthetic corpus of
+incident notes whose only distinguishing feature is an error code.
+
+Usage:
+    python -m benchmarks.retrieval_modes [--notes 500] [--queries 100] [--out results.json]
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import isolate_storage, percentiles, write_results
+from benchmarks.corpus import make_notes
+
+MODES = ("vector", "lexical", "hybrid")
+
+def run(n_notes: int, n_queries: int, k: int = 3) -> dict:
+    isolate_storage()
+    from core.memory import MemoryManager
+
+    memory = MemoryManager(collection_name="bench_retrieval")
+    notes = make_notes(n_notes)
+    for error_code, text in notes:
+        memory.add_document(text, {"source": error_code})
+
+    rng = random.Random(11)
+    queries = rng.sample(notes, min(n_queries, len(notes)))
+    results = {"notes": n_notes, "queries": len(queries), "k": k, "modes": {}}
+    for mode in MODES:
+        hits, reciprocal_ranks, latencies = 0, 0.0, []
+        for error_code, _ in queries:
+            start = time.perf_counter()
+            found = memory.search(f"What is the fix for {error_code}?", n_results=k, mode=mode)
+            latencies.append(time.perf_counter() - start)
+            sources = [hit["metadata"].get("source") for hit in found]
+            if error_code in sources:
+                hits += 1
+                reciprocal_ranks += 1.0 / (sources.index(error_code) + 1)
+        results["modes"][mode] = {
+            f"hit_rate@{k}": hits / len(queries),
+            f"precision@{k}": hits / (len(queries) * k),
+            "mrr": reciprocal_ranks / len(queries),
+            "latency_ms": percentiles(latencies),
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notes", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    write_results(run(args.notes, args.queries), args.out)
+
+if __name__ == "__main__":
+    main()
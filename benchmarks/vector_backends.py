@@ -0,0 +1,150 @@
+"""
+Compare vector backends (ChromaDB vs the memory-mapped int8/float16 index,
+brute force and IVF) on recall@k, query latency, load time and RSS.
+
+Every variant is queried in a fresh process so load time and resident
+memory are measured from a cold open of the persisted index.
+
+Usage:
+    python -m benchmarks.vector_backends [--sizes 5000 20000] [--dim 384] [--queries 200] [--out results.json]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import time
+
+import numpy as np
+
+from benchmarks.common import isolate_storage, percentiles, write_results
+
+# (variant, backend, quantization, IVF probes); IVF variants share the int8 index
+VARIANTS = (
+    ("chroma", "chroma", None, 0),
+    ("mmap_int8", "mmap", "int8", 0),
+    ("mmap_float16", "mmap", "float16", 0),
+    ("mmap_int8_ivf", "mmap", "int8", 16),
+)
+
+def make_vectors(n: int, dim: int, seed: int = 17) -> np.ndarray:
+    """
+    Unit vectors drawn around random topic centres, like sentence embeddings of a note corpus.
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(max(8, n // 200), dim)).astype(np.float32)
+    vectors = centres[rng.integers(len(centres), size=n)] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    distances = (vectors * vectors).sum(axis=1)[None, :] - 2.0 * queries @ vectors.T
+    return np.argsort(distances, axis=1)[:, :k]
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak rather than current RSS where /proc is unavailable (KB on Linux, bytes on macOS)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _store_path(directory: str, backend: str, name: str) -> str:
+    return os.path.join(directory, "chroma" if backend == "chroma" else name)
+
+def _open(directory: str, backend: str, name: str, quantization: str = None, probes: int = 0):
+    from core.vectorstore import ChromaVectorStore, MmapVectorStore
+    path = _store_path(directory, backend, name)
+    if backend == "chroma":
+        import chromadb
+        return ChromaVectorStore(chromadb.PersistentClient(path=path), name, None)
+    return MmapVectorStore(path, None, quantization, ivf_min_rows=0, ivf_probes=probes)
+
+def _measure(directory: str, backend: str, name: str, quantization: str, probes: int, k: int, queue):
+    data = np.load(os.path.join(directory, "queries.npz"))
+    queries, truth = data["queries"], data["truth"]
+    if backend == "chroma":
+        import chromadb  # noqa: F401  (library import is not part of the index's footprint)
+    baseline = _rss_mb()
+    start = time.perf_counter()
+    store = _open(directory, backend, name, quantization, probes)
+    store.count()
+    load_seconds = time.perf_counter() - start
+
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = store.query(query_embeddings=[query.tolist()], n_results=k, include=["distances"])
+        latencies.append(time.perf_counter() - start)
+        rows = {int(doc_id[1:]) for doc_id in found["ids"][0]}
+        recalls.append(len(rows & set(expected.tolist())) / k)
+    queue.put({
+        "load_seconds": load_seconds,
+        "latency_ms": percentiles(latencies),
+        f"recall@{k}": float(np.mean(recalls)),
+        "rss_mb": _rss_mb() - baseline,
+    })
+
+def _directory_mb(path: str) -> float:
+    return sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+    ) / 2 ** 20
+
+def run(sizes=(5000, 20000), dim: int = 384, n_queries: int = 200, k: int = 10) -> dict:
+    scratch = isolate_storage()
+    context = multiprocessing.get_context("spawn")
+    results = {"dim": dim, "k": k, "queries": n_queries, "sizes": {}}
+    for size in sizes:
+        directory = os.path.join(scratch, f"vectors_{size}")
+        os.makedirs(directory)
+        vectors = make_vectors(size + n_queries, dim)
+        vectors, queries = vectors[:size], vectors[size:]
+        np.savez(os.path.join(directory, "queries.npz"), queries=queries, truth=exact_top_k(vectors, queries, k))
+
+        ids = [f"v{i}" for i in range(size)]
+        documents = [f"document {i}" for i in range(size)]
+        metadatas = [{"source": f"doc{i // 20}", "chunk_id": i % 20} for i in range(size)]
+        built = {}
+        size_results = results["sizes"][str(size)] = {}
+        for variant, backend, quantization, probes in VARIANTS:
+            name = f"bench_{backend}_{quantization or 'f32'}"
+            if name not in built:
+                start = time.perf_counter()
+                store = _open(directory, backend, name, quantization)
+                for first in range(0, size, 4096):
+                    store.upsert(
+                        ids[first:first + 4096], documents[first:first + 4096],
+                        metadatas[first:first + 4096], vectors[first:first + 4096].tolist()
+                    )
+                built[name] = time.perf_counter() - start
+                del store
+            build_seconds = built[name]
+            if probes:
+                start = time.perf_counter()
+                _open(directory, backend, name, quantization).build_ivf()
+                build_seconds += time.perf_counter() - start
+
+            queue = context.Queue()
+            process = context.Process(target=_measure, args=(directory, backend, name, quantization, probes, k, queue))
+            process.start()
+            measured = queue.get()
+            process.join()
+            size_results[variant] = dict(
+                measured,
+                build_seconds=build_seconds,
+                disk_mb=_directory_mb(_store_path(directory, backend, name))
+            )
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="*", default=[5000, 20000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    write_results(run(args.sizes, args.dim, args.queries), args.out)
+
+if __name__ == "__main__":
+    main()
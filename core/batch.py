@@ -0,0 +1,207 @@
+"""
+Batch question answering over JSONL, for regression evaluation and bulk reports.
+
+Each input line is a JSON object with a "query" (or a bare JSON string) and
+optionally "id", "history" (chat messages) and "session_id". Queries run
+concurrently through one Orchestrator, so every item shares the memory
+store, the retrieval cache and the Gemini client with its rate limits.
+Results are written as soon as every earlier item is done, so the output
+follows input order and can be tailed while the batch runs.
+
+Usage:
+    python -m core.batch in.jsonl out.jsonl [--concurrency 8] [--collection nexus_memory] [--no-cache]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO
+
+from core.config import Config
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": ordered[-1]}
+
+def parse_item(line: str) -> Dict[str, Any]:
+    """
+    One input line as {"query", "id", "history", "session_id"}.
+
+    Raises:
+        ValueError: If the line is not JSON or has no query.
+    """
+    item = json.loads(line)
+    if isinstance(item, str):
+        item = {"query": item}
+    if not isinstance(item, dict) or not str(item.get("query") or "").strip():
+        raise ValueError("expected a JSON object with a non-empty \"query\"")
+    return item
+
+class BatchRunner:
+    """
+    Runs queries through an Orchestrator with at most `concurrency` in flight.
+    """
+    def __init__(self, orchestrator, concurrency: int = None):
+        """
+        Args:
+            orchestrator (Orchestrator): Answers the queries.
+            concurrency (int): Queries in flight (default: Config.BATCH_CONCURRENCY).
+        """
+        self.orchestrator = orchestrator
+        self.concurrency = max(1, concurrency or Config.BATCH_CONCURRENCY)
+
+    async def _answer(self, index: int, item: Dict[str, Any]) -> Dict[str, Any]:
+        record = {"index": index, "id": item.get("id", index), "query": item["query"]}
+        history = list(item.get("history") or [])
+        history.append({"role": "user", "content": item["query"]})
+        start = time.perf_counter()
+        try:
+            response = await self.orchestrator.aprocess_query(item["query"], history, item.get("session_id"))
+            record.update(
+                answer=response.get("answer", ""),
+                thought=response.get("thought", ""),
+                context_used=response.get("context_used", []),
+                prompt_usage=response.get("prompt_usage"),
+            )
+            # aprocess_query reports its own failures as an "Error" response
+            if response.get("thought") == "Error":
+                record["error"] = response.get("answer", "")
+        except Exception as e:
+            record["error"] = str(e)
+        record["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return record
+
+    async def arun(self, lines: Iterable[str], sink: TextIO, progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Answer every line of `lines`, writing one JSON result per line to `sink` in input order.
+
+        Args:
+            lines (Iterable[str]): JSONL input; blank lines are skipped.
+            sink (TextIO): Output, flushed after every written result.
+            progress (callable, optional): Called with the running stats after each written result.
+
+        Returns:
+            Dict[str, Any]: Items, errors, seconds, queries per second and latency percentiles (ms).
+        """
+        start = time.perf_counter()
+        source = iter(enumerate(line for line in lines if line.strip()))
+        in_flight: Dict[asyncio.Task, int] = {}
+        finished: Dict[int, Dict[str, Any]] = {}
+        next_write = 0
+        exhausted = False
+        latencies: List[float] = []
+        stats = {"items": 0, "errors": 0}
+
+        def running_stats() -> Dict[str, Any]:
+            elapsed = time.perf_counter() - start
+            return dict(
+                stats,
+                seconds=elapsed,
+                queries_per_s=stats["items"] / elapsed if elapsed else 0.0,
+                latency_ms=_percentiles(latencies),
+            )
+
+        while True:
+            # Bounded window: a slow early item holds back at most a few batches of finished ones
+            while not exhausted and len(in_flight) < self.concurrency and len(in_flight) + len(finished) < self.concurrency * 4:
+                entry = next(source, None)
+                if entry is None:
+                    exhausted = True
+                    break
+                index, line = entry
+                try:
+                    item = parse_item(line)
+                except ValueError as e:
+                    finished[index] = {"index": index, "id": index, "error": f"invalid input: {e}", "latency_ms": 0.0}
+                    continue
+                in_flight[asyncio.ensure_future(self._answer(index, item))] = index
+            if in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    finished[in_flight.pop(task)] = task.result()
+            while next_write in finished:
+                record = finished.pop(next_write)
+                sink.write(json.dumps(record, ensure_ascii=False) + "\n")
+                sink.flush()
+                stats["items"] += 1
+                stats["errors"] += "error" in record
+                if "query" in record:
+                    latencies.append(record["latency_ms"])
+                next_write += 1
+                if progress:
+                    progress(running_stats())
+            if exhausted and not in_flight and not finished:
+                return running_stats()
+
+    def run(self, lines: Iterable[str], sink: TextIO, progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Synchronous wrapper around arun().
+        """
+        from core.orchestrator import run_sync
+
+        async def with_threads():
+            # Each query holds up to two worker threads (retrieval alongside history summarization)
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(max_workers=self.concurrency * 2, thread_name_prefix="nexus-batch")
+            )
+            return await self.arun(lines, sink, progress)
+
+        return run_sync(with_threads())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="JSONL file of queries ('-' for stdin)")
+    parser.add_argument("output", help="JSONL file for results ('-' for stdout)")
+    parser.add_argument("--concurrency", type=int, default=None, help="queries in flight (default: NEXUS_BATCH_CONCURRENCY)")
+    parser.add_argument("--collection", default="nexus_memory")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the response cache, e.g. for evaluation runs")
+    parser.add_argument("--quiet", action="store_true", help="no progress lines on stderr")
+    args = parser.parse_args()
+
+    from core.memory import MemoryManager
+    from core.orchestrator import Orchestrator
+
+    orchestrator = Orchestrator(memory=MemoryManager(args.collection))
+    if args.no_cache:
+        orchestrator.cache = None
+    runner = BatchRunner(orchestrator, args.concurrency)
+
+    def progress(stats: Dict[str, Any]):
+        if stats["items"] % 10 == 0:
+            print(
+                f"{stats['items']} done, {stats['errors']} errors, {stats['queries_per_s']:.2f} q/s, "
+                f"p50 {stats['latency_ms']['p50']:.0f} ms",
+                file=sys.stderr
+            )
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = runner.run(source, sink, None if args.quiet else progress)
+    except KeyboardInterrupt:
+        print("Interrupted; results so far are in the output file.", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        for stream in (source, sink):
+            if stream not in (sys.stdin, sys.stdout):
+                stream.close()
+    latency = stats["latency_ms"]
+    print(
+        f"{stats['items']} queries ({stats['errors']} errors) in {stats['seconds']:.1f}s, "
+        f"{stats['queries_per_s']:.2f} q/s; latency p50 {latency['p50']:.0f} ms, "
+        f"p95 {latency['p95']:.0f} ms, p99 {latency['p99']:.0f} ms",
+        file=sys.stderr
+    )
+    if stats["errors"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.config import Config
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for cache lookups (case, whitespace, trailing punctuation).
+    """
+    query = re.sub(r"\s+", " ", query.strip().lower())
+    return query.rstrip(" ?!.。？！")
+
+def hash_context(context_docs: List[str]) -> str:
+    """
+    Stable hash of the retrieved context documents.
+    """
+    digest = hashlib.sha256()
+    for doc in context_docs:
+        digest.update(doc.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def fingerprint_history(chat_history: Optional[List[Dict]]) -> str:
+    """
+    Stable fingerprint of the conversation (roles and answers only).
+    """
+    digest = hashlib.sha256()
+    for msg in chat_history or []:
+        content = msg.get("content", "")
+        if isinstance(content, dict):
+            content = content.get("answer", "")
+        digest.update(f"{msg.get('role')}:{content}".encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class ResponseCache:
+    """
+    LRU + TTL cache of orchestrator responses, persisted to disk.
+    
+    Entries are keyed on the normalized query, a hash of the retrieved context
+    and a fingerprint of the chat history. In semantic mode, a query that misses
+    the exact key is served by the most similar cached query with the same
+    context and history, provided the cosine similarity reaches the threshold.
+    """
+    def __init__(
+        self,
+        path: str = None,
+        max_entries: int = None,
+        ttl_seconds: float = None,
+        similarity_threshold: float = None,
+        embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+    ):
+        """
+        Initialize the cache and load any persisted entries.
+        
+        Args:
+            path (str): JSON file to persist entries to (None disables persistence).
+            max_entries (int): Size cap; least recently used entries are evicted first.
+            ttl_seconds (float): Lifetime of an entry.
+            similarity_threshold (float): Minimum cosine similarity for a semantic hit.
+            embed_fn (callable): Embeds a list of texts. Enables semantic mode when given.
+        """
+        self.path = path
+        self.max_entries = max_entries if max_entries is not None else Config.RESPONSE_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else Config.RESPONSE_CACHE_TTL_SECONDS
+        self.similarity_threshold = (
+            similarity_threshold if similarity_threshold is not None else Config.RESPONSE_CACHE_SIMILARITY_THRESHOLD
+        )
+        self.embed_fn = embed_fn
+        self.memory_signature = None
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def make_key(normalized_query: str, context_hash: str, history_fingerprint: str) -> str:
+        return hashlib.sha256(f"{normalized_query}\0{context_hash}\0{history_fingerprint}".encode("utf-8")).hexdigest()
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        if self.embed_fn is None:
+            return None
+        try:
+            vector = np.asarray(self.embed_fn([text])[0], dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            return vector / norm if norm else vector
+        except Exception as e:
+            print(f"Error embedding cache query: {e}")
+            return None
+
+    def _check_signature(self, memory_signature: Optional[str]):
+        # Any change to the memory collection invalidates every cached answer
+        if memory_signature is not None and memory_signature != self.memory_signature:
+            if self._entries:
+                self._entries.clear()
+                self._save()
+            self.memory_signature = memory_signature
+
+    def _purge_expired(self, now: float):
+        expired = [key for key, entry in self._entries.items() if now - entry["created_at"] > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup(self, query: str, context_docs: List[str], chat_history: Optional[List[Dict]], memory_signature: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+        
+        Args:
+            query (str): The user's input.
+            context_docs (List[str]): Context retrieved for the query.
+            chat_history (list): Previous messages, excluding the query itself.
+            memory_signature (str): Current state of the memory collection.
+            
+        Returns:
+            Optional[Dict[str, Any]]: A copy of the cached response, or None on a miss.
+        """
+        normalized = normalize_query(query)
+        context_hash = hash_context(context_docs)
+        history_fp = fingerprint_history(chat_history)
+        key = self.make_key(normalized, context_hash, history_fp)
+
+        with self._lock:
+            self._check_signature(memory_signature)
+            self._purge_expired(time.time())
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry["response"])
+
+            candidates = [
+                e for e in self._entries.values()
+                if e["context_hash"] == context_hash and e["history_fp"] == history_fp and e.get("embedding") is not None
+            ]
+
+        if candidates and self.embed_fn is not None:
+            query_vec = self._embed(normalized)
+            if query_vec is not None:
+                matrix = np.asarray([e["embedding"] for e in candidates], dtype=np.float32)
+                scores = matrix @ query_vec
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    with self._lock:
+                        best_key = candidates[best]["key"]
+                        if best_key in self._entries:
+                            self._entries.move_to_end(best_key)
+                            self.hits += 1
+                            self.semantic_hits += 1
+                            return dict(candidates[best]["response"])
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def store(self, query: str, context_docs: List[str], chat_history: Optional[List[Dict]], response: Dict[str, Any], memory_signature: str = None):
+        """
+        Store a response and persist the cache.
+        """
+        normalized = normalize_query(query)
+        context_hash = hash_context(context_docs)
+        history_fp = fingerprint_history(chat_history)
+        key = self.make_key(normalized, context_hash, history_fp)
+        vector = self._embed(normalized)
+
+        with self._lock:
+            self._check_signature(memory_signature)
+            self._entries[key] = {
+                "key": key,
+                "query": normalized,
+                "context_hash": context_hash,
+                "history_fp": history_fp,
+                "embedding": vector.tolist() if vector is not None else None,
+                "response": dict(response),
+                "created_at": time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._save()
+
+    def clear(self):
+        """
+        Drop every entry.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters and current size.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.memory_signature = data.get("memory_signature")
+            now = time.time()
+            for entry in data.get("entries", []):
+                if now - entry["created_at"] <= self.ttl_seconds:
+                    self._entries[entry["key"]] = entry
+        except Exception as e:
+            print(f"Error loading response cache: {e}")
+            self._entries.clear()
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"memory_signature": self.memory_signature, "entries": list(self._entries.values())}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving response cache: {e}")
+
+class RetrievalCache:
+    """
+    In-memory LRU of retrieval results for one collection.
+
+    Entries belong to the collection signature they were computed against;
+    the first lookup after any write sees a new signature and drops them
+    all, so a cached result is never served for a different collection state.
+    """
+    def __init__(self, max_entries: int = None):
+        """
+        Args:
+            max_entries (int): Size cap (default: Config.RETRIEVAL_CACHE_MAX_ENTRIES, 0 disables the cache).
+        """
+        self.max_entries = max_entries if max_entries is not None else Config.RETRIEVAL_CACHE_MAX_ENTRIES
+        self.signature = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_signature(self, signature: str):
+        if signature != self.signature:
+            self._entries.clear()
+            self.signature = signature
+
+    def get(self, key: tuple, signature: str) -> Optional[Any]:
+        """
+        A copy of the result cached under `key` for this collection signature, or None.
+        """
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            self._check_signature(signature)
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = self._entries[key]
+        # Callers may modify what they get back
+        return copy.deepcopy(value)
+
+    def put(self, key: tuple, signature: str, value: Any):
+        if self.max_entries <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._check_signature(signature)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters and current size.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+            }
@@ -0,0 +1,240 @@
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from core.config import Config
+from core.prompt import estimate_tokens
+
+# Blank lines separate paragraphs; sentence ends are followed by whitespace
+_PARAGRAPH_RE = re.compile(r"\S.*?(?:\n[ \t]*\n\s*|\s*\Z)", re.S)
+_SENTENCE_RE = re.compile(r"\S.*?(?:(?:[.!?](?=\s|\Z)|[。！？])\s*|\Z)", re.S)
+_WORD_RE = re.compile(r"\S+\s*")
+
+class Chunker:
+    """
+    Splits a document, given as a stream of page texts, into chunks.
+
+    Each chunk is a dict {"text", "start", "end", "page", "page_end"}: its
+    text, its character offsets in the concatenated document, and the
+    (1-based) pages it starts and ends on. Chunkers that leave text out
+    between chunks also give "lead", the whitespace skipped before the
+    chunk. Implementations only hold about one page plus one chunk in memory.
+    """
+    # Recorded in the ingest manifest; a different signature re-chunks a file
+    name = "base"
+
+    @property
+    def signature(self) -> str:
+        return self.name
+
+    def chunks(self, pages: Iterator[str]) -> Iterator[Dict[str, Any]]:
+        raise NotImplementedError
+
+class FixedChunker(Chunker):
+    """
+    Fixed-size sliding character window (the original strategy): cuts
+    anywhere and stores `overlap` characters twice.
+    """
+    name = "fixed"
+
+    def __init__(self, chunk_size: int = 1000, overlap: int = 100):
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    @property
+    def signature(self) -> str:
+        return f"fixed:{self.chunk_size}:{self.overlap}"
+
+    def chunks(self, pages: Iterator[str]) -> Iterator[Dict[str, Any]]:
+        step = self.chunk_size - self.overlap
+        buffer, buffer_start = "", 0
+        # (offset, page number) of every page start still inside the buffer
+        page_starts: List[tuple] = []
+        consumed = 0
+
+        def emit():
+            text = buffer[:self.chunk_size]
+            start, end = buffer_start, buffer_start + len(text)
+            return {
+                "text": text, "start": start, "end": end,
+                "page": _page_at(page_starts, start), "page_end": _page_at(page_starts, max(start, end - 1)),
+            }
+
+        for page_number, page_text in enumerate(pages, start=1):
+            page_starts.append((consumed, page_number))
+            consumed += len(page_text)
+            buffer += page_text
+            while len(buffer) >= self.chunk_size:
+                yield emit()
+                buffer, buffer_start = buffer[step:], buffer_start + step
+                _drop_passed_pages(page_starts, buffer_start)
+        while buffer:
+            yield emit()
+            buffer, buffer_start = buffer[step:], buffer_start + step
+            _drop_passed_pages(page_starts, buffer_start)
+
+class _Unit:
+    __slots__ = ("text", "start", "page", "boundary")
+
+    def __init__(self, text: str, start: int, page: int, boundary: bool):
+        self.text = text          # including trailing whitespace
+        self.start = start
+        self.page = page
+        self.boundary = boundary  # ends a paragraph (or a page)
+
+class _PackingChunker(Chunker):
+    """
+    Packs indivisible units (paragraphs, sentences, words) into chunks of at
+    most `max_size` as measured by `measure`, with no overlap. A chunk is
+    closed early at a paragraph boundary once it is `min_fill` full.
+    """
+    def __init__(self, max_size: int, measure: Callable[[str], int], min_fill: float = 0.5):
+        self.max_size = max_size
+        self.measure = measure
+        self.min_fill = min_fill
+
+    def _units(self, text: str, offset: int, page: int) -> Iterator[_Unit]:
+        raise NotImplementedError
+
+    def _split_oversized(self, unit: _Unit) -> Iterator[_Unit]:
+        # Last resort for a run of text with no usable break: pack its words
+        piece, piece_start = "", unit.start
+        for match in _WORD_RE.finditer(unit.text):
+            word, at = match.group(0), unit.start + match.start()
+            # A single "word" longer than a chunk (e.g. a URL or base64 blob) is cut by length
+            while self.measure(word) > self.max_size:
+                if piece:
+                    yield _Unit(piece, piece_start, unit.page, False)
+                    piece = ""
+                cut = max(1, len(word) * self.max_size // self.measure(word))
+                yield _Unit(word[:cut], at, unit.page, False)
+                word, at = word[cut:], at + cut
+            if piece and self.measure(piece + word) > self.max_size:
+                yield _Unit(piece, piece_start, unit.page, False)
+                piece = ""
+            if not piece:
+                piece_start = at
+            piece += word
+        if piece:
+            yield _Unit(piece, piece_start, unit.page, unit.boundary)
+
+    def chunks(self, pages: Iterator[str]) -> Iterator[Dict[str, Any]]:
+        current: List[_Unit] = []
+        size = 0
+        # Whitespace between the last emitted chunk's end and the next chunk's start
+        lead = ""
+
+        def emit():
+            nonlocal lead
+            raw = "".join(unit.text for unit in current)
+            text = raw.rstrip()
+            start = current[0].start
+            chunk = {
+                "text": text, "start": start, "end": start + len(text),
+                "page": current[0].page,
+                "page_end": next(unit.page for unit in reversed(current) if unit.text.strip()),
+                "lead": lead,
+            }
+            lead = raw[len(text):]
+            return chunk
+
+        offset = 0
+        for page_number, page_text in enumerate(pages, start=1):
+            # Whitespace before the first unit of a page still belongs to an open chunk's text
+            leading = len(page_text) - len(page_text.lstrip())
+            if current and leading:
+                gap = _Unit(page_text[:leading], offset, page_number, False)
+                if size + self.measure(gap.text) > self.max_size:
+                    yield emit()
+                    current, size = [], 0
+                    lead += gap.text
+                else:
+                    current.append(gap)
+                    size += self.measure(gap.text)
+            elif leading:
+                lead += page_text[:leading]
+            for unit in self._units(page_text, offset, page_number):
+                pieces = [unit] if self.measure(unit.text) <= self.max_size else self._split_oversized(unit)
+                for piece in pieces:
+                    cost = self.measure(piece.text)
+                    if current and size + cost > self.max_size:
+                        yield emit()
+                        current, size = [], 0
+                    current.append(piece)
+                    size += cost
+                    if piece.boundary and size >= self.max_size * self.min_fill:
+                        yield emit()
+                        current, size = [], 0
+            offset += len(page_text)
+        if current:
+            yield emit()
+
+class SentenceChunker(_PackingChunker):
+    """
+    Structure-aware chunker: packs whole sentences into chunks of up to
+    `max_chars` characters with no overlap, preferring to end a chunk at a
+    paragraph break once it is `min_fill` full. Lines without sentence
+    punctuation (table rows, list items) stay together with their block.
+    """
+    name = "sentence"
+
+    def __init__(self, max_chars: int = 1000, min_fill: float = 0.75):
+        super().__init__(max_chars, len, min_fill)
+
+    @property
+    def signature(self) -> str:
+        return f"sentence:{self.max_size}:{self.min_fill}"
+
+    def _units(self, text: str, offset: int, page: int) -> Iterator[_Unit]:
+        for paragraph in _PARAGRAPH_RE.finditer(text):
+            sentences = list(_SENTENCE_RE.finditer(paragraph.group(0)))
+            for i, sentence in enumerate(sentences):
+                yield _Unit(sentence.group(0), offset + paragraph.start() + sentence.start(), page, i == len(sentences) - 1)
+
+class TokenChunker(_PackingChunker):
+    """
+    Token-length chunker: packs whole words into chunks of at most
+    `max_tokens` estimated tokens (see core.prompt.estimate_tokens), breaking
+    early at paragraph ends once `min_fill` full.
+    """
+    name = "token"
+
+    def __init__(self, max_tokens: int = 256, min_fill: float = 0.75):
+        super().__init__(max_tokens, estimate_tokens, min_fill)
+
+    @property
+    def signature(self) -> str:
+        return f"token:{self.max_size}:{self.min_fill}"
+
+    def _units(self, text: str, offset: int, page: int) -> Iterator[_Unit]:
+        for paragraph in _PARAGRAPH_RE.finditer(text):
+            words = list(_WORD_RE.finditer(paragraph.group(0)))
+            for i, word in enumerate(words):
+                yield _Unit(word.group(0), offset + paragraph.start() + word.start(), page, i == len(words) - 1)
+
+def _page_at(page_starts: List[tuple], offset: int) -> int:
+    page = page_starts[0][1] if page_starts else 1
+    for start, number in page_starts:
+        if start > offset:
+            break
+        page = number
+    return page
+
+def _drop_passed_pages(page_starts: List[tuple], buffer_start: int):
+    # Keep the page the buffer starts in and every later one
+    while len(page_starts) > 1 and page_starts[1][0] <= buffer_start:
+        page_starts.pop(0)
+
+CHUNKERS = {
+    "fixed": lambda: FixedChunker(Config.CHUNK_SIZE, Config.CHUNK_OVERLAP),
+    "sentence": lambda: SentenceChunker(Config.CHUNK_SIZE),
+    "token": lambda: TokenChunker(Config.CHUNK_TOKENS),
+}
+
+def get_chunker(name: Optional[str] = None) -> Chunker:
+    """
+    The chunker configured by name (Config.CHUNKER by default).
+    """
+    name = (name or Config.CHUNKER).lower()
+    if name not in CHUNKERS:
+        raise ValueError(f"Unknown chunker '{name}', expected one of {sorted(CHUNKERS)}")
+    return CHUNKERS[name]()
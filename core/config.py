@@ -14,6 +14,119 @@ class Config:
     # ChromaDB Persist Directory
     CHROMA_PERSIST_DIRECTORY = os.path.join(os.getcwd(), "chroma_db")
 
+    # Vector backend: "chroma" (default) or "mmap" (quantized memory-mapped local index,
+    # int8 or float16, with an IVF index trained once a collection reaches the row threshold
+    # (0 = always brute force) and the clusters scanned per query)
+    VECTOR_BACKEND = os.getenv("NEXUS_VECTOR_BACKEND", "chroma").lower()
+    VECTOR_INDEX_DIRECTORY = os.path.join(os.path.dirname(CHROMA_PERSIST_DIRECTORY), "vector_index")
+    VECTOR_QUANTIZATION = os.getenv("NEXUS_VECTOR_QUANTIZATION", "int8").lower()
+    VECTOR_IVF_MIN_ROWS = int(os.getenv("NEXUS_VECTOR_IVF_MIN_ROWS", "20000"))
+    VECTOR_IVF_PROBES = int(os.getenv("NEXUS_VECTOR_IVF_PROBES", "16"))
+
+    # Embedding engine: model (the bundled ONNX all-MiniLM-L6-v2, or any sentence-transformers
+    # name), texts per call to the embedding function (the model itself still runs 32 at a
+    # time), calls in flight, and an on-disk LRU of embeddings keyed by text hash (0 entries = no cache)
+    EMBEDDING_MODEL = os.getenv("NEXUS_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    EMBEDDING_BATCH_SIZE = int(os.getenv("NEXUS_EMBEDDING_BATCH_SIZE", "32"))
+    EMBEDDING_THREADS = int(os.getenv("NEXUS_EMBEDDING_THREADS", "1"))
+    EMBEDDING_CACHE_PATH = os.path.join(os.path.dirname(CHROMA_PERSIST_DIRECTORY), "embedding_cache.db")
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("NEXUS_EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+
+    # Memory lifecycle: retention as "pattern=days" pairs matched against chunk sources
+    # (e.g. "manual=30,*.txt=365"; unmatched sources are kept forever), cosine similarity at
+    # which chunks count as near-duplicates, how often the background job applies retention
+    # and compaction (seconds, 0 = off), and whether its compaction deletes duplicates
+    # ("apply") or only reports them ("report")
+    RETENTION_POLICIES = os.getenv("NEXUS_RETENTION", "")
+    COMPACTION_SIMILARITY = float(os.getenv("NEXUS_COMPACTION_SIMILARITY", "0.98"))
+    MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("NEXUS_MAINTENANCE_INTERVAL", "21600"))
+    MAINTENANCE_COMPACTION = os.getenv("NEXUS_MAINTENANCE_COMPACTION", "report").lower()
+
+    # Per-source record of ingested files and their chunk ids
+    INGEST_MANIFEST_PATH = os.path.join(os.path.dirname(CHROMA_PERSIST_DIRECTORY), "ingest_manifest.db")
+    # Side index of every chunk's position in its source, and of each document's page range
+    POSITION_INDEX_PATH = os.path.join(os.path.dirname(CHROMA_PERSIST_DIRECTORY), "positions.db")
+    # Held by the one process writing to memory (the app or a maintenance CLI)
+    WRITER_LOCK_PATH = os.path.join(os.path.dirname(CHROMA_PERSIST_DIRECTORY), "writer.lock")
+
+    # Retrieval: "vector", "lexical" (BM25) or "hybrid" (reciprocal rank fusion of both)
+    RETRIEVAL_MODE = os.getenv("NEXUS_RETRIEVAL_MODE", "hybrid").lower()
+    BM25_INDEX_DIRECTORY = os.path.join(os.path.dirname(CHROMA_PERSIST_DIRECTORY), "bm25_index")
+    HYBRID_CANDIDATE_MULTIPLIER = int(os.getenv("NEXUS_HYBRID_CANDIDATES", "4"))
+    RRF_K = int(os.getenv("NEXUS_RRF_K", "60"))
+
+    # Skip retrieval for turns that cannot use it (thanks, "make that shorter"), and the
+    # per-collection LRU of retrieval results for repeated queries (0 = off)
+    RETRIEVAL_GATE = os.getenv("NEXUS_RETRIEVAL_GATE", "1").lower() in ("1", "true", "yes")
+    RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("NEXUS_RETRIEVAL_CACHE_MAX_ENTRIES", "256"))
+    # Queries searched per follow-up turn (a message of at most FOLLOW_UP_MAX_WORDS words, or one
+    # that refers back): the message plus rephrasings from the recent turns, fused by reciprocal
+    # rank in one batched vector query, with the message's own ranking weighted RETRIEVAL_QUERY_WEIGHT
+    # times each rephrasing's (RETRIEVAL_QUERIES=1 searches the message only)
+    RETRIEVAL_QUERIES = int(os.getenv("NEXUS_RETRIEVAL_QUERIES", "3"))
+    FOLLOW_UP_MAX_WORDS = int(os.getenv("NEXUS_FOLLOW_UP_MAX_WORDS", "6"))
+    RETRIEVAL_QUERY_WEIGHT = float(os.getenv("NEXUS_RETRIEVAL_QUERY_WEIGHT", "2.0"))
+
+    # Post-retrieval re-ranking: candidates over-fetched per result and the MMR
+    # relevance/diversity trade-off (1.0 = relevance only)
+    MMR_FETCH_MULTIPLIER = int(os.getenv("NEXUS_MMR_FETCH_MULTIPLIER", "4"))
+    MMR_LAMBDA = float(os.getenv("NEXUS_MMR_LAMBDA", "0.7"))
+
+    # Ingestion pipeline: chunks written per batch, PDF extraction processes,
+    # and the page count above which PDF extraction fans out to a process pool
+    INGEST_BATCH_SIZE = int(os.getenv("NEXUS_INGEST_BATCH_SIZE", "64"))
+    INGEST_WORKERS = int(os.getenv("NEXUS_INGEST_WORKERS", str(os.cpu_count() or 1)))
+    PDF_PARALLEL_MIN_PAGES = int(os.getenv("NEXUS_PDF_PARALLEL_MIN_PAGES", "50"))
+
+    # Chunking: "sentence" (paragraph/sentence-aware, default), "token" (estimated-token
+    # windows) or "fixed" (sliding character window with overlap); plus how many
+    # neighbouring chunks on each side are fetched around a hit at query time, or
+    # instead (when > 0) the characters of contiguous context to grow the top hits into
+    CHUNKER = os.getenv("NEXUS_CHUNKER", "sentence").lower()
+    CHUNK_SIZE = int(os.getenv("NEXUS_CHUNK_SIZE", "1000"))
+    CHUNK_OVERLAP = int(os.getenv("NEXUS_CHUNK_OVERLAP", "100"))
+    CHUNK_TOKENS = int(os.getenv("NEXUS_CHUNK_TOKENS", "256"))
+    CONTEXT_NEIGHBOURS = int(os.getenv("NEXUS_CONTEXT_NEIGHBOURS", "1"))
+    CONTEXT_CHAR_BUDGET = int(os.getenv("NEXUS_CONTEXT_CHAR_BUDGET", "0"))
+
+    # Prompt assembly: total token budget, share reserved for memory context,
+    # and the size cap of the rolling summary of older turns
+    PROMPT_TOKEN_BUDGET = int(os.getenv("NEXUS_PROMPT_TOKEN_BUDGET", "6000"))
+    PROMPT_CONTEXT_SHARE = float(os.getenv("NEXUS_PROMPT_CONTEXT_SHARE", "0.6"))
+    PROMPT_SUMMARY_TOKENS = int(os.getenv("NEXUS_PROMPT_SUMMARY_TOKENS", "300"))
+
+    # Response Cache ("off", "exact" or "semantic"), stored next to the ChromaDB directory
+    RESPONSE_CACHE_MODE = os.getenv("NEXUS_RESPONSE_CACHE", "exact").lower()
+    RESPONSE_CACHE_PATH = os.path.join(os.path.dirname(CHROMA_PERSIST_DIRECTORY), "response_cache.json")
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("NEXUS_RESPONSE_CACHE_MAX_ENTRIES", "500"))
+    RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("NEXUS_RESPONSE_CACHE_TTL", "86400"))
+    RESPONSE_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("NEXUS_RESPONSE_CACHE_THRESHOLD", "0.95"))
+
+    # Gemini client: concurrent requests per process, request rate (0 = unlimited) and burst,
+    # per-call timeout, and retries with exponential backoff on transient errors
+    LLM_MAX_CONCURRENCY = int(os.getenv("NEXUS_LLM_MAX_CONCURRENCY", "4"))
+    LLM_REQUESTS_PER_MINUTE = float(os.getenv("NEXUS_LLM_RPM", "60"))
+    LLM_BURST = int(os.getenv("NEXUS_LLM_BURST", "5"))
+    LLM_TIMEOUT_SECONDS = float(os.getenv("NEXUS_LLM_TIMEOUT", "60"))
+    LLM_MAX_RETRIES = int(os.getenv("NEXUS_LLM_MAX_RETRIES", "3"))
+    LLM_BACKOFF_BASE_SECONDS = float(os.getenv("NEXUS_LLM_BACKOFF_BASE", "1.0"))
+    LLM_BACKOFF_MAX_SECONDS = float(os.getenv("NEXUS_LLM_BACKOFF_MAX", "20"))
+
+    # Batch runner (python -m core.batch): queries in flight at once; Gemini calls
+    # are still capped by NEXUS_LLM_MAX_CONCURRENCY
+    BATCH_CONCURRENCY = int(os.getenv("NEXUS_BATCH_CONCURRENCY", "8"))
+
+    # Chat sessions (SQLite) and how many messages the chat view shows per page
+    SESSION_DB_PATH = os.getenv("NEXUS_SESSION_DB", os.path.join(os.path.dirname(CHROMA_PERSIST_DIRECTORY), "sessions.db"))
+    CHAT_PAGE_SIZE = int(os.getenv("NEXUS_CHAT_PAGE_SIZE", "20"))
+
+    # Telemetry: JSON span log ("-" for stdout), Prometheus textfile and /metrics port (0 = off),
+    # and the optional diagnostics panel in the sidebar
+    TRACE_LOG_PATH = os.getenv("NEXUS_TRACE_LOG")
+    METRICS_FILE = os.getenv("NEXUS_METRICS_FILE")
+    METRICS_PORT = int(os.getenv("NEXUS_METRICS_PORT", "0"))
+    DIAGNOSTICS_PANEL = os.getenv("NEXUS_DIAGNOSTICS", "0").lower() in ("1", "true", "yes")
+
     @staticmethod
     def validate():
         """
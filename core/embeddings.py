@@ -0,0 +1,225 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.config import Config
+from core.telemetry import telemetry
+
+# The model Chroma ships with (ONNX, 384 dimensions); other names load through sentence-transformers
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+def load_model(name: str) -> Callable:
+    """
+    A Chroma embedding function for a model name.
+
+    Raises:
+        ImportError: If the model needs sentence-transformers and it is not installed.
+    """
+    from chromadb.utils import embedding_functions
+    if name in (DEFAULT_MODEL, "default"):
+        return embedding_functions.DefaultEmbeddingFunction()
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        raise ImportError(f"Embedding model '{name}' needs the sentence-transformers package (pip install sentence-transformers)")
+    return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=name, normalize_embeddings=True)
+
+class EmbeddingCache:
+    """
+    On-disk LRU of embeddings in SQLite, keyed by a hash of the model name
+    and the text, holding at most `max_entries` float32 vectors.
+    """
+    def __init__(self, path: str, max_entries: int = 100000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key BLOB PRIMARY KEY,
+                vector BLOB NOT NULL,
+                used_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS embeddings_used_at ON embeddings (used_at);
+        """)
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        Cached vectors for the keys that have one; hits become most recently used.
+        """
+        found = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                marks = ",".join("?" * len(batch))
+                for key, vector in self._conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", batch):
+                    found[key] = np.frombuffer(vector, dtype=np.float32)
+            if found:
+                with self._conn:
+                    self._conn.executemany("UPDATE embeddings SET used_at = ? WHERE key = ?", [(now, key) for key in found])
+        return found
+
+    def put_many(self, items: List[Tuple[bytes, np.ndarray]]):
+        """
+        Store vectors, evicting the least recently used beyond max_entries.
+        """
+        if not items:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, used_at) VALUES (?, ?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items]
+            )
+            self._size += self._conn.total_changes - before
+            if self._size > self.max_entries:
+                excess = self._size - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY used_at LIMIT ?)", (excess,)
+                )
+                self._size -= excess
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM embeddings")
+            self._size = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class EmbeddingEngine:
+    """
+    Embeds texts for ingestion and queries alike: serves repeats from the
+    embedding cache, de-duplicates within a call, and passes the remaining
+    texts to the embedding function `batch_size` at a time, with up to
+    `threads` calls in flight (ONNX Runtime releases the GIL). Each function
+    still feeds its model in its own inner batches (32 texts for both
+    Chroma's ONNX model and sentence-transformers).
+
+    Keeps running totals so throughput can be tuned per host, see stats().
+    """
+    def __init__(
+        self,
+        model: str = None,
+        batch_size: int = None,
+        threads: int = None,
+        cache: Optional[EmbeddingCache] = None,
+        function: Optional[Callable] = None,
+    ):
+        """
+        Args:
+            model (str): Model name (default: Config.EMBEDDING_MODEL).
+            batch_size (int): Texts per call to the embedding function (default: Config.EMBEDDING_BATCH_SIZE).
+            threads (int): Batches embedded concurrently (default: Config.EMBEDDING_THREADS).
+            cache (EmbeddingCache, optional): Persistent cache; None disables caching.
+            function (callable, optional): Embedding function to use instead of loading `model`.
+        """
+        self.model = model or Config.EMBEDDING_MODEL
+        self.batch_size = max(1, batch_size or Config.EMBEDDING_BATCH_SIZE)
+        self.threads = max(1, threads or Config.EMBEDDING_THREADS)
+        self.cache = cache
+        self.function = function or load_model(self.model)
+        self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="nexus-embed") if self.threads > 1 else None
+        self._stats_lock = threading.Lock()
+        self._stats = {"texts": 0, "cache_hits": 0, "computed": 0, "seconds": 0.0}
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).digest()
+
+    def _run(self, batch: List[str]) -> np.ndarray:
+        return np.asarray(self.function(batch), dtype=np.float32)
+
+    def _compute(self, texts: List[str]) -> np.ndarray:
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if self._pool is None or len(batches) == 1:
+            results = [self._run(batch) for batch in batches]
+        else:
+            results = list(self._pool.map(self._run, batches))
+        return np.concatenate(results) if results else np.empty((0, 0), dtype=np.float32)
+
+    @telemetry.traced("embedding.embed")
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts, computing only those not already cached.
+
+        Args:
+            texts (List[str]): Texts to embed.
+
+        Returns:
+            np.ndarray: One float32 row per text, in input order.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        keys = [self._key(text) for text in texts]
+        known = self.cache.get_many(list(set(keys))) if self.cache is not None else {}
+
+        # Each distinct uncached text is embedded once
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in known and key not in missing:
+                missing[key] = text
+        start = time.perf_counter()
+        computed = self._compute(list(missing.values())) if missing else None
+        elapsed = time.perf_counter() - start
+        if computed is not None:
+            fresh = dict(zip(missing, computed))
+            known.update(fresh)
+            if self.cache is not None:
+                self.cache.put_many(list(fresh.items()))
+
+        with self._stats_lock:
+            self._stats["texts"] += len(texts)
+            self._stats["cache_hits"] += len(texts) - len(missing)
+            self._stats["computed"] += len(missing)
+            self._stats["seconds"] += elapsed
+        telemetry.current().set(
+            texts=len(texts), computed=len(missing),
+            embeddings_per_s=round(len(missing) / elapsed, 1) if missing and elapsed else None
+        )
+        return np.stack([known[key] for key in keys])
+
+    def __call__(self, input: List[str]) -> List[np.ndarray]:
+        # Same calling convention as a Chroma embedding function
+        return list(self.embed(list(input)))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Totals since start-up: texts requested, cache hits, texts computed,
+        model seconds, and model throughput in embeddings per second.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["hit_rate"] = stats["cache_hits"] / stats["texts"] if stats["texts"] else 0.0
+        stats["embeddings_per_s"] = stats["computed"] / stats["seconds"] if stats["seconds"] else 0.0
+        stats.update(model=self.model, batch_size=self.batch_size, threads=self.threads, cached=len(self.cache) if self.cache is not None else 0)
+        return stats
+
+_engines: Dict[Tuple[str, str], EmbeddingEngine] = {}
+_engines_lock = threading.Lock()
+
+def shared_engine() -> EmbeddingEngine:
+    """
+    The process-wide engine for the configured model and cache, so every
+    collection shares one loaded model and one cache.
+    """
+    cache_path = Config.EMBEDDING_CACHE_PATH if Config.EMBEDDING_CACHE_MAX_ENTRIES > 0 else ""
+    key = (Config.EMBEDDING_MODEL, cache_path)
+    with _engines_lock:
+        if key not in _engines:
+            cache = EmbeddingCache(cache_path, Config.EMBEDDING_CACHE_MAX_ENTRIES) if cache_path else None
+            _engines[key] = EmbeddingEngine(cache=cache)
+        return _engines[key]
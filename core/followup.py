@@ -0,0 +1,71 @@
+import re
+from typing import Dict, List, Optional
+
+# Words that lean on an earlier turn for their meaning
+_ANAPHORA = re.compile(
+    r"\b(?:it|its|this|these|those|they|them|their|he|him|his|she|her|the same|the other|"
+    r"the former|the latter|the above|the previous)\b|"
+    r"^(?:and|but|also|what about|how about|what else)\b|"
+    r"[\u5b83\u8fd9\u90a3\u4ed6\u5979]"
+)
+_WORD = re.compile(r"[a-z0-9_]+(?:[-.][a-z0-9_]+)*|[\u3400-\u4dbf\u4e00-\u9fff]")
+
+def is_follow_up(query: str, max_words: int = 6) -> bool:
+    """
+    Whether a message likely depends on the conversation to be understood:
+    it is short ("and the deadline?") or refers back to something ("what
+    does it cost?"). Self-contained questions are searched as written.
+
+    Args:
+        query (str): The user's message.
+        max_words (int): Messages of at most this many words count as follow-ups.
+    """
+    text = query.lower().strip()
+    if not text:
+        return False
+    return len(_WORD.findall(text)) <= max_words or bool(_ANAPHORA.search(text))
+
+def _message_text(message: Dict) -> str:
+    content = message.get("content")
+    # Assistant messages are stored as {"answer", "thought", "context_used"}
+    if isinstance(content, dict):
+        content = content.get("answer", "")
+    return str(content or "").strip()
+
+def _excerpt(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(None, 1)[0]
+
+def retrieval_queries(query: str, chat_history: Optional[List[Dict]] = None, limit: int = 3, answer_chars: int = 400, max_words: int = 6) -> List[str]:
+    """
+    Queries to search memory with for one turn. A follow-up such as "what
+    about the second one?" is also searched after the previous question,
+    with the start of the previous answer, and as the previous question on
+    its own, so it still finds what the conversation is about. Any other
+    message is searched alone, so the previous topic cannot crowd it out.
+
+    Args:
+        query (str): The user's message.
+        chat_history (List[Dict], optional): Earlier messages, without this one.
+        limit (int): Most queries to return, the message included.
+        answer_chars (int): Characters of the previous answer to include.
+        max_words (int): Length up to which a message counts as a follow-up, see is_follow_up().
+
+    Returns:
+        List[str]: Distinct queries, the message first.
+    """
+    history = chat_history or []
+    query = query.strip()
+    if limit <= 1 or not history or not is_follow_up(query, max_words):
+        return [query]
+    last_question = next((_message_text(msg) for msg in reversed(history) if msg.get("role") == "user" and _message_text(msg)), "")
+    last_answer = next((_message_text(msg) for msg in reversed(history) if msg.get("role") == "assistant" and _message_text(msg)), "")
+    queries = [query]
+    if last_question:
+        queries.append(f"{last_question} {query}")
+    if last_answer:
+        queries.append(f"{query} {_excerpt(last_answer, answer_chars)}")
+    if last_question:
+        queries.append(last_question)
+    return list(dict.fromkeys(queries))[:limit]
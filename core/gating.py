@@ -0,0 +1,53 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Whole messages that only acknowledge, greet or close the conversation
+_SMALL_TALK = re.compile(
+    r"^(?:(?:thanks|thank you|thx|ty|cheers|ok|okay|k|cool|great|nice|perfect|awesome|got it|i see|"
+    r"sounds good|makes sense|sure|yes|yep|yeah|no|nope|hi|hello|hey|bye|goodbye|good night|"
+    r"谢谢|多谢|好的|好|嗯|收到|明白了|你好|再见|晚安)"
+    r"(?: (?:so much|a lot|again|very much|a bunch))?[ ,]*)+$"
+)
+
+# Requests to rework the previous answer rather than to look something up
+_REWRITE = re.compile(
+    r"^(?:please )?(?:"
+    r"(?:make|keep) (?:it|that|this|the answer|your answer) (?:a (?:bit|little) )?"
+    r"(?:shorter|longer|simpler|clearer|more (?:concise|formal|casual|detailed)|less \w+)|"
+    r"(?:rephrase|reword|rewrite|summari[sz]e|shorten|simplify|expand(?: on)?|elaborate(?: on)?|translate|explain)"
+    r"(?: (?:it|that|this|the answer|your answer))?(?: (?:in|into|to) \w+)?|"
+    r"(?:in|as) (?:a )?(?:bullet points|bullets|a list|list|a table|table|one sentence|english|chinese)|"
+    r"shorter|longer|simpler|more detail|more details|tl ?;? ?dr|go on|continue|again|say that again|"
+    r"短一点|简短一点|简单一点|详细一点|再详细一点|翻译(?:成\w+)?|换个说法|再说一遍|继续"
+    r")(?: please)?$"
+)
+
+def _normalize(query: str) -> str:
+    query = re.sub(r"[^\w\s;,'一-鿿]", " ", query.lower())
+    return re.sub(r"\s+", " ", query).strip(" ,")
+
+def needs_retrieval(query: str, chat_history: Optional[List[Dict]] = None) -> Tuple[bool, str]:
+    """
+    Cheap check for whether a turn can use memory at all.
+
+    Skips acknowledgements and greetings, and requests to rework the
+    previous answer (which the prompt already carries) when there is one.
+    Anything else, including every question, retrieves.
+
+    Args:
+        query (str): The user's message.
+        chat_history (List[Dict], optional): Earlier messages, without this one.
+
+    Returns:
+        Tuple[bool, str]: Whether to retrieve, and why not ("empty", "small_talk",
+            "rewrite") or "" when it should.
+    """
+    text = _normalize(query)
+    if not text:
+        return False, "empty"
+    if _SMALL_TALK.match(text):
+        return False, "small_talk"
+    has_answer = any(msg.get("role") == "assistant" for msg in chat_history or [])
+    if has_answer and _REWRITE.match(text):
+        return False, "rewrite"
+    return True, ""
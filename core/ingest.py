@@ -0,0 +1,217 @@
+"""
+Bulk ingestion of a directory tree into memory.
+
+Walks the tree, extracts and chunks PDF/TXT files in a process pool, and
+writes the chunks to the collection in embedding batches. Each file is
+recorded in the ingest manifest (hash, size, mtime) once all its chunks are
+stored, so reruns only process new or changed files, and chunks of files
+that were deleted from the tree are removed. An interrupted run resumes
+where it stopped: finished files are skipped and the chunks a half-written
+file already stored are not embedded again.
+
+Usage:
+    python -m core.ingest <dir> [--collection nexus_memory] [--workers N] [--chunker sentence] [--dry-run]
+"""
+import argparse
+import hashlib
+import io
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from core.chunking import Chunker, get_chunker
+from core.config import Config
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt")
+
+def scan(root: str) -> Iterator[Tuple[str, str]]:
+    """
+    Supported files under `root`, skipping hidden files and directories.
+
+    Yields:
+        Tuple[str, str]: (absolute path, source name relative to root with '/' separators).
+    """
+    root = os.path.abspath(root)
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = sorted(name for name in subdirectories if not name.startswith("."))
+        for name in sorted(files):
+            if name.startswith(".") or not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                continue
+            path = os.path.join(directory, name)
+            yield path, os.path.relpath(path, root).replace(os.sep, "/")
+
+def _read_pages(data: bytes, path: str) -> Iterator[str]:
+    if path.lower().endswith(".pdf"):
+        from pypdf import PdfReader
+        for page in PdfReader(io.BytesIO(data)).pages:
+            yield (page.extract_text() or "") + "\n"
+    else:
+        yield data.decode("utf-8")
+
+def _extract(path: str, chunker: Chunker) -> Tuple[str, List[Dict[str, Any]]]:
+    # Runs in a worker process: the CPU-heavy part (PDF parsing and chunking) of one file
+    with open(path, "rb") as f:
+        data = f.read()
+    return hashlib.sha256(data).hexdigest(), list(chunker.chunks(_read_pages(data, path)))
+
+class DirectoryIngester:
+    """
+    Mirrors a directory tree into a MemoryManager collection.
+    """
+    def __init__(self, memory, root: str, workers: Optional[int] = None, chunker: Optional[Chunker] = None):
+        """
+        Args:
+            memory (MemoryManager): Destination collection.
+            root (str): Directory to ingest.
+            workers (int, optional): Extraction processes (default: Config.INGEST_WORKERS).
+            chunker (Chunker, optional): Chunking strategy (default: the one named by Config.CHUNKER).
+        """
+        self.memory = memory
+        self.root = os.path.abspath(root)
+        self.workers = max(1, workers or min(Config.INGEST_WORKERS, os.cpu_count() or 1))
+        self.chunker = chunker or get_chunker()
+
+    def _owned(self, entry: Dict[str, Any]) -> bool:
+        # Manifest entries written by an ingester for this tree (uploads have no path)
+        path = entry.get("path")
+        return bool(path) and path.startswith(self.root + os.sep)
+
+    def plan(self) -> Dict[str, Any]:
+        """
+        Compare the tree with the manifest without touching the collection.
+
+        Returns:
+            Dict[str, Any]: {"changed": [(path, source, stat), ...], "unchanged": [source, ...],
+                "deleted": [source, ...]}.
+        """
+        recorded = self.memory.manifest.sources()
+        changed, unchanged, seen = [], [], set()
+        for path, source in scan(self.root):
+            seen.add(source)
+            stat = os.stat(path)
+            entry = recorded.get(source)
+            if (
+                entry and entry.get("path") == path
+                and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime
+                and entry.get("chunker") == self.chunker.signature
+            ):
+                unchanged.append(source)
+            else:
+                changed.append((path, source, stat))
+        deleted = [source for source, entry in recorded.items() if source not in seen and self._owned(entry)]
+        return {"changed": changed, "unchanged": unchanged, "deleted": deleted}
+
+    def run(self, progress: Optional[Callable[[str], None]] = print, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Ingest new and changed files and remove deleted ones.
+
+        Args:
+            progress (callable, optional): Called with one status line per file.
+            dry_run (bool): Only report what would be done.
+
+        Returns:
+            Dict[str, Any]: Counts of files ingested, unchanged, deleted and failed, chunks stored and seconds taken.
+        """
+        start = time.perf_counter()
+        plan = self.plan()
+        stats = {
+            "ingested": 0, "unchanged": len(plan["unchanged"]), "deleted": 0, "failed": 0,
+            "chunks": 0, "seconds": 0.0,
+        }
+        progress = progress or (lambda line: None)
+        if dry_run:
+            for _, source, _ in plan["changed"]:
+                progress(f"would ingest {source}")
+            for source in plan["deleted"]:
+                progress(f"would delete {source}")
+            stats["deleted"] = len(plan["deleted"])
+            return stats
+
+        for source in plan["deleted"]:
+            removed = self.memory.delete_source(source)
+            stats["deleted"] += 1
+            progress(f"deleted {source} ({removed} chunks)")
+
+        total = len(plan["changed"])
+        pending = iter(plan["changed"])
+        # Spawned workers avoid forking a process that holds ChromaDB threads and locks
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            in_flight = {}
+
+            def submit_next() -> bool:
+                item = next(pending, None)
+                if item is None:
+                    return False
+                in_flight[executor.submit(_extract, item[0], self.chunker)] = item
+                return True
+
+            try:
+                # A bounded window keeps extracted-but-unstored chunks from piling up
+                while len(in_flight) < self.workers * 2 and submit_next():
+                    pass
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path, source, stat = in_flight.pop(future)
+                        try:
+                            file_hash, chunks = future.result()
+                            ids = self.memory.ingest_chunks(
+                                source, chunks, file_hash, self.chunker.signature,
+                                path=path, size=stat.st_size, mtime=stat.st_mtime
+                            )
+                            stats["ingested"] += 1
+                            stats["chunks"] += len(ids)
+                            progress(f"[{stats['ingested'] + stats['failed']}/{total}] {source}: {len(ids)} chunks")
+                        except Exception as e:
+                            stats["failed"] += 1
+                            print(f"Error ingesting {source}: {e}")
+                        submit_next()
+            except BaseException:
+                # Interrupted: finished files are already in the manifest, the rest are picked up next run
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            finally:
+                stats["seconds"] = time.perf_counter() - start
+        return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--collection", default="nexus_memory")
+    parser.add_argument("--workers", type=int, default=None, help="extraction processes (default: NEXUS_INGEST_WORKERS)")
+    parser.add_argument("--chunker", default=None, help="fixed, sentence or token (default: NEXUS_CHUNKER)")
+    parser.add_argument("--dry-run", action="store_true", help="list what would change and exit")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"not a directory: {args.directory}")
+    from core.memory import MemoryManager
+    from core.store import registry
+
+    with ExitStack() as stack:
+        if not args.dry_run:
+            # Held for the whole run; the app stays usable for chat meanwhile
+            try:
+                stack.enter_context(registry.writer("the ingest CLI"))
+            except RuntimeError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+        ingester = DirectoryIngester(MemoryManager(args.collection), args.directory, args.workers, get_chunker(args.chunker))
+        try:
+            stats = ingester.run(dry_run=args.dry_run)
+        except KeyboardInterrupt:
+            print("Interrupted; rerun the same command to resume.", file=sys.stderr)
+            sys.exit(130)
+    print(
+        f"{stats['ingested']} ingested ({stats['chunks']} chunks), {stats['unchanged']} unchanged, "
+        f"{stats['deleted']} deleted, {stats['failed']} failed in {stats['seconds']:.1f}s"
+    )
+    if stats["failed"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+(?:[-.:/#][a-z0-9_]+)*|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+_SPLIT_RE = re.compile(r"[-.:/#]")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how i if in is it its of on or so that the this to was "
+    "were what when where which who why will with you your".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lexical tokens for BM25. Identifiers such as 'ERR-4032' or 'v1.2.3' are
+    kept whole and also indexed by their parts; CJK text is indexed per character.
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        tokens.append(token)
+        if len(token) > 1 and _SPLIT_RE.search(token):
+            tokens.extend(part for part in _SPLIT_RE.split(token) if part and part not in _STOPWORDS)
+    return tokens
+
+class BM25Index:
+    """
+    Incremental BM25 inverted index, persisted as a JSON snapshot plus an
+    append-only log of adds and removals. The log is folded into a fresh
+    snapshot once it outgrows the snapshot, so each write costs only the
+    changed documents.
+    """
+    def __init__(self, path: str = None, k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            path (str): Snapshot file; the log lives at '<path>.log'. None keeps the index in memory.
+            k1 (float): Term-frequency saturation.
+            b (float): Length normalisation.
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._docs: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_len = 0
+        self._log_entries = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._docs
+
+    # --- in-memory mutation ---
+    def _add_terms(self, doc_id: str, terms: Dict[str, int]):
+        if doc_id in self._docs:
+            self._remove_terms(doc_id)
+        self._docs[doc_id] = terms
+        self._lengths[doc_id] = sum(terms.values())
+        self._total_len += self._lengths[doc_id]
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def _remove_terms(self, doc_id: str):
+        terms = self._docs.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_len -= self._lengths.pop(doc_id)
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+
+    # --- public API ---
+    def add(self, ids: List[str], texts: List[str]):
+        """
+        Index (or re-index) documents.
+        """
+        entries = []
+        with self._lock:
+            for doc_id, text in zip(ids, texts):
+                terms = dict(Counter(tokenize(text)))
+                self._add_terms(doc_id, terms)
+                entries.append({"op": "add", "id": doc_id, "tf": terms})
+            self._append_log(entries)
+
+    def remove(self, ids: Iterable[str]):
+        """
+        Drop documents from the index.
+        """
+        with self._lock:
+            entries = [{"op": "del", "id": doc_id} for doc_id in ids if doc_id in self._docs]
+            for entry in entries:
+                self._remove_terms(entry["id"])
+            self._append_log(entries)
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
+            self._lengths.clear()
+            self._postings.clear()
+            self._total_len = 0
+            self._write_snapshot()
+
+    def reload(self):
+        """
+        Re-read the index from disk, e.g. after another process wrote to it.
+        """
+        with self._lock:
+            self._docs.clear()
+            self._lengths.clear()
+            self._postings.clear()
+            self._total_len = 0
+            self._log_entries = 0
+            self._load(repair=False)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Rank documents against a query.
+
+        Returns:
+            List[Tuple[str, float]]: (doc_id, score) pairs, best first.
+        """
+        with self._lock:
+            n_docs = len(self._docs)
+            if n_docs == 0:
+                return []
+            avg_len = self._total_len / n_docs or 1.0
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                df = len(posting)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in posting.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    # --- persistence ---
+    @property
+    def _log_path(self) -> str:
+        return f"{self.path}.log"
+
+    def _load(self, repair: bool = True):
+        if not self.path:
+            return
+        torn = False
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for doc_id, terms in json.load(f).get("docs", {}).items():
+                        self._add_terms(doc_id, terms)
+            if os.path.exists(self._log_path):
+                with open(self._log_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            # A torn final line from an interrupted write; everything before it is valid
+                            torn = True
+                            break
+                        if entry["op"] == "add":
+                            self._add_terms(entry["id"], entry["tf"])
+                        else:
+                            self._remove_terms(entry["id"])
+                        self._log_entries += 1
+            if torn and repair:
+                # Compact now so later appends do not land after the torn line
+                self._write_snapshot()
+        except Exception as e:
+            print(f"Error loading BM25 index: {e}")
+            self._docs.clear()
+            self._lengths.clear()
+            self._postings.clear()
+            self._total_len = 0
+
+    def _append_log(self, entries: List[Dict]):
+        if not self.path or not entries:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self._log_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+            self._log_entries += len(entries)
+            if self._log_entries > max(1000, len(self._docs)):
+                self._write_snapshot()
+        except Exception as e:
+            print(f"Error persisting BM25 index: {e}")
+
+    def _write_snapshot(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"docs": self._docs}, f)
+        os.replace(tmp_path, self.path)
+        if os.path.exists(self._log_path):
+            os.remove(self._log_path)
+        self._log_entries = 0
@@ -0,0 +1,148 @@
+"""
+Memory lifecycle: retention policies, near-duplicate compaction and the
+background job that applies both.
+
+Usage:
+    python -m core.lifecycle stats [--collection nexus_memory]
+    python -m core.lifecycle expire [--retention "manual=30,*.txt=365"] [--dry-run]
+    python -m core.lifecycle compact [--similarity 0.98] [--dry-run]
+    python -m core.lifecycle delete <source>
+"""
+import argparse
+import fnmatch
+import json
+import sys
+import threading
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import Config
+
+DAY_SECONDS = 86400.0
+
+def parse_retention(spec: str) -> List[Tuple[str, float]]:
+    """
+    Parse a retention spec of comma-separated "pattern=days" pairs.
+
+    Args:
+        spec (str): e.g. "manual=30,reports/*=90,*.txt=365".
+
+    Returns:
+        List[Tuple[str, float]]: (source glob, retention in seconds), in spec order.
+
+    Raises:
+        ValueError: If a pair is malformed.
+    """
+    policies = []
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        pattern, separator, days = item.rpartition("=")
+        if not separator or not pattern.strip():
+            raise ValueError(f"Invalid retention policy '{item.strip()}', expected pattern=days")
+        policies.append((pattern.strip(), float(days) * DAY_SECONDS))
+    return policies
+
+def retention_for(source: str, policies: List[Tuple[str, float]]) -> Optional[float]:
+    """
+    Retention in seconds of the first policy matching `source`, or None to keep it forever.
+    """
+    for pattern, seconds in policies:
+        if fnmatch.fnmatchcase(source, pattern):
+            return seconds
+    return None
+
+class MaintenanceJob:
+    """
+    Daemon thread that applies retention and compaction to a collection
+    every `interval` seconds. Both take the store's ingest lock, so they
+    never overlap an upload; queries only wait while chunks are deleted.
+    Unless told to apply it, compaction only reports the duplicates it
+    finds: an edited note or a new version of a document reads as a
+    near-duplicate of the old one.
+    """
+    def __init__(self, memory, interval: float = None, compaction: str = None):
+        """
+        Args:
+            memory (MemoryManager): Collection to maintain.
+            interval (float): Seconds between runs (default: Config.MAINTENANCE_INTERVAL_SECONDS).
+            compaction (str): "apply" to delete duplicates, "report" to only count them, or
+                "off" (default: Config.MAINTENANCE_COMPACTION).
+        """
+        self.memory = memory
+        self.interval = Config.MAINTENANCE_INTERVAL_SECONDS if interval is None else interval
+        self.compaction = (compaction or Config.MAINTENANCE_COMPACTION).lower()
+        self.last_report: Dict[str, Any] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> Dict[str, Any]:
+        """
+        Apply retention, then compact or report duplicates (per `compaction`). Returns the reports.
+
+        Raises:
+            RuntimeError: Another process is writing to memory.
+        """
+        from core.store import registry
+
+        with registry.writer("background maintenance"):
+            report = {"retention": self.memory.apply_retention()}
+            if self.compaction in ("apply", "report"):
+                report["compaction"] = dict(self.memory.compact(dry_run=self.compaction != "apply"), mode=self.compaction)
+        self.last_report = report
+        return report
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except RuntimeError as e:
+                # Another process is writing; the next run catches up
+                print(f"Skipping memory maintenance: {e}")
+            except Exception as e:
+                print(f"Error in memory maintenance: {e}")
+
+    def start(self) -> "MaintenanceJob":
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="nexus-maintenance", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=("stats", "expire", "compact", "delete"))
+    parser.add_argument("source", nargs="?", help="source to delete (delete only)")
+    parser.add_argument("--collection", default="nexus_memory")
+    parser.add_argument("--retention", default=None, help="pattern=days pairs (default: NEXUS_RETENTION)")
+    parser.add_argument("--similarity", type=float, default=None, help="near-duplicate cosine threshold (default: NEXUS_COMPACTION_SIMILARITY)")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be removed without removing it")
+    args = parser.parse_args()
+    if args.command == "delete" and not args.source:
+        parser.error("delete needs a source")
+    from core.memory import MemoryManager
+    from core.store import registry
+
+    with ExitStack() as stack:
+        if args.command != "stats" and not args.dry_run:
+            try:
+                stack.enter_context(registry.writer("the lifecycle CLI"))
+            except RuntimeError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+        memory = MemoryManager(args.collection)
+        if args.command == "stats":
+            result = memory.stats()
+        elif args.command == "expire":
+            policies = parse_retention(args.retention) if args.retention is not None else None
+            result = memory.apply_retention(policies, dry_run=args.dry_run)
+        elif args.command == "compact":
+            result = memory.compact(args.similarity, dry_run=args.dry_run)
+        else:
+            result = {"source": args.source, "chunks": memory.delete_source(args.source)}
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
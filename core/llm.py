@@ -1,27 +1,91 @@
 
-import google.generativeai as genai
-from typing import Optional, List, Dict, Any
+import threading
+import time
+from typing import Optional, List, Dict, Any, Iterator
 from core.config import Config
+from core.resilience import CallLimiter, Singleflight, backoff_delay, is_retryable, retry_call
+from core.telemetry import telemetry
+
+# Returned when the model produced no text
+EMPTY_RESPONSE = "I couldn't generate a response. Please try again."
+
+_limiter: Optional[CallLimiter] = None
+_limiter_lock = threading.Lock()
+
+def shared_limiter() -> CallLimiter:
+    """
+    The process-wide limiter, so every client and Streamlit session draws
+    from one concurrency and rate budget.
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = CallLimiter(Config.LLM_MAX_CONCURRENCY, Config.LLM_REQUESTS_PER_MINUTE, Config.LLM_BURST)
+        return _limiter
 
 class GeminiClient:
     """
     Wrapper for Google Gemini API.
+
+    Every upstream call holds a slot of the shared CallLimiter (concurrency
+    semaphore plus token bucket), has a timeout, and is retried on transient
+    errors with exponential backoff and jitter. Identical prompts generated
+    concurrently share one upstream call.
     """
-    def __init__(self, model_name: str = "gemini-3-flash-preview"):
+    # In-flight generate() calls keyed by (model name, prompt)
+    _inflight = Singleflight()
+
+    def __init__(self, model_name: str = "gemini-3-flash-preview", model: Any = None, limiter: Optional[CallLimiter] = None):
         """
         Initialize the Gemini Client.
         
         Args:
             model_name (str): The model to use (default: "gemini-3-flash-preview").
+            model (optional): Object with genai.GenerativeModel's generate_content()
+                to use instead of the real model (e.g. a local fake).
+            limiter (CallLimiter, optional): Limits to apply instead of the process-wide ones.
         """
         try:
-            Config.validate()
-            genai.configure(api_key=Config.GOOGLE_API_KEY)
-            self.model = genai.GenerativeModel(model_name)
+            if model is None:
+                # Deferred until a client is built: the SDK import takes about a second
+                import google.generativeai as genai
+                Config.validate()
+                genai.configure(api_key=Config.GOOGLE_API_KEY)
+                model = genai.GenerativeModel(model_name)
+            self.model_name = model_name
+            self.model = model
+            self.limiter = limiter or shared_limiter()
         except Exception as e:
             print(f"Error initializing Gemini Client: {e}")
             raise e
 
+    @staticmethod
+    def _on_retry(attempt: int, error: BaseException, delay: float):
+        print(f"Retrying Gemini call (attempt {attempt}) in {delay:.1f}s after: {error}")
+        telemetry.current().set(retries=attempt)
+
+    def _request(self, prompt: str):
+        """
+        One generate_content call under the limiter, retried on transient errors.
+        """
+        def attempt():
+            with self.limiter.slot(timeout=Config.LLM_TIMEOUT_SECONDS):
+                return self.model.generate_content(prompt, request_options={"timeout": Config.LLM_TIMEOUT_SECONDS})
+
+        return retry_call(
+            attempt, Config.LLM_MAX_RETRIES, Config.LLM_BACKOFF_BASE_SECONDS, Config.LLM_BACKOFF_MAX_SECONDS,
+            on_retry=self._on_retry
+        )
+
+    def _generate_text(self, prompt: str) -> Optional[str]:
+        response = self._request(prompt)
+        # Safely extract text from response
+        if response and response.candidates and len(response.candidates) > 0:
+            candidate = response.candidates[0]
+            if candidate.content and candidate.content.parts and len(candidate.content.parts) > 0:
+                return candidate.content.parts[0].text
+        return None
+
     def generate(self, prompt: str) -> str:
         """
         Generate content from Gemini based on a prompt.
@@ -32,17 +96,77 @@ class GeminiClient:
         Returns:
             str: The generated text response.
         """
-        try:
-            response = self.model.generate_content(prompt)
-            # Safely extract text from response
-            if response and response.candidates and len(response.candidates) > 0:
-                candidate = response.candidates[0]
-                if candidate.content and candidate.content.parts and len(candidate.content.parts) > 0:
-                    return candidate.content.parts[0].text
-            return "I couldn't generate a response. Please try again."
-        except Exception as e:
-            print(f"Error generating content: {e}")
-            return f"Error: {str(e)}"
+        with telemetry.span("llm.generate", prompt_chars=len(prompt)) as span:
+            try:
+                ran = False
+
+                def call():
+                    nonlocal ran
+                    ran = True
+                    return self._generate_text(prompt)
+
+                # Callers waiting on an identical in-flight prompt get its result instead
+                text = self._inflight.do((self.model_name, prompt), call)
+                span.set(deduplicated=not ran)
+                if text:
+                    span.set(response_chars=len(text))
+                    return text
+                span.fail("empty response")
+                return EMPTY_RESPONSE
+            except Exception as e:
+                print(f"Error generating content: {e}")
+                span.fail(e)
+                return f"Error: {str(e)}"
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Stream content from Gemini as it is generated.
+        
+        Args:
+            prompt (str): The input prompt.
+            
+        Yields:
+            str: Text deltas in the order Gemini produces them.
+        """
+        with telemetry.span("llm.generate_stream", prompt_chars=len(prompt)) as span:
+            try:
+                produced = 0
+                attempt = 0
+                while True:
+                    try:
+                        # The slot is held while the stream is consumed: the connection stays busy
+                        with self.limiter.slot(timeout=Config.LLM_TIMEOUT_SECONDS):
+                            response = self.model.generate_content(
+                                prompt, stream=True, request_options={"timeout": Config.LLM_TIMEOUT_SECONDS}
+                            )
+                            for chunk in response:
+                                # Safely extract text from each streamed chunk
+                                if chunk and chunk.candidates and len(chunk.candidates) > 0:
+                                    candidate = chunk.candidates[0]
+                                    if candidate.content and candidate.content.parts:
+                                        text = "".join(part.text for part in candidate.content.parts if getattr(part, "text", None))
+                                        if text:
+                                            if not produced:
+                                                span.set(first_chunk_ms=(time.time() - span.start) * 1000)
+                                            produced += len(text)
+                                            yield text
+                        break
+                    except Exception as e:
+                        # Once text has been shown a retry would repeat it, so only retry before the first chunk
+                        if produced or attempt >= Config.LLM_MAX_RETRIES or not is_retryable(e):
+                            raise
+                        delay = backoff_delay(attempt, Config.LLM_BACKOFF_BASE_SECONDS, Config.LLM_BACKOFF_MAX_SECONDS)
+                        attempt += 1
+                        self._on_retry(attempt, e, delay)
+                        time.sleep(delay)
+                span.set(response_chars=produced)
+                if not produced:
+                    span.fail("empty response")
+                    yield EMPTY_RESPONSE
+            except Exception as e:
+                print(f"Error streaming content: {e}")
+                span.fail(e)
+                yield f"Error: {str(e)}"
 
     def generate_chat(self, parsed_history: List[Dict[str, str]], user_message: str) -> str:
          """
@@ -1,28 +1,335 @@
 
-import chromadb
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Tuple
+from core.chunking import Chunker, get_chunker
 from core.config import Config
-import uuid
+from core.rerank import fuse_rankings, merge_adjacent, mmr
+from core.store import MemoryStore, registry
+from core.telemetry import telemetry
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+
+def chunk_id_for(source: str, text: str) -> str:
+    """
+    Content-addressed id for a chunk: identical text from the same source
+    always maps to the same id, so re-ingesting it is a no-op.
+    """
+    return hashlib.sha256(f"{source}\0{text}".encode("utf-8")).hexdigest()
+
+# --- PDF extraction workers (module level so they can be pickled) ---
+_worker_reader = None
+
+# Chunk metadata owned by the lifecycle tools rather than the ingester
+_LIFECYCLE_FIELDS = ("added_at", "also_in")
+
+# Chunk metadata that places a chunk in its source, mirrored by the position index
+_POSITION_FIELDS = ("chunk_id", "start", "end", "page", "page_end")
+
+def _init_pdf_worker(data: bytes):
+    # Each worker parses the PDF once and keeps it for all of its page ranges
+    global _worker_reader
+    from pypdf import PdfReader
+    _worker_reader = PdfReader(io.BytesIO(data))
+
+def _extract_page_range(start: int, end: int) -> List[str]:
+    return [(_worker_reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+class IngestManifest:
+    """
+    Per-source record of what has been ingested (file hash and chunk ids),
+    kept in SQLite next to the ChromaDB directory with one row per source.
+    Every change writes only its own row, so the app and the CLIs can
+    record sources of the same collection without overwriting each other.
+    """
+    def __init__(self, path: str, collection_name: str):
+        self.path = path
+        self.collection_name = collection_name
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS manifest (
+                collection TEXT NOT NULL,
+                source TEXT NOT NULL,
+                entry TEXT NOT NULL,
+                PRIMARY KEY (collection, source)
+            );
+            CREATE TABLE IF NOT EXISTS versions (
+                collection TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            );
+        """)
+        self._import_legacy(f"{os.path.splitext(path)[0]}.json")
+
+    def _import_legacy(self, legacy_path: str):
+        # Earlier versions kept every collection in one JSON file
+        if legacy_path == self.path or not os.path.exists(legacy_path):
+            return
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO manifest (collection, source, entry) VALUES (?, ?, ?)",
+                    [(collection, source, json.dumps(entry))
+                     for collection, entries in data.items() for source, entry in entries.items()]
+                )
+            os.replace(legacy_path, f"{legacy_path}.imported")
+        except FileNotFoundError:
+            # Another process imported it first
+            pass
+        except Exception as e:
+            print(f"Error importing legacy ingest manifest: {e}")
+
+    def sources(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Every source recorded for this collection and its entry.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, entry FROM manifest WHERE collection = ?", (self.collection_name,)
+            ).fetchall()
+        return {source: json.loads(entry) for source, entry in rows}
+
+    def get(self, source: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT entry FROM manifest WHERE collection = ? AND source = ?", (self.collection_name, source)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, source: str, entry: Dict[str, Any]):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO manifest (collection, source, entry) VALUES (?, ?, ?)",
+                (self.collection_name, source, json.dumps(entry))
+            )
+
+    def remove(self, source: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM manifest WHERE collection = ? AND source = ?", (self.collection_name, source))
+
+    def version(self) -> int:
+        """
+        Write counter of the collection, shared by every process that opens it.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM versions WHERE collection = ?", (self.collection_name,)).fetchone()
+        return row[0] if row else 0
+
+    def bump_version(self) -> int:
+        """
+        Count one more write to the collection and return the new version.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO versions (collection, version) VALUES (?, 1) "
+                "ON CONFLICT (collection) DO UPDATE SET version = version + 1",
+                (self.collection_name,)
+            )
+            return self._conn.execute("SELECT version FROM versions WHERE collection = ?", (self.collection_name,)).fetchone()[0]
+
+def _locked(kind: str) -> Callable:
+    """
+    Run a MemoryManager method under its store's read lock, write lock or
+    ingest lock ('read', 'write' or 'ingest'), after catching up with writes
+    from other processes. Writes also hold the data directory's writer lease
+    and raise RuntimeError while another process holds it.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            store = self.store
+            if kind == "read":
+                registry.refresh(store)
+                with store.lock.read():
+                    return fn(self, *args, **kwargs)
+            with registry.writer():
+                registry.refresh(store)
+                with store.ingest_lock if kind == "ingest" else store.lock.write():
+                    return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
 
 class MemoryManager:
     """
-    Manages long-term memory using ChromaDB for RAG.
+    Manages long-term memory for RAG on a pluggable vector backend
+    (ChromaDB by default, see core.vectorstore).
+
+    Managers are thin views over a shared MemoryStore: every manager opened
+    on the same directory and collection uses one client, one collection and
+    one set of indexes. Queries run concurrently; writes are exclusive.
     """
-    def __init__(self, collection_name: str = "nexus_memory"):
+    def __init__(self, collection_name: str = "nexus_memory", store: Optional[MemoryStore] = None, backend: Optional[str] = None):
         """
-        Initialize the ChromaDB client and collection.
+        Attach to the shared vector store and collection.
         
         Args:
-            collection_name (str): Name of the ChromaDB collection.
+            collection_name (str): Name of the collection.
+            store (MemoryStore, optional): Store to use instead of the registry's.
+            backend (str, optional): "chroma" or "mmap" (default: Config.VECTOR_BACKEND).
         """
         try:
-            # Initialize persistent client to save data to disk
-            self.client = chromadb.PersistentClient(path=Config.CHROMA_PERSIST_DIRECTORY)
-            self.collection = self.client.get_or_create_collection(name=collection_name)
+            self.store = store or registry.get(collection_name, backend=backend)
+            self.embedding_function = self.store.embedding_function
+            self.embedder = self.store.embedder
+            self.manifest = self.store.manifest
+            # (source, position) -> chunk id, for windows and neighbours of a hit
+            self.positions = self.store.positions
+            if not self.store.synced:
+                try:
+                    # The sync can rewrite the side indexes, so it waits until no other process writes
+                    with registry.writer(), self.store.lock.write():
+                        if not self.store.synced:
+                            self._sync_lexical_index()
+                            self._sync_position_index()
+                            self.store.synced = True
+                except RuntimeError as e:
+                    print(f"Skipping index check, opening memory read-only: {e}")
         except Exception as e:
             print(f"Error initializing Memory Manager: {e}")
             raise e
 
+    @property
+    def client(self):
+        """
+        The store's ChromaDB client (None for other backends); replaced when
+        another process's writes are picked up, so it is looked up on use.
+        """
+        return self.store.client
+
+    @property
+    def collection(self):
+        """
+        The store's vector collection, see client.
+        """
+        return self.store.collection
+
+    @property
+    def lexical(self):
+        """
+        Lexical index kept in step with the collection for hybrid retrieval.
+        """
+        return self.store.lexical
+
+    @property
+    def version(self) -> int:
+        """
+        Write counter of the collection, persisted with the manifest so writes
+        from every manager and every process invalidate dependent caches.
+        """
+        return self.manifest.version()
+
+    def _sync_lexical_index(self, page_size: int = 1000):
+        """
+        Rebuild the BM25 index from the collection if the two have drifted apart
+        (first run on an existing collection, or writes made without the index).
+        """
+        total = self.collection.count()
+        if len(self.lexical) == total:
+            return
+        self.lexical.clear()
+        for offset in range(0, total, page_size):
+            page = self.collection.get(limit=page_size, offset=offset, include=["documents"])
+            self.lexical.add(page["ids"], page["documents"])
+
+    def _sync_position_index(self):
+        """
+        Index the positions of ingested sources the position index does not
+        know yet (collections from before it existed), from chunk metadata.
+        """
+        indexed = {document["source"] for document in self.positions.documents()}
+        missing = {source for source, entry in self.manifest.sources().items() if entry.get("ids")} - indexed
+        if not missing:
+            return
+        layouts: Dict[str, List[Dict[str, Any]]] = {}
+        for page in self._pages(["metadatas"]):
+            for doc_id, meta in zip(page["ids"], page["metadatas"]):
+                meta = meta or {}
+                if meta.get("source") in missing and isinstance(meta.get("chunk_id"), int):
+                    layouts.setdefault(meta["source"], []).append(
+                        dict({field: meta.get(field) for field in _POSITION_FIELDS}, id=doc_id)
+                    )
+        for source, rows in layouts.items():
+            self.positions.replace(source, sorted(rows, key=lambda row: row["chunk_id"]))
+
+    @_locked("write")
+    def _delete_ids(self, ids: List[str]):
+        """
+        Remove chunks from the collection and every index that mirrors it.
+        """
+        if not ids:
+            return
+        self.collection.delete(ids=ids)
+        self.lexical.remove(ids)
+        self.positions.remove_ids(ids)
+        self._bump_version()
+
+    @telemetry.traced("memory.store_chunks")
+    @_locked("write")
+    def _store_chunks(self, texts: List[str], metadatas: List[Dict[str, Any]]) -> List[str]:
+        """
+        Idempotently store chunks under content-addressed ids.
+        Chunks already in the collection are not re-embedded; only changed
+        metadata is refreshed. New chunks are upserted.
+        
+        Returns:
+            List[str]: The id of every input chunk, in input order.
+        """
+        ids = [chunk_id_for(str(meta.get("source", "")), text) for text, meta in zip(texts, metadatas)]
+        telemetry.current().set(chunks=len(ids))
+
+        # Identical chunks within one batch collapse onto their first occurrence
+        unique = {}
+        for doc_id, text, meta in zip(ids, texts, metadatas):
+            if doc_id not in unique:
+                unique[doc_id] = (text, meta)
+        if not unique:
+            return ids
+
+        found = self.collection.get(ids=list(unique), include=["metadatas"])
+        existing = dict(zip(found["ids"], found["metadatas"] or []))
+        new_ids = [doc_id for doc_id in unique if doc_id not in existing]
+        # Positions may have shifted; refreshing metadata alone does not re-embed.
+        # Lifecycle fields (when the chunk was stored, merged duplicates) carry over.
+        kept = {}
+        for doc_id in unique:
+            if doc_id in existing:
+                lifecycle = {key: existing[doc_id][key] for key in _LIFECYCLE_FIELDS if key in (existing[doc_id] or {})}
+                kept[doc_id] = dict(unique[doc_id][1], **lifecycle)
+        moved_ids = [doc_id for doc_id in kept if existing[doc_id] != kept[doc_id]]
+
+        if new_ids:
+            documents = [unique[doc_id][0] for doc_id in new_ids]
+            added_at = time.time()
+            self.collection.upsert(
+                documents=documents,
+                metadatas=[dict(unique[doc_id][1], added_at=added_at) for doc_id in new_ids],
+                ids=new_ids,
+                embeddings=self.embedder.embed(documents).tolist()
+            )
+            self.lexical.add(new_ids, [unique[doc_id][0] for doc_id in new_ids])
+        if moved_ids:
+            self.collection.update(
+                ids=moved_ids,
+                metadatas=[kept[doc_id] for doc_id in moved_ids]
+            )
+        if new_ids or moved_ids:
+            self._bump_version()
+        telemetry.current().set(embedded=len(new_ids), moved=len(moved_ids))
+        return ids
+
+    @telemetry.traced("memory.add_document")
     def add_document(self, text: str, metadata: Dict[str, Any] = None) -> bool:
         """
         Add a document to the memory.
@@ -38,93 +345,846 @@ class MemoryManager:
             metadata = {}
             
         try:
-            doc_id = str(uuid.uuid4())
-            self.collection.add(
-                documents=[text],
-                metadatas=[metadata],
-                ids=[doc_id]
-            )
+            self._store_chunks([text], [metadata])
             return True
         except Exception as e:
             print(f"Error adding document: {e}")
+            telemetry.current().fail(e)
             return False
 
-    def process_file(self, file_obj, filename: str) -> bool:
+    def _iter_pdf_pages(self, data: bytes) -> Tuple[int, Iterator[str]]:
+        """
+        Lazily extract PDF pages, fanning out to a process pool for large files.
+        
+        Returns:
+            Tuple[int, Iterator[str]]: Page count and an iterator of page texts in order.
+        """
+        from pypdf import PdfReader
+        reader = PdfReader(io.BytesIO(data))
+        total = len(reader.pages)
+        workers = min(Config.INGEST_WORKERS, os.cpu_count() or 1)
+
+        def sequential():
+            for page in reader.pages:
+                yield (page.extract_text() or "") + "\n"
+
+        def parallel():
+            span = max(1, -(-total // (workers * 4)))
+            ranges = [(start, min(start + span, total)) for start in range(0, total, span)]
+            # Spawned workers avoid forking a process that holds ChromaDB threads and locks
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_pdf_worker,
+                initargs=(data,)
+            ) as executor:
+                # Keep a bounded window of ranges in flight so memory does not grow with the document
+                pending = deque()
+                next_range = 0
+                while next_range < len(ranges) or pending:
+                    while next_range < len(ranges) and len(pending) < workers * 2:
+                        pending.append(executor.submit(_extract_page_range, *ranges[next_range]))
+                        next_range += 1
+                    for text in pending.popleft().result():
+                        yield text + "\n"
+
+        if workers > 1 and total >= Config.PDF_PARALLEL_MIN_PAGES:
+            return total, parallel()
+        return total, sequential()
+
+    @telemetry.traced("memory.process_file")
+    @_locked("ingest")
+    def process_file(self, file_obj, filename: str, progress_callback: Optional[Callable[[float, str], None]] = None, chunker: Optional[Chunker] = None) -> bool:
         """
         Process and store an uploaded file (PDF or TXT).
+        Pages are extracted lazily, chunked as a stream and written in
+        batches of Config.INGEST_BATCH_SIZE, so peak memory tracks the batch
+        size rather than the document size. Each chunk records its position
+        (chunk_id), character offsets and pages in its metadata.
         
         Args:
             file_obj: The uploaded file object.
             filename (str): The name of the file.
+            progress_callback (callable, optional): Called as (fraction, message) after each batch.
+            chunker (Chunker, optional): Chunking strategy (default: the one named by Config.CHUNKER).
             
         Returns:
             bool: True if successful, False otherwise.
         """
         try:
-            text = ""
-            
-            # 1. Extract Text based on extension
+            chunker = chunker or get_chunker()
+            data = file_obj.getvalue() if hasattr(file_obj, "getvalue") else file_obj.read()
+            file_hash = hashlib.sha256(data).hexdigest()
+            telemetry.current().set(source=filename, bytes=len(data))
+
+            # 0. Skip files whose exact bytes were already ingested the same way (e.g. Streamlit reruns)
+            previous = self.manifest.get(filename)
+            if previous and previous.get("file_hash") == file_hash and previous.get("chunker", "fixed:1000:100") == chunker.signature:
+                # Compaction can leave a source with no chunks of its own
+                stored = self.collection.get(ids=previous["ids"], include=[])["ids"] if previous["ids"] else []
+                if len(stored) == len(set(previous["ids"])):
+                    telemetry.current().set(skipped=True)
+                    if progress_callback:
+                        progress_callback(1.0, f"{filename} is already in memory")
+                    return True
+
+            # 1. Extract Text lazily based on extension
             if filename.lower().endswith(".pdf"):
-                from pypdf import PdfReader
-                reader = PdfReader(file_obj)
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
+                total_pages, page_texts = self._iter_pdf_pages(data)
             elif filename.lower().endswith(".txt"):
-                text = file_obj.read().decode("utf-8")
+                total_pages, page_texts = 1, iter([data.decode("utf-8")])
             else:
                 return False
-                
-            if not text.strip():
+
+            pages_done = 0
+
+            def counted_pages():
+                nonlocal pages_done
+                for page_text in page_texts:
+                    yield page_text
+                    pages_done += 1
+
+            def on_batch(stored: int):
+                if progress_callback:
+                    progress_callback(
+                        min(pages_done / total_pages, 1.0) if total_pages else 1.0,
+                        f"{filename}: {pages_done}/{total_pages} pages, {stored} chunks"
+                    )
+
+            # 2. Chunking Strategy (pluggable, streamed)
+            # 3. Store chunks in bounded batches; unchanged ones are skipped, changed ones re-embedded
+            layout = self._write_chunks(filename, chunker.chunks(counted_pages()), on_batch)
+            if not layout:
                 return False
 
-            # 2. Chunking Strategy (Simple fixed-size chunking)
-            chunk_size = 1000
-            overlap = 100
-            chunks = []
-            
-            for i in range(0, len(text), chunk_size - overlap):
-                chunks.append(text[i:i + chunk_size])
+            # 4. Drop chunks that no longer exist in this version of the file
+            self._commit_source(filename, layout, previous, {"file_hash": file_hash, "chunker": chunker.signature})
+            telemetry.current().set(pages=pages_done, chunks=len(layout))
+            if progress_callback:
+                progress_callback(1.0, f"Learned {len(layout)} chunks from {filename}")
+            return True
             
-            # 3. Add chunks to ChromaDB
-            ids = [str(uuid.uuid4()) for _ in range(len(chunks))]
-            metadatas = [{"source": filename, "chunk_id": i} for i in range(len(chunks))]
+        except Exception as e:
+            print(f"Error processing file {filename}: {e}")
+            telemetry.current().fail(e)
+            return False
+
+    def _write_chunks(self, source: str, chunks: Iterable[Dict[str, Any]], on_batch: Optional[Callable[[int], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Store a source's chunks (as produced by a Chunker) in batches of
+        Config.INGEST_BATCH_SIZE. Each chunk records its position (chunk_id),
+        character offsets, pages and any whitespace left out before it in its metadata.
+
+        Args:
+            source (str): Source name stored with every chunk.
+            chunks (Iterable[Dict[str, Any]]): Chunks in document order.
+            on_batch (callable, optional): Called with the number of chunks stored so far after each batch.
+
+        Returns:
+            List[Dict[str, Any]]: Every stored chunk's {"id", "chunk_id", "start", "end",
+                "page", "page_end"}, in order.
+        """
+        layout = []
+        batch_texts, batch_metas = [], []
+
+        def flush():
+            for doc_id, meta in zip(self._store_chunks(batch_texts, batch_metas), batch_metas):
+                layout.append(dict({field: meta[field] for field in _POSITION_FIELDS}, id=doc_id))
+            batch_texts.clear()
+            batch_metas.clear()
+            if on_batch:
+                on_batch(len(layout))
+
+        # Positions count stored chunks only, so neighbours are always chunk_id +/- 1
+        chunk_index = 0
+        lead = ""
+        for chunk in chunks:
+            lead += chunk.get("lead", "")
+            if not chunk["text"].strip():
+                lead += chunk["text"]
+                continue
+            meta = {
+                "source": source,
+                "chunk_id": chunk_index,
+                "start": chunk["start"],
+                "end": chunk["end"],
+                "page": chunk["page"],
+                "page_end": chunk["page_end"],
+            }
+            if lead:
+                # The whitespace the chunker left out before this chunk, to put the source back together
+                meta["lead"] = lead
+            lead = ""
+            batch_texts.append(chunk["text"])
+            batch_metas.append(meta)
+            chunk_index += 1
+            if len(batch_texts) >= Config.INGEST_BATCH_SIZE:
+                flush()
+        if batch_texts:
+            flush()
+        return layout
+
+    def _commit_source(self, source: str, layout: List[Dict[str, Any]], previous: Optional[Dict[str, Any]], entry: Dict[str, Any]):
+        """
+        Record the new version of a source in the position index, delete the
+        chunks only the previous version had, then record it in the manifest.
+        """
+        ids = [row["id"] for row in layout]
+        self.positions.replace(source, layout)
+        if previous:
+            self._delete_ids(list(set(previous.get("ids", [])) - set(ids)))
+        self.manifest.set(source, dict(entry, ids=list(dict.fromkeys(ids)), updated_at=time.time()))
+
+    @telemetry.traced("memory.ingest_chunks")
+    @_locked("ingest")
+    def ingest_chunks(self, source: str, chunks: Iterable[Dict[str, Any]], file_hash: str, chunker_signature: str, **manifest_fields) -> List[str]:
+        """
+        Store an already chunked source, replacing its previous version.
+        Chunks that are already stored are not re-embedded, so re-running an
+        interrupted ingestion only pays for what it had not written yet.
+
+        Args:
+            source (str): Source name.
+            chunks (Iterable[Dict[str, Any]]): Chunks in document order.
+            file_hash (str): SHA-256 of the source file.
+            chunker_signature (str): Signature of the chunker that produced the chunks.
+            **manifest_fields: Extra fields for the manifest entry (e.g. path, size, mtime).
+
+        Returns:
+            List[str]: The id of every stored chunk, in order.
+        """
+        previous = self.manifest.get(source)
+        layout = self._write_chunks(source, chunks)
+        self._commit_source(source, layout, previous, dict(manifest_fields, file_hash=file_hash, chunker=chunker_signature))
+        telemetry.current().set(source=source, chunks=len(layout))
+        return [row["id"] for row in layout]
+
+    @telemetry.traced("memory.delete_source")
+    @_locked("ingest")
+    def delete_source(self, source: str) -> int:
+        """
+        Remove every chunk of a source and its manifest entry.
+
+        Returns:
+            int: Number of chunks removed.
+        """
+        removed = self._delete_source(source)
+        telemetry.current().set(source=source, chunks=removed)
+        return removed
+
+    def _delete_source(self, source: str) -> int:
+        entry = self.manifest.get(source) or {}
+        # Also catches chunks of an ingestion that was interrupted before reaching the manifest
+        stored = self.collection.get(where={"source": source}, include=[])["ids"]
+        ids = list(set(entry.get("ids", [])) | set(stored))
+        self._delete_ids(ids)
+        self.positions.remove_source(source)
+        self.manifest.remove(source)
+        return len(ids)
+
+    def _pages(self, include: List[str], page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        The whole collection, one get() page at a time.
+        """
+        offset = 0
+        while True:
+            page = self.collection.get(limit=page_size, offset=offset, include=include)
+            if not page["ids"]:
+                return
+            yield page
+            offset += len(page["ids"])
+
+    @_locked("write")
+    def _update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        if ids:
+            self.collection.update(ids=ids, metadatas=metadatas)
+            self._bump_version()
+
+    @telemetry.traced("memory.apply_retention")
+    @_locked("ingest")
+    def apply_retention(self, policies: Optional[List[Tuple[str, float]]] = None, now: Optional[float] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Delete what has outlived its source's retention period.
+        Sources in the manifest (files) expire as a whole, dated by their
+        last ingestion; other chunks (e.g. manual notes) expire one by one,
+        dated by when they were stored. Chunks from before storage dates
+        were recorded are dated from the first run that sees them.
+
+        Args:
+            policies (List[Tuple[str, float]], optional): (source glob, seconds) pairs
+                (default: parsed from Config.RETENTION_POLICIES).
+            now (float, optional): Reference time (default: the current time).
+            dry_run (bool): Only report what would be deleted.
+
+        Returns:
+            Dict[str, Any]: Expired file sources and the number of chunks deleted.
+        """
+        from core.lifecycle import parse_retention, retention_for
+        policies = parse_retention(Config.RETENTION_POLICIES) if policies is None else policies
+        now = time.time() if now is None else now
+        report = {"sources": [], "chunks": 0}
+        if not policies:
+            return report
+
+        files = self.manifest.sources()
+        for source, entry in files.items():
+            seconds = retention_for(source, policies)
+            if seconds is not None and now - entry.get("updated_at", now) > seconds:
+                report["sources"].append(source)
+                report["chunks"] += len(set(entry.get("ids", [])))
+
+        expired, undated, stamps = [], [], []
+        for page in self._pages(["metadatas"]):
+            for doc_id, meta in zip(page["ids"], page["metadatas"]):
+                meta = meta or {}
+                source = str(meta.get("source", ""))
+                if source in files:
+                    continue
+                seconds = retention_for(source, policies)
+                if seconds is None:
+                    continue
+                if "added_at" not in meta:
+                    undated.append(doc_id)
+                    stamps.append(dict(meta, added_at=now))
+                elif now - meta["added_at"] > seconds:
+                    expired.append(doc_id)
+        report["chunks"] += len(expired)
+        if not dry_run:
+            for source in report["sources"]:
+                self._delete_source(source)
+            self._delete_ids(expired)
+            self._update_metadata(undated, stamps)
+        telemetry.current().set(sources=len(report["sources"]), chunks=report["chunks"], dry_run=dry_run)
+        return report
+
+    @telemetry.traced("memory.compact")
+    @_locked("ingest")
+    def compact(self, similarity: Optional[float] = None, dry_run: bool = False, neighbours: int = 8, page_size: int = 256) -> Dict[str, Any]:
+        """
+        Drop near-duplicate chunks and reclaim the space deleted chunks hold.
+        Each chunk's nearest neighbours come from the vector index itself;
+        of every group at or above `similarity` (cosine, on the model's unit
+        vectors) one survivor is kept: the newest, so a corrected note or a
+        new version of a document replaces the old text rather than the other
+        way round (ties go to chunks of ingested files). Survivors list the
+        other sources in "also_in".
+
+        Args:
+            similarity (float, optional): Cosine threshold (default: Config.COMPACTION_SIMILARITY).
+            dry_run (bool): Only report what would be dropped.
+            neighbours (int): Neighbours checked per chunk.
+            page_size (int): Chunks looked up per query batch.
+
+        Returns:
+            Dict[str, Any]: Chunks scanned, duplicates dropped and rows reclaimed by the backend.
+        """
+        similarity = Config.COMPACTION_SIMILARITY if similarity is None else similarity
+        # Squared L2 between unit vectors is 2 - 2cos
+        max_distance = 2.0 * (1.0 - similarity)
+        metadatas = {}
+        for page in self._pages(["metadatas"]):
+            metadatas.update((doc_id, meta or {}) for doc_id, meta in zip(page["ids"], page["metadatas"]))
+        files = self.manifest.sources()
+        # Survivors first: newest, then file chunks, then by id for a stable order
+        order = sorted(
+            metadatas,
+            key=lambda doc_id: (-metadatas[doc_id].get("added_at", 0.0), metadatas[doc_id].get("source") not in files, doc_id)
+        )
+        rank = {doc_id: i for i, doc_id in enumerate(order)}
+
+        dropped: Dict[str, str] = {}
+        k = min(neighbours + 1, len(order))
+        for start in range(0, len(order), page_size):
+            block = [doc_id for doc_id in order[start:start + page_size] if doc_id not in dropped]
+            if not block:
+                continue
+            found = self.collection.get(ids=block, include=["embeddings"])
+            vectors = dict(zip(found["ids"], found["embeddings"]))
+            block = [doc_id for doc_id in block if doc_id in vectors]
+            results = self.collection.query(
+                query_embeddings=[[float(x) for x in vectors[doc_id]] for doc_id in block],
+                n_results=k,
+                include=["distances"]
+            )
+            for doc_id, near_ids, distances in zip(block, results["ids"], results["distances"]):
+                # Rank order: a chunk dropped earlier in this block cannot claim others
+                if doc_id in dropped:
+                    continue
+                for other, distance in zip(near_ids, distances):
+                    if distance <= max_distance and other not in dropped and rank.get(other, -1) > rank[doc_id]:
+                        dropped[other] = doc_id
+
+        report = {"chunks": len(order), "duplicates": len(dropped), "reclaimed": 0}
+        if not dry_run:
+            if dropped:
+                merged: Dict[str, set] = {}
+                for duplicate, survivor in dropped.items():
+                    sources = merged.setdefault(survivor, set(filter(None, metadatas[survivor].get("also_in", "").split(","))))
+                    sources.update(filter(None, metadatas[duplicate].get("also_in", "").split(",")))
+                    sources.add(str(metadatas[duplicate].get("source", "")))
+                survivors = [doc_id for doc_id in merged if merged[doc_id] - {str(metadatas[doc_id].get("source", ""))}]
+                self._update_metadata(survivors, [
+                    dict(metadatas[doc_id], also_in=",".join(sorted(merged[doc_id] - {str(metadatas[doc_id].get("source", ""))})))
+                    for doc_id in survivors
+                ])
+                self._delete_ids(list(dropped))
+                # Files keep their manifest entries, minus the dropped chunks, so re-uploads still skip
+                for source, entry in files.items():
+                    ids = entry.get("ids", [])
+                    if any(doc_id in dropped for doc_id in ids):
+                        self.manifest.set(source, dict(entry, ids=[doc_id for doc_id in ids if doc_id not in dropped]))
+            report["reclaimed"] = self._vacuum()
+        telemetry.current().set(**report, dry_run=dry_run)
+        return report
+
+    @_locked("write")
+    def _vacuum(self) -> int:
+        # Exclusive: the mmap backend renumbers rows that in-flight queries would map back to chunks
+        return self.collection.vacuum()
+
+    @telemetry.traced("memory.stats")
+    @_locked("read")
+    def stats(self) -> Dict[str, Any]:
+        """
+        Size and growth of the collection.
+
+        Returns:
+            Dict[str, Any]: {"chunks": total, "sources": {source: {"chunks", "chars"}},
+                "growth": {UTC day: chunks stored that day, "unknown" for undated chunks},
+                "disk_bytes": {"vectors", "lexical", "manifest", "positions", "total"}}. With the
+                chroma backend "vectors" covers the whole persist directory; "manifest" and
+                "positions" are shared by every collection.
+        """
+        sources: Dict[str, Dict[str, int]] = {}
+        growth: Dict[str, int] = {}
+        total = 0
+        for page in self._pages(["documents", "metadatas"]):
+            for text, meta in zip(page["documents"], page["metadatas"]):
+                meta = meta or {}
+                source = sources.setdefault(str(meta.get("source", "")), {"chunks": 0, "chars": 0})
+                source["chunks"] += 1
+                source["chars"] += len(text or "")
+                added_at = meta.get("added_at")
+                day = time.strftime("%Y-%m-%d", time.gmtime(added_at)) if added_at else "unknown"
+                growth[day] = growth.get(day, 0) + 1
+                total += 1
+
+        def size(path: Optional[str]) -> int:
+            if not path:
+                return 0
+            if os.path.isfile(path):
+                return os.path.getsize(path)
+            return sum(
+                os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+            )
+
+        vector_path = self.store.path if self.store.backend == "chroma" else os.path.join(self.store.path, self.store.name)
+        disk = {
+            "vectors": size(vector_path),
+            "lexical": size(self.lexical.path) + size(f"{self.lexical.path}.log" if self.lexical.path else None),
+            "manifest": size(self.manifest.path),
+            "positions": size(self.positions.path),
+        }
+        disk["total"] = sum(disk.values())
+        telemetry.current().set(chunks=total, sources=len(sources))
+        return {
+            "chunks": total,
+            "sources": dict(sorted(sources.items(), key=lambda item: -item[1]["chunks"])),
+            "growth": dict(sorted(growth.items())),
+            "disk_bytes": disk,
+        }
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts with the same engine (and cache) the collection uses.
+        
+        Args:
+            texts (List[str]): Texts to embed.
             
-            self.collection.add(
-                documents=chunks,
-                metadatas=metadatas,
-                ids=ids
+        Returns:
+            List[List[float]]: One embedding per text.
+        """
+        return self.embedder.embed(texts).tolist()
+
+    @_locked("read")
+    def signature(self) -> str:
+        """
+        Cheap fingerprint of the collection state, used to invalidate caches:
+        the persisted write counter, which every write through a MemoryManager
+        bumps in whichever process makes it.
+        """
+        return self._signature()
+
+    def _signature(self) -> str:
+        # For callers already holding the store lock
+        return str(self.version)
+
+    def _bump_version(self):
+        # This process's own write needs no reload (see StoreRegistry.refresh)
+        self.store.loaded_version = self.manifest.bump_version()
+
+    def _vector_search(self, query: str, k: int) -> List[Dict[str, Any]]:
+        return self._vector_search_many([query], k)[0]
+
+    def _vector_search_many(self, queries: List[str], k: int) -> List[List[Dict[str, Any]]]:
+        # One embedding call and one backend query for all the queries
+        results = self.collection.query(
+            query_embeddings=self.embed(queries),
+            n_results=k,
+            include=["documents", "metadatas", "distances"]
+        )
+        # Backends return a list of lists per query
+        if not results or not results.get("ids"):
+            return [[] for _ in queries]
+        return [
+            [
+                {"id": doc_id, "text": text, "metadata": meta or {}, "score": -distance}
+                for doc_id, text, meta, distance in zip(ids, documents, metadatas, distances)
+            ]
+            for ids, documents, metadatas, distances in zip(
+                results["ids"], results["documents"], results["metadatas"], results["distances"]
             )
+        ]
+
+    def _fetch(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not ids:
+            return {}
+        found = self.collection.get(ids=ids, include=["documents", "metadatas"])
+        return {
+            doc_id: {"id": doc_id, "text": text, "metadata": meta or {}}
+            for doc_id, text, meta in zip(found["ids"], found["documents"], found["metadatas"])
+        }
+
+    def _fetch_positions(self, rows: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        The chunks at (source, position index row) pairs, fetched in a single get.
+        Each keeps the position of its row, so a chunk that occurs twice in a
+        source comes back once per position.
+        """
+        docs = self._fetch(list(dict.fromkeys(row["id"] for _, row in rows)))
+        return [
+            {
+                "id": row["id"],
+                "text": docs[row["id"]]["text"],
+                "metadata": dict(docs[row["id"]]["metadata"], source=source, **{field: row[field] for field in _POSITION_FIELDS}),
+                "score": None,
+            }
+            for source, row in rows
+            if row["id"] in docs
+        ]
+
+    def _neighbours(self, hits: List[Dict[str, Any]], radius: int) -> List[Dict[str, Any]]:
+        """
+        Chunks within `radius` positions of each hit in the same source, looked
+        up in the position index and fetched in a single get. Hits without a
+        position (e.g. manual notes) are skipped.
+        """
+        have: Dict[str, set] = {}
+        for hit in hits:
+            meta = hit.get("metadata") or {}
+            if isinstance(meta.get("chunk_id"), int) and meta.get("source") is not None:
+                have.setdefault(meta["source"], set()).add(meta["chunk_id"])
+        rows = []
+        for source, positions in have.items():
+            wanted = {position + offset for position in positions for offset in range(-radius, radius + 1)} - positions
+            if wanted:
+                rows += [(source, row) for row in self.positions.span(source, min(wanted), max(wanted)) if row["chunk_id"] in wanted]
+        return self._fetch_positions(rows)
+
+    def _windows(self, hits: List[Dict[str, Any]], budget: int) -> List[Dict[str, Any]]:
+        """
+        Grow each hit into a contiguous window of its source until all of them
+        hold `budget` characters, planned on the position index and fetched in
+        a single get. Windows take turns in hit order, one chunk per side per
+        turn, and stop at a deleted chunk or where another window begins.
+        Hits without a position are kept as they are and count against the budget.
+
+        Returns:
+            List[Dict[str, Any]]: The hits followed by the chunks their windows added.
+        """
+        # Chunks looked up on each side of a hit; even small chunks hold ~100 characters
+        reach = min(256, budget // 100 + 1)
+        used = 0
+        windows = []
+        claimed: Dict[str, set] = {}
+        for hit in hits:
+            used += len(hit["text"])
+            meta = hit.get("metadata") or {}
+            source, position = meta.get("source"), meta.get("chunk_id")
+            if not isinstance(position, int) or source is None or position in claimed.get(source, ()):
+                continue
+            rows = self.positions.span(source, position - reach, position + reach)
+            at = next((i for i, row in enumerate(rows) if row["chunk_id"] == position), None)
+            if at is not None:
+                claimed.setdefault(source, set()).add(position)
+                windows.append({"source": source, "rows": rows, "first": at, "last": at, "seed": position})
+
+        def grow(window: Dict[str, Any], side: int) -> bool:
+            nonlocal used
+            rows, edge = window["rows"], window["last" if side > 0 else "first"]
+            step = edge + side
+            if not 0 <= step < len(rows) or rows[step]["chunk_id"] != rows[edge]["chunk_id"] + side:
+                return False
+            if rows[step]["chunk_id"] in claimed[window["source"]]:
+                return False
+            # Only the characters past the window's edge are new; chunk overlaps are not
+            added = rows[step]["end"] - rows[edge]["end"] if side > 0 else rows[edge]["start"] - rows[step]["start"]
+            if used + added > budget:
+                return False
+            used += added
+            claimed[window["source"]].add(rows[step]["chunk_id"])
+            window["last" if side > 0 else "first"] = step
             return True
+
+        growing = windows
+        while growing:
+            # Both sides get their turn, so no short-circuiting
+            growing = [window for window in growing if any([grow(window, 1), grow(window, -1)])]
+        rows = [
+            (window["source"], row)
+            for window in windows
+            for row in window["rows"][window["first"]:window["last"] + 1]
+            if row["chunk_id"] != window["seed"]
+        ]
+        telemetry.current().set(window_chars=used)
+        return hits + self._fetch_positions(rows)
+
+    @telemetry.traced("memory.search")
+    @_locked("read")
+    def search(self, query: str, n_results: int = 3, mode: str = None) -> List[Dict[str, Any]]:
+        """
+        Retrieve the best matching chunks with their ids and metadata.
+        
+        Args:
+            query (str): The search query.
+            n_results (int): Number of results to return.
+            mode (str): "vector" (dense similarity), "lexical" (BM25) or "hybrid"
+                (reciprocal rank fusion of both). Defaults to Config.RETRIEVAL_MODE.
             
+        Returns:
+            List[Dict[str, Any]]: Hits as {"id", "text", "metadata", "score"}, best first.
+        """
+        return self._search_many([query], n_results, mode)[0]
+
+    def _search_many(self, queries: List[str], n_results: int, mode: str = None) -> List[List[Dict[str, Any]]]:
+        """
+        search() for several queries at once: the dense side embeds and
+        queries them in one batch, and chunks missing from it are fetched in
+        one get for all queries.
+        """
+        mode = (mode or Config.RETRIEVAL_MODE).lower()
+        total = self.collection.count()
+        telemetry.current().set(mode=mode, backend=self.store.backend, collection_size=total, queries=len(queries))
+        # Check if collection is empty to avoid errors
+        if total == 0 or not queries:
+            return [[] for _ in queries]
+
+        if mode == "vector":
+            return self._vector_search_many(queries, min(n_results, total))
+        if mode == "lexical":
+            ranked = [self.lexical.search(query, n_results) for query in queries]
+            docs = self._fetch(list(dict.fromkeys(doc_id for ranking in ranked for doc_id, _ in ranking)))
+            return [[dict(docs[doc_id], score=score) for doc_id, score in ranking if doc_id in docs] for ranking in ranked]
+
+        # Hybrid: over-fetch from both rankers, then fuse by reciprocal rank
+        k = min(max(n_results * Config.HYBRID_CANDIDATE_MULTIPLIER, 10), total)
+        tops = []
+        docs: Dict[str, Dict[str, Any]] = {}
+        for query, vector_hits in zip(queries, self._vector_search_many(queries, k)):
+            lexical_ranked = self.lexical.search(query, k)
+            fused: Dict[str, float] = {}
+            for rank, hit in enumerate(vector_hits):
+                fused[hit["id"]] = fused.get(hit["id"], 0.0) + 1.0 / (Config.RRF_K + rank + 1)
+            for rank, (doc_id, _) in enumerate(lexical_ranked):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (Config.RRF_K + rank + 1)
+            top = sorted(fused, key=fused.get, reverse=True)[:n_results]
+            tops.append((top, fused))
+            docs.update((hit["id"], hit) for hit in vector_hits)
+        docs.update(self._fetch(list(dict.fromkeys(doc_id for top, _ in tops for doc_id in top if doc_id not in docs))))
+        return [[dict(docs[doc_id], score=fused[doc_id]) for doc_id in top if doc_id in docs] for top, fused in tops]
+
+    @telemetry.traced("memory.query_passages")
+    @_locked("read")
+    def query_passages(self, query: str, n_results: int = 3, fetch_k: int = None, lambda_mult: float = None, mode: str = None, neighbours: int = None, char_budget: int = None, related: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Retrieve diverse, de-duplicated context passages.
+        Over-fetches candidates (for the query and any related queries in one
+        batch, fused by reciprocal rank with the query's own ranking weighted
+        Config.RETRIEVAL_QUERY_WEIGHT), re-ranks them against the query with Maximal
+        Marginal Relevance on their stored embeddings, adds each pick's neighbouring chunks (or
+        grows the picks into windows up to a character budget), then merges
+        consecutive chunks of the same source into single passages without
+        their overlapping text. Repeated queries are answered from the
+        store's retrieval cache until the collection changes.
+        
+        Args:
+            query (str): The search query.
+            n_results (int): Number of chunks to select before merging.
+            fetch_k (int): Candidates to over-fetch (default: Config.MMR_FETCH_MULTIPLIER * n_results).
+            lambda_mult (float): Relevance/diversity trade-off (default: Config.MMR_LAMBDA).
+            mode (str): Retrieval mode, see search().
+            neighbours (int): Chunks to add on each side of a pick (default: Config.CONTEXT_NEIGHBOURS).
+            char_budget (int): If positive, grow the picks into contiguous windows holding this many
+                characters in all instead of adding neighbours (default: Config.CONTEXT_CHAR_BUDGET).
+            related (List[str], optional): Other phrasings of the query, e.g. built from the
+                conversation, whose candidates are fused with the query's.
+            
+        Returns:
+            List[Dict[str, Any]]: Passages as {"ids", "text", "metadata", "score"}, best first.
+        """
+        try:
+            fetch_k = fetch_k or n_results * Config.MMR_FETCH_MULTIPLIER
+            lambda_mult = Config.MMR_LAMBDA if lambda_mult is None else lambda_mult
+            neighbours = Config.CONTEXT_NEIGHBOURS if neighbours is None else neighbours
+            char_budget = Config.CONTEXT_CHAR_BUDGET if char_budget is None else char_budget
+            queries = list(dict.fromkeys([query] + list(related or [])))
+            key = ("passages", tuple(queries), n_results, fetch_k, lambda_mult, (mode or Config.RETRIEVAL_MODE).lower(), neighbours, char_budget)
+            signature = self._signature()
+            cached = self.store.results.get(key, signature)
+            if cached is not None:
+                telemetry.current().set(cached=True, passages=len(cached))
+                return cached
+
+            rankings = self._search_many(queries, fetch_k, mode)
+            if len(rankings) == 1:
+                candidates = rankings[0]
+            else:
+                weights = [Config.RETRIEVAL_QUERY_WEIGHT] + [1.0] * (len(rankings) - 1)
+                candidates = fuse_rankings(rankings, Config.RRF_K, fetch_k, weights)
+            if len(candidates) > n_results:
+                found = self.collection.get(ids=[hit["id"] for hit in candidates], include=["embeddings"])
+                vectors = dict(zip(found["ids"], found["embeddings"]))
+                candidates = [hit for hit in candidates if hit["id"] in vectors]
+                # Relevance to the query as asked; the related phrasings only widen the candidates
+                order = mmr(
+                    self.embedder.embed([query])[0],
+                    [vectors[hit["id"]] for hit in candidates],
+                    n_results,
+                    lambda_mult
+                )
+                candidates = [candidates[i] for i in order]
+            if char_budget > 0:
+                candidates = self._windows(candidates, char_budget)
+            elif neighbours > 0:
+                candidates += self._neighbours(candidates, neighbours)
+            passages = merge_adjacent(candidates)
+            self.store.results.put(key, signature, passages)
+            telemetry.current().set(cached=False, queries=len(queries), passages=len(passages), chars=sum(len(p["text"]) for p in passages))
+            return passages
         except Exception as e:
-            print(f"Error processing file {filename}: {e}")
-            return False
+            print(f"Error querying passages: {e}")
+            telemetry.current().fail(e)
+            return []
 
-    def query_context(self, query: str, n_results: int = 3) -> List[str]:
+    @telemetry.traced("memory.query_context")
+    @_locked("read")
+    def query_context(self, query: str, n_results: int = 3, mode: str = None, neighbours: int = 0, char_budget: int = 0) -> List[str]:
         """
         Retrieve relevant context for a given query.
+        Repeated queries are answered from the store's retrieval cache until
+        the collection changes.
         
         Args:
             query (str): The search query.
             n_results (int): Number of results to return.
+            mode (str): Retrieval mode, see search(). Defaults to Config.RETRIEVAL_MODE.
+            neighbours (int): If set, each hit is returned together with this many
+                neighbouring chunks on each side of it, merged into one passage.
+            char_budget (int): If set, each hit is instead grown into a contiguous window
+                of its document, the windows together holding up to this many characters,
+                so a few hits bring coherent sections rather than isolated chunks.
             
         Returns:
             List[str]: A list of relevant document contents.
         """
         try:
-            # Check if collection is empty to avoid errors
-            if self.collection.count() == 0:
-                return []
-                
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results
-            )
-            
-            # ChromaDB returns a list of lists for 'documents'
-            if results and results.get("documents"):
-                return results["documents"][0]
-            return []
+            key = ("context", query, n_results, (mode or Config.RETRIEVAL_MODE).lower(), neighbours, char_budget)
+            signature = self._signature()
+            cached = self.store.results.get(key, signature)
+            if cached is not None:
+                telemetry.current().set(cached=True)
+                return cached
+
+            hits = self.search(query, n_results, mode)
+            if char_budget > 0:
+                docs = [passage["text"] for passage in merge_adjacent(self._windows(hits, char_budget))]
+            elif neighbours > 0:
+                docs = [passage["text"] for passage in merge_adjacent(hits + self._neighbours(hits, neighbours))]
+            else:
+                docs = [hit["text"] for hit in hits]
+            self.store.results.put(key, signature, docs)
+            telemetry.current().set(cached=False)
+            return docs
         except Exception as e:
             print(f"Error querying context: {e}")
+            telemetry.current().fail(e)
             return []
+
+    @telemetry.traced("memory.query_context_many")
+    @_locked("read")
+    def query_context_many(self, queries: List[str], n_results: int = 3, mode: str = None) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieve context for several queries with one batched vector query,
+        at about the cost of one. Callers fuse the rankings (see
+        core.rerank.fuse_rankings) or use them per query. Repeated calls are
+        answered from the store's retrieval cache until the collection changes.
+
+        Args:
+            queries (List[str]): The search queries.
+            n_results (int): Number of results per query.
+            mode (str): Retrieval mode, see search(). Defaults to Config.RETRIEVAL_MODE.
+
+        Returns:
+            List[List[Dict[str, Any]]]: For each query, its hits as {"id", "text", "metadata", "score"}, best first.
+        """
+        try:
+            key = ("context_many", tuple(queries), n_results, (mode or Config.RETRIEVAL_MODE).lower())
+            signature = self._signature()
+            cached = self.store.results.get(key, signature)
+            if cached is not None:
+                telemetry.current().set(cached=True, queries=len(queries))
+                return cached
+
+            rankings = self._search_many(list(queries), n_results, mode)
+            self.store.results.put(key, signature, rankings)
+            telemetry.current().set(cached=False)
+            return rankings
+        except Exception as e:
+            print(f"Error querying context: {e}")
+            telemetry.current().fail(e)
+            return [[] for _ in queries]
+
+    @_locked("read")
+    def documents(self) -> List[Dict[str, Any]]:
+        """
+        Every ingested document with its chunk count, length and page range.
+
+        Returns:
+            List[Dict[str, Any]]: {"source", "chunks", "chars", "first_page", "last_page", "updated_at"}, by source.
+        """
+        return self.positions.documents()
+
+    @telemetry.traced("memory.read_source")
+    @_locked("read")
+    def read_source(self, source: str, first_page: Optional[int] = None, last_page: Optional[int] = None) -> str:
+        """
+        The stored text of a document, or of a range of its pages, put back
+        together from its chunks (fetched in a single get).
+
+        Args:
+            source (str): Source name.
+            first_page (int, optional): First page (1-based) of the section.
+            last_page (int, optional): Last page of the section.
+
+        Returns:
+            str: The text; parts separated by deleted chunks are joined by a newline.
+        """
+        try:
+            rows = [(source, row) for row in self.positions.pages(source, first_page, last_page)]
+            passages = merge_adjacent(self._fetch_positions(rows))
+            telemetry.current().set(source=source, chunks=len(rows))
+            return "\n".join(passage["text"] for passage in passages)
+        except Exception as e:
+            print(f"Error reading source {source}: {e}")
+            telemetry.current().fail(e)
+            return ""
@@ -1,109 +1,387 @@
 
-from typing import Dict, Any, List
-from core.llm import GeminiClient
+import asyncio
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Iterator, Optional, Tuple
+from core.cache import ResponseCache
+from core.config import Config
+from core.followup import retrieval_queries
+from core.gating import needs_retrieval
+from core.llm import EMPTY_RESPONSE, GeminiClient
 from core.memory import MemoryManager
+from core.prompt import PromptBuilder
+from core.telemetry import telemetry
+
+THOUGHT_OPEN = "<THOUGHT>"
+THOUGHT_CLOSE = "</THOUGHT>"
+ANSWER_OPEN = "<ANSWER>"
+ANSWER_CLOSE = "</ANSWER>"
+_TAGS = (THOUGHT_OPEN, THOUGHT_CLOSE, ANSWER_OPEN, ANSWER_CLOSE)
+
+TITLE_PROMPT = "Summarize this user query into a very short 3-5 word title (English or Chinese). Query: {query}. Title:"
+
+# Background work of the sync API (overlapped retrieval and summarization, titles)
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="nexus-orchestrator")
+
+def submit(fn: Callable, *args, **kwargs) -> Future:
+    """
+    Run fn on the orchestrator's worker threads, keeping the caller's trace context.
+    """
+    return _executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+def run_sync(coro):
+    """
+    Run a coroutine to completion from synchronous code, including code that
+    is itself running inside an event loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    return submit(asyncio.run, coro).result()
+
+class ResponseStreamParser:
+    """
+    Incremental parser for the <THOUGHT>/<ANSWER> response format.
+    Tags may arrive split across chunks; any trailing text that could still
+    turn into a tag is held back until the next chunk resolves it.
+    """
+    def __init__(self):
+        self._buffer = ""
+        self._preamble = ""
+        self._section = None  # None (before any tag), "thought" or "answer"
+        self._started = {"thought": False, "answer": False}
+
+    def _emit(self, section: str, text: str) -> List[Tuple[str, str]]:
+        # Drop leading whitespace at the start of each section (matches .strip() in the blocking parser)
+        if not self._started[section]:
+            text = text.lstrip()
+            if not text:
+                return []
+            self._started[section] = True
+        return [(section, text)]
+
+    def _route(self, text: str) -> List[Tuple[str, str]]:
+        if not text:
+            return []
+        if self._section is None:
+            self._preamble += text
+            return []
+        return self._emit(self._section, text)
+
+    def _enter(self, section: str) -> List[Tuple[str, str]]:
+        # Anything before the first tag belongs to the thought, as in the blocking parser
+        events = []
+        if self._section is None and self._preamble:
+            events += self._emit("thought", self._preamble)
+            self._preamble = ""
+        self._section = section
+        return events
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """
+        Consume a chunk of raw model output.
+        
+        Args:
+            chunk (str): The next text delta from the model.
+            
+        Returns:
+            List[Tuple[str, str]]: (section, delta) pairs ready to display.
+        """
+        self._buffer += chunk
+        events = []
+        while True:
+            positions = [(self._buffer.find(tag), tag) for tag in _TAGS]
+            positions = [(pos, tag) for pos, tag in positions if pos != -1]
+            if not positions:
+                break
+            pos, tag = min(positions)
+            events += self._route(self._buffer[:pos])
+            self._buffer = self._buffer[pos + len(tag):]
+            if tag == THOUGHT_OPEN:
+                events += self._enter("thought")
+            elif tag == ANSWER_OPEN:
+                events += self._enter("answer")
+            # Closing tags are simply dropped
+
+        # Hold back a trailing partial tag such as "<ANS"
+        cut = self._buffer.rfind("<")
+        if cut != -1 and any(tag.startswith(self._buffer[cut:]) for tag in _TAGS):
+            ready, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        else:
+            ready, self._buffer = self._buffer, ""
+        events += self._route(ready)
+        return events
+
+    def close(self) -> List[Tuple[str, str]]:
+        """
+        Flush whatever is still buffered once the stream has ended.
+        
+        Returns:
+            List[Tuple[str, str]]: Remaining (section, delta) pairs.
+        """
+        events = self._route(self._buffer)
+        self._buffer = ""
+        if self._section is None and self._preamble:
+            # The model never used the delimiters: everything is the answer
+            events += self._emit("answer", self._preamble)
+            self._preamble = ""
+        return events
 
 class Orchestrator:
     """
     The Brain of Nexus-Core.
     Coordinates Memory retrieval and LLM generation with a Chain of Thought process.
     """
-    def __init__(self):
-        self.llm = GeminiClient()
-        self.memory = MemoryManager()
+    def __init__(self, response_cache: Optional[ResponseCache] = None, llm: Optional[GeminiClient] = None, memory: Optional[MemoryManager] = None):
+        """
+        Args:
+            response_cache (ResponseCache, optional): Cache placed in front of generation.
+                When omitted, one is created according to Config.RESPONSE_CACHE_MODE.
+            llm (GeminiClient, optional): LLM client; any object with the same
+                generate/generate_stream interface works (e.g. an offline stand-in).
+            memory (MemoryManager, optional): Memory to retrieve from; shares the
+                process-wide store for the default collection when omitted.
+        """
+        self.llm = llm or GeminiClient()
+        self.memory = memory or MemoryManager()
+        if response_cache is None and Config.RESPONSE_CACHE_MODE in ("exact", "semantic"):
+            embed_fn = self.memory.embed if Config.RESPONSE_CACHE_MODE == "semantic" else None
+            response_cache = ResponseCache(path=Config.RESPONSE_CACHE_PATH, embed_fn=embed_fn)
+        self.cache = response_cache
+        self.prompt_builder = PromptBuilder(self.llm)
+
+    @staticmethod
+    def _prior_history(user_query: str, chat_history: List[Dict] = None) -> List[Dict]:
+        # The UI appends the current query before calling us; it is not part of the history key
+        history = list(chat_history or [])
+        if history and history[-1].get("role") == "user" and history[-1].get("content") == user_query:
+            history = history[:-1]
+        return history
+
+    @telemetry.traced("orchestrator.cache_lookup")
+    def _cache_lookup(self, user_query: str, context_docs: List[str], chat_history: List[Dict] = None) -> Optional[Dict[str, Any]]:
+        if self.cache is None:
+            return None
+        try:
+            cached = self.cache.lookup(
+                user_query, context_docs, self._prior_history(user_query, chat_history),
+                memory_signature=self.memory.signature()
+            )
+            telemetry.current().set(hit=cached is not None)
+            return cached
+        except Exception as e:
+            print(f"Error reading response cache: {e}")
+            telemetry.current().fail(e)
+            return None
+
+    def _cache_store(self, user_query: str, context_docs: List[str], chat_history: List[Dict], raw_response: str, response: Dict[str, Any]):
+        # Only well-formed answers are worth replaying; errors and fallbacks are not
+        if self.cache is None or THOUGHT_OPEN not in raw_response or ANSWER_OPEN not in raw_response:
+            return
+        try:
+            self.cache.store(
+                user_query, context_docs, self._prior_history(user_query, chat_history), response,
+                memory_signature=self.memory.signature()
+            )
+        except Exception as e:
+            print(f"Error writing response cache: {e}")
+
+    @telemetry.traced("orchestrator.retrieve")
+    def _retrieve(self, user_query: str, chat_history: List[Dict] = None) -> List[str]:
+        """
+        Retrieve context passages: diverse (MMR) and with neighbouring chunks merged,
+        so the prompt carries more distinct information per token. Follow-ups
+        (short messages, or ones that refer back) also search with rephrasings
+        built from the recent turns, in the same batched query. Turns that cannot use memory (acknowledgements, rewrites
+        of the last answer) get none when Config.RETRIEVAL_GATE is on.
+        """
+        history = self._prior_history(user_query, chat_history)
+        if Config.RETRIEVAL_GATE:
+            retrieve, reason = needs_retrieval(user_query, history)
+            if not retrieve:
+                telemetry.current().set(skipped=reason, docs=0)
+                return []
+        queries = retrieval_queries(user_query, history, Config.RETRIEVAL_QUERIES, max_words=Config.FOLLOW_UP_MAX_WORDS)
+        docs = [passage["text"] for passage in self.memory.query_passages(queries[0], related=queries[1:])]
+        telemetry.current().set(queries=len(queries), docs=len(docs), chars=sum(len(doc) for doc in docs))
+        return docs
+
+    @telemetry.traced("orchestrator.build_prompt")
+    def _build_prompt(self, user_query: str, context_docs: List[str], chat_history: List[Dict] = None, session_id: Optional[str] = None) -> Tuple[str, List[str], Dict[str, int]]:
+        """
+        Construct a prompt enforcing Chain of Thought within the token budget.
+        
+        Returns:
+            Tuple[str, List[str], Dict[str, int]]: The prompt, the context docs it contains
+            and per-section token usage.
+        """
+        prompt, included, usage = self.prompt_builder.build(
+            user_query, context_docs, self._prior_history(user_query, chat_history), session_id=session_id
+        )
+        telemetry.current().set(
+            prompt_chars=len(prompt), prompt_tokens=usage["total"],
+            context_tokens=usage["context"], history_tokens=usage["history"]
+        )
+        return prompt, included, usage
+
+    @telemetry.traced("orchestrator.parse")
+    def _parse_response(self, raw_response: str, context_docs: List[str]) -> Dict[str, Any]:
+        """
+        Split a complete raw response into 'thought' and 'answer'.
+        """
+        # Simple check to see if we actually found something useful (not empty)
+        has_context = len(context_docs) > 0
+
+        if THOUGHT_OPEN in raw_response and ANSWER_OPEN in raw_response:
+            parts = raw_response.split(ANSWER_OPEN)
+            thought_part = parts[0].replace(THOUGHT_OPEN, "").replace(THOUGHT_CLOSE, "").strip()
+            answer_part = parts[1].replace(ANSWER_CLOSE, "").strip()
+            return {
+                "thought": thought_part, 
+                "answer": answer_part,
+                "context_used": context_docs if has_context else []
+            }
+        
+        return {
+            "thought": "Thinking process not captured.", 
+            "answer": raw_response,
+            "context_used": context_docs if has_context else []
+        }
+
+    @telemetry.traced("orchestrator.title")
+    def generate_title(self, user_message: str) -> str:
+        """
+        A very short title for a conversation, from its first message.
+        Falls back to the start of the message if generation fails.
+        """
+        fallback = user_message[:25]
+        try:
+            title = self.llm.generate(TITLE_PROMPT.format(query=user_message))
+            # The client reports failures as text
+            if not title or title == EMPTY_RESPONSE or title.startswith("Error:"):
+                return fallback
+            title = title.strip().replace('"', '').replace("Title:", "").strip()
+            return title if title else fallback
+        except Exception as e:
+            print(f"Error generating title: {e}")
+            return fallback
+
+    async def agenerate_title(self, user_message: str) -> str:
+        """
+        Async generate_title, for running alongside aprocess_query.
+        """
+        return await asyncio.to_thread(self.generate_title, user_message)
+
+    async def aprocess_query(self, user_query: str, chat_history: List[Dict] = None, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Async variant of process_query.
+
+        Retrieval and history summarization do not depend on each other and run
+        concurrently; Chroma and Gemini calls are offloaded to worker threads,
+        where the client's concurrency limits and retries still apply.
+        
+        Args:
+            user_query (str): The user's input.
+            chat_history (list): Previous messages for context.
+            session_id (str, optional): Chat session, keys the rolling history summary.
+            
+        Returns:
+            Dict[str, Any]: Same as process_query.
+        """
+        with telemetry.span("orchestrator.process_query") as span:
+            try:
+                context_docs, _ = await asyncio.gather(
+                    asyncio.to_thread(self._retrieve, user_query, chat_history),
+                    asyncio.to_thread(
+                        self.prompt_builder.prepare_history,
+                        user_query, self._prior_history(user_query, chat_history), session_id
+                    ),
+                )
+                cached = await asyncio.to_thread(self._cache_lookup, user_query, context_docs, chat_history)
+                if cached is not None:
+                    return cached
+
+                prompt, included_docs, usage = await asyncio.to_thread(
+                    self._build_prompt, user_query, context_docs, chat_history, session_id
+                )
+                raw_response = await asyncio.to_thread(self.llm.generate, prompt)
+                response = self._parse_response(raw_response, included_docs)
+                response["prompt_usage"] = usage
+                await asyncio.to_thread(self._cache_store, user_query, context_docs, chat_history, raw_response, response)
+                span.set(answer_chars=len(response["answer"]))
+                return response
 
-    def process_query(self, user_query: str, chat_history: List[Dict] = None) -> Dict[str, Any]:
+            except Exception as e:
+                span.fail(e)
+                return {"thought": "Error", "answer": f"An error occurred during orchestration: {str(e)}", "context_used": []}
+
+    def process_query(self, user_query: str, chat_history: List[Dict] = None, session_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Process the user query:
-        1. Retrieve context from Memory.
+        1. Retrieve context from Memory (while older history is summarized).
         2. Construct a prompt enforcing Chain of Thought.
         3. Generate response via Gemini.
         
+        Synchronous wrapper around aprocess_query.
+        
         Args:
             user_query (str): The user's input.
             chat_history (list): Previous messages for context.
+            session_id (str, optional): Chat session, keys the rolling history summary.
             
         Returns:
-            Dict[str, Any]: A dictionary containing 'thought', 'answer', and 'context_used'.
+            Dict[str, Any]: A dictionary containing 'thought', 'answer', 'context_used'
+            and 'prompt_usage' (estimated tokens per prompt section).
         """
-        try:
-            # 1. Retrieve Context
-            context_docs = self.memory.query_context(user_query)
-            context_str = "\n".join(context_docs) if context_docs else "No relevant memory found."
-            
-            # Simple check to see if we actually found something useful (not empty)
-            has_context = len(context_docs) > 0
-
-            # 2. Format History for Prompt
-            history_str = ""
-            if chat_history:
-                # Increase context window to last 20 messages for better continuity
-                recent = chat_history[-20:] 
-                for msg in recent:
-                    role = "User" if msg["role"] == "user" else "Nexus"
-                    content = msg["content"]
-                    # If content is a dict (from assistant), extract 'answer'
-                    if isinstance(content, dict): 
-                        content = content.get("answer", "")
-                    
-                    # Skip empty content or internal thoughts
-                    if content:
-                        history_str += f"{role}: {content}\n"
-                
-                if not history_str:
-                    history_str = "No recent conversation."
-            else:
-                 history_str = "No prior conversation."
-
-            # 3. Construct Prompt
-            prompt = f"""
-            You are Nexus, a dedicated Personal Knowledge Assistant.
-            
-            ### Context from Memory:
-            {context_str}
+        return run_sync(self.aprocess_query(user_query, chat_history, session_id))
 
-            ### Previous Conversation:
-            {history_str}
-            
-            ### User Query:
-            {user_query}
-            
-            ### Instructions:
-            1. **Context**: You are in an ongoing conversation. Do NOT introduce yourself ("Hi, I'm Nexus") unless explicitly asked who you are.
-            2. **Title**: If the user asks for a title or summary, provide a very short one.
-            3. **Think**: Analyze the request, memory, and history. Plan your answer.
-            4. **Answer**: Provide a clear, concise, and helpful response. Use a professional yet friendly tone.
-            
-            Format your output EXACTLY as follows using special delimiters:
-            
-            <THOUGHT>
-            (Your thought process, planning, and analysis here)
-            </THOUGHT>
-            
-            <ANSWER>
-            (Your final answer to the user here)
-            </ANSWER>
-            """
-            
-            # 4. Generate Response
-            raw_response = self.llm.generate(prompt)
-            
-            # 5. Parse Response
-            if "<THOUGHT>" in raw_response and "<ANSWER>" in raw_response:
-                parts = raw_response.split("<ANSWER>")
-                thought_part = parts[0].replace("<THOUGHT>", "").replace("</THOUGHT>", "").strip()
-                answer_part = parts[1].replace("</ANSWER>", "").strip()
-                return {
-                    "thought": thought_part, 
-                    "answer": answer_part,
-                    "context_used": context_docs if has_context else []
-                }
-            
-            return {
-                "thought": "Thinking process not captured.", 
-                "answer": raw_response,
-                "context_used": context_docs if has_context else []
-            }
+    def process_query_stream(self, user_query: str, chat_history: List[Dict] = None, session_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of process_query.
+        
+        Args:
+            user_query (str): The user's input.
+            chat_history (list): Previous messages for context.
+            session_id (str, optional): Chat session, keys the rolling history summary.
             
-        except Exception as e:
-            return {"thought": "Error", "answer": f"An error occurred during orchestration: {str(e)}", "context_used": []}
+        Yields:
+            Dict[str, Any]: Events of the form {"type": "thought", "delta": str},
+            {"type": "answer", "delta": str} and finally {"type": "done", "response": dict},
+            where 'response' has the same shape as the return value of process_query.
+        """
+        with telemetry.span("orchestrator.process_query_stream") as span:
+            try:
+                # Summarize older history on a worker thread while retrieval runs here
+                history_ready = submit(
+                    self.prompt_builder.prepare_history,
+                    user_query, self._prior_history(user_query, chat_history), session_id
+                )
+                context_docs = self._retrieve(user_query, chat_history)
+                history_ready.result()
+                cached = self._cache_lookup(user_query, context_docs, chat_history)
+                if cached is not None:
+                    yield {"type": "thought", "delta": cached.get("thought", "")}
+                    yield {"type": "answer", "delta": cached.get("answer", "")}
+                    yield {"type": "done", "response": cached}
+                    return
+
+                prompt, included_docs, usage = self._build_prompt(user_query, context_docs, chat_history, session_id)
+                parser = ResponseStreamParser()
+                raw_parts = []
+                for chunk in self.llm.generate_stream(prompt):
+                    raw_parts.append(chunk)
+                    for section, delta in parser.feed(chunk):
+                        yield {"type": section, "delta": delta}
+                for section, delta in parser.close():
+                    yield {"type": section, "delta": delta}
+                raw_response = "".join(raw_parts)
+                response = self._parse_response(raw_response, included_docs)
+                response["prompt_usage"] = usage
+                self._cache_store(user_query, context_docs, chat_history, raw_response, response)
+                span.set(answer_chars=len(response["answer"]))
+                yield {"type": "done", "response": response}
+
+            except Exception as e:
+                span.fail(e)
+                yield {"type": "done", "response": {"thought": "Error", "answer": f"An error occurred during orchestration: {str(e)}", "context_used": []}}
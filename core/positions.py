@@ -0,0 +1,160 @@
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Columns of a chunk's place in its source, as stored by MemoryManager._write_chunks
+_ROW_FIELDS = ("chunk_id", "id", "start", "end", "page", "page_end")
+
+class PositionIndex:
+    """
+    Side index from (source, chunk position) to chunk id, with the character
+    offsets and pages of every position, plus one row per ingested document
+    with its chunk count, length and page range. Kept in SQLite next to the
+    ingest manifest so windows of a document can be planned without touching
+    the vector store.
+    """
+    def __init__(self, path: str, collection_name: str):
+        self.path = path
+        self.collection_name = collection_name
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS positions (
+                collection TEXT NOT NULL,
+                source TEXT NOT NULL,
+                chunk_id INTEGER NOT NULL,
+                id TEXT NOT NULL,
+                start INTEGER,
+                "end" INTEGER,
+                page INTEGER,
+                page_end INTEGER,
+                PRIMARY KEY (collection, source, chunk_id)
+            );
+            CREATE INDEX IF NOT EXISTS positions_id ON positions (collection, id);
+            CREATE TABLE IF NOT EXISTS documents (
+                collection TEXT NOT NULL,
+                source TEXT NOT NULL,
+                chunks INTEGER NOT NULL,
+                chars INTEGER NOT NULL,
+                first_page INTEGER,
+                last_page INTEGER,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (collection, source)
+            );
+        """)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM positions WHERE collection = ?", (self.collection_name,)
+            ).fetchone()[0]
+
+    def _refresh_documents(self, sources: List[str]):
+        # Caller holds the lock and the transaction
+        for source in sources:
+            self._conn.execute("DELETE FROM documents WHERE collection = ? AND source = ?", (self.collection_name, source))
+            self._conn.execute("""
+                INSERT INTO documents (collection, source, chunks, chars, first_page, last_page, updated_at)
+                SELECT collection, source, COUNT(*), COALESCE(MAX("end"), 0) - COALESCE(MIN(start), 0),
+                       MIN(page), MAX(page_end), ?
+                FROM positions WHERE collection = ? AND source = ?
+                GROUP BY collection, source
+            """, (time.time(), self.collection_name, source))
+
+    def replace(self, source: str, rows: List[Dict[str, Any]]):
+        """
+        Record the layout of a source, replacing any earlier version.
+
+        Args:
+            source (str): Source name.
+            rows (List[Dict]): One {"chunk_id", "id", "start", "end", "page", "page_end"} per position.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM positions WHERE collection = ? AND source = ?", (self.collection_name, source))
+            self._conn.executemany(
+                'INSERT INTO positions (collection, source, chunk_id, id, start, "end", page, page_end) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(self.collection_name, source) + tuple(row.get(field) for field in _ROW_FIELDS) for row in rows]
+            )
+            self._refresh_documents([source])
+
+    def remove_source(self, source: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM positions WHERE collection = ? AND source = ?", (self.collection_name, source))
+            self._conn.execute("DELETE FROM documents WHERE collection = ? AND source = ?", (self.collection_name, source))
+
+    def remove_ids(self, ids: List[str]):
+        """
+        Forget the positions of deleted chunks; their documents keep the remaining positions.
+        """
+        if not ids:
+            return
+        with self._lock, self._conn:
+            sources = set()
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                marks = ",".join("?" * len(batch))
+                params = [self.collection_name] + batch
+                sources.update(source for (source,) in self._conn.execute(
+                    f"SELECT DISTINCT source FROM positions WHERE collection = ? AND id IN ({marks})", params
+                ))
+                self._conn.execute(f"DELETE FROM positions WHERE collection = ? AND id IN ({marks})", params)
+            self._refresh_documents(sorted(sources))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM positions WHERE collection = ?", (self.collection_name,))
+            self._conn.execute("DELETE FROM documents WHERE collection = ?", (self.collection_name,))
+
+    def span(self, source: str, first: int, last: int) -> List[Dict[str, Any]]:
+        """
+        Stored positions of a source from `first` to `last` inclusive, in order.
+        Positions whose chunk was deleted (e.g. by compaction) are absent.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT chunk_id, id, start, "end", page, page_end FROM positions '
+                "WHERE collection = ? AND source = ? AND chunk_id BETWEEN ? AND ? ORDER BY chunk_id",
+                (self.collection_name, source, first, last)
+            ).fetchall()
+        return [dict(zip(_ROW_FIELDS, row)) for row in rows]
+
+    def pages(self, source: str, first_page: Optional[int] = None, last_page: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Stored positions of a source overlapping a page range, in order; a bound left as None is open.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT chunk_id, id, start, "end", page, page_end FROM positions '
+                "WHERE collection = ? AND source = ? AND (? IS NULL OR COALESCE(page_end, page) >= ?) "
+                "AND (? IS NULL OR page <= ?) ORDER BY chunk_id",
+                (self.collection_name, source, first_page, first_page, last_page, last_page)
+            ).fetchall()
+        return [dict(zip(_ROW_FIELDS, row)) for row in rows]
+
+    def document(self, source: str) -> Optional[Dict[str, Any]]:
+        """
+        A document's {"source", "chunks", "chars", "first_page", "last_page", "updated_at"}, or None.
+        """
+        return next(iter(self.documents([source])), None)
+
+    def documents(self, sources: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Every indexed document (or those named in `sources`), by source name.
+        """
+        query = "SELECT source, chunks, chars, first_page, last_page, updated_at FROM documents WHERE collection = ?"
+        params: List[Any] = [self.collection_name]
+        if sources is not None:
+            if not sources:
+                return []
+            query += f" AND source IN ({','.join('?' * len(sources))})"
+            params += list(sources)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY source", params).fetchall()
+        return [dict(zip(("source", "chunks", "chars", "first_page", "last_page", "updated_at"), row)) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,287 @@
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import Config
+
+PROMPT_TEMPLATE = """
+        You are Nexus, a dedicated Personal Knowledge Assistant.
+
+        ### Context from Memory:
+        {context}
+
+        ### Previous Conversation:
+        {history}
+
+        ### User Query:
+        {query}
+
+        ### Instructions:
+        1. **Context**: You are in an ongoing conversation. Do NOT introduce yourself ("Hi, I'm Nexus") unless explicitly asked who you are.
+        2. **Title**: If the user asks for a title or summary, provide a very short one.
+        3. **Think**: Analyze the request, memory, and history. Plan your answer.
+        4. **Answer**: Provide a clear, concise, and helpful response. Use a professional yet friendly tone.
+
+        Format your output EXACTLY as follows using special delimiters:
+
+        <THOUGHT>
+        (Your thought process, planning, and analysis here)
+        </THOUGHT>
+
+        <ANSWER>
+        (Your final answer to the user here)
+        </ANSWER>
+        """
+
+NO_CONTEXT = "No relevant memory found."
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a User and Nexus, a personal knowledge assistant.
+Keep facts, decisions, names and open questions; drop greetings and filler. Reply with the updated summary only, at most {max_words} words.
+
+### Current Summary:
+{summary}
+
+### New Turns:
+{turns}
+
+### Updated Summary:"""
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate: about 4 characters per token for ASCII text,
+    one token per character otherwise (CJK and other scripts).
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Trim text so that estimate_tokens(text) <= max_tokens.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+def format_message(msg: Dict) -> str:
+    """
+    Render one chat message as a prompt line ('' for empty content).
+    """
+    role = "User" if msg["role"] == "user" else "Nexus"
+    content = msg["content"]
+    # If content is a dict (from assistant), extract 'answer'
+    if isinstance(content, dict):
+        content = content.get("answer", "")
+    return f"{role}: {content}\n" if content else ""
+
+class HistorySummarizer:
+    """
+    Keeps one rolling summary per session. Older turns are folded into the
+    summary incrementally: each update sends only the previous summary and
+    the turns that aged out since, never the full history.
+    """
+    def __init__(self, llm, max_tokens: int = None):
+        """
+        Args:
+            llm: Client exposing generate(prompt) -> str.
+            max_tokens (int): Upper bound on the summary size.
+        """
+        self.llm = llm
+        self.max_tokens = max_tokens if max_tokens is not None else Config.PROMPT_SUMMARY_TOKENS
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fingerprint(messages: List[Dict]) -> str:
+        digest = hashlib.sha256()
+        for msg in messages:
+            digest.update(format_message(msg).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, session_key: str, history: List[Dict]) -> Tuple[str, int]:
+        """
+        Current summary for a session and how many leading messages it covers.
+        Returns ("", 0) if the session is unknown or its history was rewritten.
+        """
+        with self._lock:
+            entry = self._summaries.get(session_key)
+        if not entry or entry["covered"] > len(history):
+            return "", 0
+        if self._fingerprint(history[:entry["covered"]]) != entry["fingerprint"]:
+            return "", 0
+        return entry["summary"], entry["covered"]
+
+    def fold(self, session_key: str, history: List[Dict], covered: int, upto: int, summary: str) -> Tuple[str, int]:
+        """
+        Fold history[covered:upto] into the summary.
+
+        Returns:
+            Tuple[str, int]: The new summary and the number of messages it covers.
+        """
+        turns = "".join(format_message(msg) for msg in history[covered:upto])
+        if turns:
+            prompt = SUMMARY_PROMPT.format(
+                max_words=max(20, self.max_tokens * 3 // 4),
+                summary=summary or "(empty)",
+                turns=turns
+            )
+            try:
+                updated = self.llm.generate(prompt).strip()
+                # The client reports failures as text; keep the old summary in that case
+                if updated and not updated.startswith("Error:"):
+                    summary = truncate_to_tokens(updated, self.max_tokens)
+            except Exception as e:
+                print(f"Error summarizing history: {e}")
+
+        with self._lock:
+            self._summaries[session_key] = {
+                "summary": summary,
+                "covered": upto,
+                "fingerprint": self._fingerprint(history[:upto])
+            }
+        return summary, upto
+
+class PromptBuilder:
+    """
+    Assembles the Chain of Thought prompt under a token budget.
+
+    The fixed instructions and the query are always included. The rest of
+    the budget is shared between memory context (guaranteed
+    Config.PROMPT_CONTEXT_SHARE of it, more if history needs less) and
+    history, which is the rolling summary plus as many recent turns as fit.
+    """
+    def __init__(self, llm, token_budget: int = None, context_share: float = None, summarizer: Optional[HistorySummarizer] = None):
+        """
+        Args:
+            llm: Client used to summarize older turns.
+            token_budget (int): Total prompt budget in (estimated) tokens.
+            context_share (float): Fraction of the free budget reserved for memory context.
+            summarizer (HistorySummarizer, optional): Shared rolling-summary store.
+        """
+        self.token_budget = token_budget if token_budget is not None else Config.PROMPT_TOKEN_BUDGET
+        self.context_share = context_share if context_share is not None else Config.PROMPT_CONTEXT_SHARE
+        self.summarizer = summarizer or HistorySummarizer(llm)
+
+    @staticmethod
+    def session_key(history: List[Dict], session_id: Optional[str] = None) -> str:
+        # Without an explicit id, a conversation is identified by its first message
+        if session_id:
+            return session_id
+        return "anon:" + HistorySummarizer._fingerprint(history[:1])
+
+    def _fit_context(self, context_docs: List[str], budget: int) -> List[str]:
+        # Keep retrieval order; trim the first doc that does not fit, skip later ones that don't
+        included, used = [], 0
+        for doc in context_docs:
+            cost = estimate_tokens(doc) + 1
+            if used + cost <= budget:
+                included.append(doc)
+                used += cost
+            elif not included and budget > 1:
+                included.append(truncate_to_tokens(doc, budget - 1))
+                used = budget
+        return included
+
+    def _fit_history(self, history: List[Dict], session_key: str, budget: int) -> Tuple[str, int]:
+        """
+        Returns:
+            Tuple[str, int]: The history section and the number of verbatim turns in it.
+        """
+        summary, covered = self.summarizer.get(session_key, history)
+        lines = [format_message(msg) for msg in history]
+
+        def recent_that_fit(limit: int) -> int:
+            # Oldest index from which history[start:] fits into `limit`
+            used, start = 0, len(history)
+            while start > covered and used + estimate_tokens(lines[start - 1]) <= limit:
+                used += estimate_tokens(lines[start - 1])
+                start -= 1
+            return start
+
+        summary_cost = estimate_tokens(summary) + 8 if summary else 0
+        start = recent_that_fit(budget - summary_cost)
+        if start > covered:
+            # Not everything fits: fold the overflow into the summary, leaving headroom
+            # (half the history budget) so the next few turns need no new summary call
+            start = max(start, recent_that_fit((budget - self.summarizer.max_tokens - 8) // 2))
+            summary, covered = self.summarizer.fold(session_key, history, covered, start, summary)
+            summary_cost = estimate_tokens(summary) + 8 if summary else 0
+            start = recent_that_fit(budget - summary_cost)
+
+        history_str = ""
+        if summary:
+            history_str += f"(Summary of earlier conversation) {summary}\n"
+        history_str += "".join(lines[start:])
+        return history_str, sum(1 for line in lines[start:] if line)
+
+    def _free_budget(self, user_query: str) -> Tuple[int, int]:
+        # Tokens taken by the fixed instructions and query, and what is left for context and history
+        instructions = estimate_tokens(PROMPT_TEMPLATE.format(context="", history="", query=user_query))
+        return instructions, max(0, self.token_budget - instructions)
+
+    def prepare_history(self, user_query: str, chat_history: List[Dict] = None, session_id: Optional[str] = None):
+        """
+        Bring the rolling summary up to date ahead of build(), so summarization
+        can run while retrieval is still in progress.
+
+        Uses the largest history budget build() could allow (no context found),
+        so it only folds turns that build() would have folded anyway.
+        """
+        history = chat_history or []
+        if not history:
+            return
+        _, free = self._free_budget(user_query)
+        budget = max(0, free - estimate_tokens(NO_CONTEXT))
+        self._fit_history(history, self.session_key(history, session_id), budget)
+
+    def build(self, user_query: str, context_docs: List[str], chat_history: List[Dict] = None, session_id: Optional[str] = None) -> Tuple[str, List[str], Dict[str, int]]:
+        """
+        Build the prompt.
+
+        Args:
+            user_query (str): The user's input.
+            context_docs (List[str]): Retrieved memory, most relevant first.
+            chat_history (list): Previous messages, excluding the current query.
+            session_id (str, optional): Key for the rolling summary.
+
+        Returns:
+            Tuple[str, List[str], Dict[str, int]]: The prompt, the context docs it
+            actually contains, and per-section token usage.
+        """
+        history = chat_history or []
+        instructions, free = self._free_budget(user_query)
+
+        # Context may borrow whatever history does not need
+        history_need = sum(estimate_tokens(format_message(msg)) for msg in history)
+        context_cap = max(int(free * self.context_share), free - history_need)
+        included = self._fit_context(context_docs, context_cap)
+        context_str = "\n".join(included) if included else NO_CONTEXT
+        context_tokens = estimate_tokens(context_str)
+
+        if history:
+            history_str, turns = self._fit_history(history, self.session_key(history, session_id), max(0, free - context_tokens))
+            if not history_str:
+                history_str = "No recent conversation."
+        else:
+            history_str, turns = "No prior conversation.", 0
+        history_tokens = estimate_tokens(history_str)
+
+        prompt = PROMPT_TEMPLATE.format(context=context_str, history=history_str, query=user_query)
+        usage = {
+            "budget": self.token_budget,
+            "instructions": instructions,
+            "context": context_tokens,
+            "history": history_tokens,
+            "total": estimate_tokens(prompt),
+            "context_docs": len(included),
+            "history_turns": turns,
+        }
+        return prompt, included, usage
@@ -0,0 +1,149 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def mmr(query_vec, doc_vecs, k: int, lambda_mult: float = 0.7) -> List[int]:
+    """
+    Maximal Marginal Relevance selection.
+
+    Greedily picks the candidate maximising
+    lambda * sim(query, doc) - (1 - lambda) * max(sim(doc, already picked)),
+    with all similarities computed as one matrix product up front.
+
+    Args:
+        query_vec: Query embedding, shape (dim,).
+        doc_vecs: Candidate embeddings, shape (n, dim).
+        k (int): Number of candidates to select.
+        lambda_mult (float): 1.0 is pure relevance, 0.0 pure diversity.
+
+    Returns:
+        List[int]: Indices into doc_vecs in selection order.
+    """
+    docs = _normalize(np.asarray(doc_vecs, dtype=np.float32))
+    if docs.ndim != 2 or len(docs) == 0 or k <= 0:
+        return []
+    query = _normalize(np.asarray(query_vec, dtype=np.float32).reshape(1, -1))[0]
+
+    relevance = docs @ query
+    pairwise = docs @ docs.T
+    k = min(k, len(docs))
+
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of every candidate to anything selected so far
+    redundancy = pairwise[selected[0]].copy()
+    available = np.ones(len(docs), dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, pairwise[best], out=redundancy)
+    return selected
+
+def _overlap(left: str, right: str, max_overlap: int) -> int:
+    # Length of the longest suffix of `left` that is also a prefix of `right`
+    for size in range(min(len(left), len(right), max_overlap), 0, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+def _join(prev: Dict[str, Any], nxt: Dict[str, Any], text: str, max_overlap: int) -> str:
+    # The part of `nxt` to append after `text`, which ends with `prev`
+    prev_end, nxt_start = prev["metadata"].get("end"), nxt["metadata"].get("start")
+    if isinstance(prev_end, int) and isinstance(nxt_start, int):
+        # Character offsets are exact: skip the shared span, or restore the whitespace the
+        # chunker left out between them (as recorded, else a stand-in of the same length)
+        shared = prev_end - nxt_start
+        if shared >= 0:
+            return nxt["text"][shared:]
+        lead = nxt["metadata"].get("lead")
+        if not isinstance(lead, str) or len(lead) != -shared:
+            lead = " " if shared == -1 else "\n" * -shared
+        return lead + nxt["text"]
+    return nxt["text"][_overlap(text, nxt["text"], max_overlap):]
+
+def merge_adjacent(hits: List[Dict[str, Any]], max_overlap: int = 200) -> List[Dict[str, Any]]:
+    """
+    Merge hits that are consecutive chunks of the same source into single
+    passages, dropping the text the chunks share at their boundaries (known
+    exactly from their offsets when stored, otherwise found by matching).
+
+    Args:
+        hits (List[Dict]): Ranked hits as {"id", "text", "metadata", "score"}.
+        max_overlap (int): Longest shared boundary to look for.
+
+    Returns:
+        List[Dict[str, Any]]: Passages as {"ids", "text", "metadata", "score"},
+        ordered by the rank of their best member.
+    """
+    groups: Dict[Any, List[Dict[str, Any]]] = {}
+    passages = []
+    for rank, hit in enumerate(hits):
+        meta = hit.get("metadata") or {}
+        if isinstance(meta.get("chunk_id"), int) and meta.get("source") is not None:
+            groups.setdefault(meta["source"], []).append(dict(hit, rank=rank))
+        else:
+            passages.append({"ids": [hit["id"]], "text": hit["text"], "metadata": meta, "score": hit.get("score"), "rank": rank})
+
+    for source, members in groups.items():
+        members.sort(key=lambda hit: hit["metadata"]["chunk_id"])
+        run = [members[0]]
+        for hit in members[1:] + [None]:
+            if hit is not None and hit["metadata"]["chunk_id"] == run[-1]["metadata"]["chunk_id"] + 1:
+                run.append(hit)
+                continue
+            text = run[0]["text"]
+            for prev, nxt in zip(run, run[1:]):
+                text += _join(prev, nxt, text, max_overlap)
+            best = min(run, key=lambda member: member["rank"])
+            meta = dict(run[0]["metadata"])
+            if len(run) > 1:
+                meta["chunk_end"] = run[-1]["metadata"]["chunk_id"]
+                if "end" in run[-1]["metadata"]:
+                    meta["end"] = run[-1]["metadata"]["end"]
+                if "page_end" in run[-1]["metadata"]:
+                    meta["page_end"] = run[-1]["metadata"]["page_end"]
+            passages.append({
+                "ids": [member["id"] for member in run],
+                "text": text,
+                "metadata": meta,
+                "score": best.get("score"),
+                "rank": best["rank"],
+            })
+            run = [hit]
+
+    passages.sort(key=lambda passage: passage["rank"])
+    for passage in passages:
+        del passage["rank"]
+    return passages
+
+def fuse_rankings(rankings: List[List[Dict[str, Any]]], k: int = 60, limit: int = None, weights: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+    """
+    Weighted reciprocal rank fusion of several ranked hit lists, de-duplicated by id.
+
+    Args:
+        rankings (List[List[Dict]]): Hit lists as {"id", "text", "metadata", "score"}, best first.
+        k (int): RRF constant; larger values flatten the weight of the top ranks.
+        limit (int, optional): Number of hits to return (default: all).
+        weights (List[float], optional): Weight of each ranking (default: 1.0 for all).
+
+    Returns:
+        List[Dict[str, Any]]: Every distinct hit once with its fused score, best first.
+    """
+    fused: Dict[str, float] = {}
+    hits: Dict[str, Dict[str, Any]] = {}
+    weights = weights or [1.0] * len(rankings)
+    for ranking, weight in zip(rankings, weights):
+        for rank, hit in enumerate(ranking):
+            fused[hit["id"]] = fused.get(hit["id"], 0.0) + weight / (k + rank + 1)
+            hits.setdefault(hit["id"], hit)
+    top = sorted(fused, key=fused.get, reverse=True)[:limit]
+    return [dict(hits[doc_id], score=fused[doc_id]) for doc_id in top]
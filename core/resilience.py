@@ -0,0 +1,167 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional
+
+# HTTP statuses worth retrying: rate limited, server error, unavailable, gateway timeout
+_RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+# google.api_core exception names, matched by name so the SDK is not imported here
+_RETRYABLE_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "BadGateway", "Aborted",
+}
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Whether an error is transient (rate limits, timeouts, 5xx, dropped connections).
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in _RETRYABLE_NAMES:
+        return True
+    code = getattr(error, "code", None)
+    try:
+        return int(code) in _RETRYABLE_CODES
+    except (TypeError, ValueError):
+        return False
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**attempt)].
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter: `rate` tokens per second, bursts up to `capacity`.
+    """
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate (float): Refill rate in tokens per second; 0 disables limiting.
+            capacity (float): Largest burst.
+        """
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Take one token, sleeping until one is available.
+
+        Returns:
+            bool: False if `timeout` seconds passed first.
+        """
+        if self.rate <= 0:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                if now + wait > deadline:
+                    return False
+            time.sleep(wait)
+
+class Singleflight:
+    """
+    Collapses concurrent calls with the same key into one: the first caller
+    runs the function, the others wait and share its result or exception.
+    """
+    def __init__(self):
+        self._calls: Dict[Hashable, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None, "shared": 0}
+            else:
+                call["shared"] += 1
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+class CallLimiter:
+    """
+    Bounds upstream calls process-wide: at most `max_concurrency` in flight,
+    started no faster than the token bucket allows.
+    """
+    def __init__(self, max_concurrency: int, requests_per_minute: float = 0, burst: int = 1):
+        self._semaphore = threading.BoundedSemaphore(max(1, max_concurrency))
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[None]:
+        """
+        Hold one concurrency slot (and spend one rate token) for the duration of a call.
+
+        Raises:
+            TimeoutError: If no slot or token became available within `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self._semaphore.acquire(timeout=-1 if timeout is None else timeout):
+            raise TimeoutError("Timed out waiting for an LLM concurrency slot")
+        try:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self.bucket.acquire(remaining):
+                raise TimeoutError("Timed out waiting for the LLM rate limit")
+            yield
+        finally:
+            self._semaphore.release()
+
+def retry_call(
+    fn: Callable[[], Any],
+    max_retries: int,
+    base_delay: float,
+    max_delay: float,
+    retryable: Callable[[BaseException], bool] = is_retryable,
+    on_retry: Optional[Callable[[int, BaseException, float], None]] = None,
+) -> Any:
+    """
+    Call fn, retrying transient failures with exponential backoff and jitter.
+
+    Args:
+        fn (callable): The call to make.
+        max_retries (int): Retries after the first attempt.
+        base_delay (float): Backoff base in seconds.
+        max_delay (float): Backoff cap in seconds.
+        retryable (callable): Decides whether an error is worth retrying.
+        on_retry (callable, optional): Called as (attempt, error, delay) before each sleep.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not retryable(e):
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            if on_retry:
+                on_retry(attempt + 1, e, delay)
+            time.sleep(delay)
+            attempt += 1
@@ -0,0 +1,199 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from core.config import Config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL DEFAULT '',
+    title TEXT NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+"""
+
+class SessionStore:
+    """
+    Durable chat sessions in SQLite.
+
+    The sidebar reads only the small `sessions` index (title, pinned,
+    created_at); messages are stored one row each and read in pages from
+    the end of a conversation, so the cost of a UI rerun follows what is on
+    screen rather than the total history.
+
+    Every session belongs to an owner (the browser that created it); the
+    index methods take the owner and only see or change that owner's sessions.
+    """
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path (str): Database file (Config.SESSION_DB_PATH by default); ":memory:" for a throwaway store.
+        """
+        self.path = path or Config.SESSION_DB_PATH
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # One connection shared across Streamlit's script threads, serialized by the lock
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SCHEMA)
+            # Databases from before sessions had owners; their chats stay unlisted
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+            if "owner" not in columns:
+                self._conn.execute("ALTER TABLE sessions ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+            self._conn.execute("DROP INDEX IF EXISTS sessions_order")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_owner_order ON sessions (owner, pinned DESC, created_at DESC)")
+
+    # --- session index ---
+    def list_sessions(self, owner: str) -> List[Dict[str, Any]]:
+        """
+        An owner's sessions without their messages, pinned first, newest first.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, title, pinned, created_at, message_count FROM sessions WHERE owner = ? "
+                "ORDER BY pinned DESC, created_at DESC",
+                (owner,)
+            ).fetchall()
+        return [self._session_dict(row) for row in rows]
+
+    def get(self, session_id: str, owner: str) -> Optional[Dict[str, Any]]:
+        """
+        One session's index entry, or None if it does not exist or belongs to another owner.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, title, pinned, created_at, message_count FROM sessions WHERE id = ? AND owner = ?",
+                (session_id, owner)
+            ).fetchone()
+        return self._session_dict(row) if row else None
+
+    def create(self, owner: str, title: str = "New Chat") -> str:
+        """
+        Create an empty session.
+
+        Args:
+            owner (str): Id of the client the session belongs to.
+            title (str): Initial title.
+
+        Returns:
+            str: The new session id.
+        """
+        session_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sessions (id, owner, title, pinned, created_at, updated_at) VALUES (?, ?, ?, 0, ?, ?)",
+                (session_id, owner, title, now, now)
+            )
+        return session_id
+
+    def rename(self, session_id: str, owner: str, title: str):
+        self._update(session_id, owner, title=title)
+
+    def set_pinned(self, session_id: str, owner: str, pinned: bool):
+        self._update(session_id, owner, pinned=int(bool(pinned)))
+
+    def delete(self, session_id: str, owner: str):
+        """
+        Delete a session and all of its messages; sessions of other owners are left alone.
+        """
+        with self._lock, self._conn:
+            deleted = self._conn.execute("DELETE FROM sessions WHERE id = ? AND owner = ?", (session_id, owner)).rowcount
+            if deleted:
+                self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+    def titles(self, owner: str) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT title FROM sessions WHERE owner = ?", (owner,))]
+
+    # --- messages ---
+    def append_message(self, session_id: str, role: str, content: Any) -> int:
+        """
+        Append a message; `content` is a string or a JSON-serializable dict.
+
+        Returns:
+            int: The message's position in the session (0-based).
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT message_count FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Unknown session {session_id}")
+            seq = row[0]
+            self._conn.execute(
+                "INSERT INTO messages (session_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, seq, role, json.dumps(content), now)
+            )
+            self._conn.execute(
+                "UPDATE sessions SET message_count = ?, updated_at = ? WHERE id = ?",
+                (seq + 1, now, session_id)
+            )
+        return seq
+
+    def messages(self, session_id: str, limit: int = None, before: int = None) -> List[Dict[str, Any]]:
+        """
+        Messages in chronological order, optionally only the last `limit` of them.
+
+        Args:
+            session_id (str): The session.
+            limit (int, optional): Page size counted back from the end (or from `before`).
+            before (int, optional): Only messages with a position below this one.
+
+        Returns:
+            List[Dict[str, Any]]: Messages as {"seq", "role", "content"}; (session, seq) identifies a message.
+        """
+        query = "SELECT seq, role, content FROM messages WHERE session_id = ?"
+        params: List[Any] = [session_id]
+        if before is not None:
+            query += " AND seq < ?"
+            params.append(before)
+        query += " ORDER BY seq DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [{"seq": row["seq"], "role": row["role"], "content": json.loads(row["content"])} for row in reversed(rows)]
+
+    # --- helpers ---
+    def _update(self, session_id: str, owner: str, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE sessions SET {assignments}, updated_at = ? WHERE id = ? AND owner = ?",
+                (*fields.values(), time.time(), session_id, owner)
+            )
+
+    @staticmethod
+    def _session_dict(row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "pinned": bool(row["pinned"]),
+            "created_at": row["created_at"],
+            "message_count": row["message_count"],
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,327 @@
+import os
+import sys
+import threading
+from contextlib import ExitStack, contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from core.cache import RetrievalCache
+from core.config import Config
+from core.lexical import BM25Index
+from core.positions import PositionIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows: writing processes are not kept apart
+    fcntl = None
+
+class RWLock:
+    """
+    Readers/writer lock: any number of concurrent readers or one writer.
+
+    Waiting writers block new readers so ingestion is not starved by a steady
+    stream of queries. Both sides are re-entrant per thread, and the writing
+    thread may also read.
+    """
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        me = threading.get_ident()
+        depth = getattr(self._local, "depth", 0)
+        if depth or self._writer == me:
+            # Already inside a read or write section on this thread
+            self._local.depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.depth = depth
+            return
+
+        with self._cond:
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        self._local.depth = 1
+        try:
+            yield
+        finally:
+            self._local.depth = 0
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    def held(self) -> bool:
+        """
+        Whether the calling thread is inside a read or write section.
+        """
+        return getattr(self._local, "depth", 0) > 0 or self._writer == threading.get_ident()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+            else:
+                self._writers_waiting += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._writers_waiting -= 1
+                self._writer = me
+                self._writer_depth = 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer_depth -= 1
+                if self._writer_depth == 0:
+                    self._writer = None
+                    self._cond.notify_all()
+
+class MemoryStore:
+    """
+    One collection and everything that must stay in step with it: the
+    embedding function, the lexical and position indexes, and the ingest
+    manifest with the collection's write version. Shared by every
+    MemoryManager that opens the same backend, path and name.
+    """
+    def __init__(self, client, path: str, collection_name: str, backend: str = "chroma"):
+        """
+        Args:
+            client: The chromadb.PersistentClient for `path` (None for other backends).
+            path (str): Data directory of the backend.
+            collection_name (str): Name of the collection.
+            backend (str): Vector backend, see core.vectorstore.
+        """
+        # Imported here because core.memory builds on this module
+        from core.memory import IngestManifest
+        from core.embeddings import shared_engine
+        from core.vectorstore import open_vector_store
+
+        self.client = client
+        self.path = path
+        self.name = collection_name
+        self.backend = backend
+        # Writes and queries pass vectors from the shared engine; the backend keeps the
+        # model's function only for Chroma's collection configuration
+        self.embedder = shared_engine()
+        self.embedding_function = self.embedder.function
+        self.collection = open_vector_store(backend, path, collection_name, self.embedding_function, client)
+        self.manifest = IngestManifest(Config.INGEST_MANIFEST_PATH, collection_name)
+        self.lexical = BM25Index(os.path.join(Config.BM25_INDEX_DIRECTORY, f"{collection_name}.json"))
+        self.positions = PositionIndex(Config.POSITION_INDEX_PATH, collection_name)
+        # Queries share `lock`; each batch write holds it exclusively.
+        # `ingest_lock` serializes whole ingestion jobs without blocking queries between batches.
+        self.lock = RWLock()
+        self.ingest_lock = threading.Lock()
+        # Results of repeated queries, valid until the next write
+        self.results = RetrievalCache()
+        self.synced = False
+        # Write version the in-process state (lexical index, Chroma's vector index) reflects
+        self.loaded_version = self.manifest.version()
+
+class WriterLease:
+    """
+    Exclusive right to write to the data directory, held by one process at a
+    time: the app while it stores an upload, a maintenance CLI for its whole
+    run. Every process keeps its own copy of the lexical index and of
+    ChromaDB's vector index and re-reads them after another process has
+    written (see StoreRegistry.refresh), but two writers at once would
+    overwrite each other's changes.
+
+    Re-entrant within a process: nested and concurrent holds from its threads
+    share one claim, released when the last of them ends.
+    """
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Lock file, e.g. Config.WRITER_LOCK_PATH.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self._holds = 0
+
+    def _open(self) -> Tuple[Optional[Any], str]:
+        # The lock file, locked; or None and a description of the process holding it
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        lock_file = open(self.path, "a+", encoding="utf-8")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.seek(0)
+                holder = lock_file.read().strip() or "another process"
+                lock_file.close()
+                return None, holder
+        return lock_file, ""
+
+    @contextmanager
+    def hold(self, owner: str = None) -> Iterator[None]:
+        """
+        Hold the lease for the duration of the block, without waiting for it.
+
+        Args:
+            owner (str, optional): Name shown to processes that are refused (default: the program name).
+
+        Raises:
+            RuntimeError: Another process holds it; the message names that process.
+        """
+        with self._lock:
+            if self._holds == 0:
+                lock_file, holder = self._open()
+                if lock_file is None:
+                    raise RuntimeError(f"Memory is in use by {holder}; try again when it finishes")
+                lock_file.truncate(0)
+                lock_file.write(f"{owner or os.path.basename(sys.argv[0]) or 'python'} (pid {os.getpid()})")
+                lock_file.flush()
+                self._file = lock_file
+            self._holds += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._holds -= 1
+                if self._holds == 0:
+                    self._file.truncate(0)
+                    self._file.close()
+                    self._file = None
+
+    def holder(self) -> Optional[str]:
+        """
+        The process holding the lease if it is another one, else None.
+        """
+        with self._lock:
+            if self._holds:
+                return None
+            lock_file, holder = self._open()
+            if lock_file is not None:
+                lock_file.close()
+            return holder or None
+
+class StoreRegistry:
+    """
+    Process-wide registry handing out one ChromaDB client per persist
+    directory and one MemoryStore per (backend, directory, collection).
+    """
+    def __init__(self):
+        self._clients: Dict[str, object] = {}
+        self._stores: Dict[Tuple[str, str, str], MemoryStore] = {}
+        self._leases: Dict[str, WriterLease] = {}
+        self._lock = threading.Lock()
+
+    def client(self, path: str = None):
+        """
+        The shared PersistentClient for a directory (Config.CHROMA_PERSIST_DIRECTORY by default).
+        """
+        path = os.path.abspath(path or Config.CHROMA_PERSIST_DIRECTORY)
+        with self._lock:
+            if path not in self._clients:
+                # Deferred until first use: importing chromadb dominates cold start
+                import chromadb
+                self._clients[path] = chromadb.PersistentClient(path=path)
+            return self._clients[path]
+
+    def get(self, collection_name: str = "nexus_memory", path: str = None, backend: str = None) -> MemoryStore:
+        """
+        The shared store for a collection, created on first use.
+
+        Args:
+            collection_name (str): Name of the collection.
+            path (str, optional): Data directory (default: the backend's directory in Config).
+            backend (str, optional): "chroma" or "mmap" (default: Config.VECTOR_BACKEND).
+        """
+        backend = (backend or Config.VECTOR_BACKEND).lower()
+        default_path = Config.CHROMA_PERSIST_DIRECTORY if backend == "chroma" else Config.VECTOR_INDEX_DIRECTORY
+        path = os.path.abspath(path or default_path)
+        client = self.client(path) if backend == "chroma" else None
+        with self._lock:
+            key = (backend, path, collection_name)
+            if key not in self._stores:
+                self._stores[key] = MemoryStore(client, path, collection_name, backend)
+            return self._stores[key]
+
+    def lease(self) -> WriterLease:
+        """
+        The writer lease of the data directory (Config.WRITER_LOCK_PATH).
+        """
+        path = os.path.abspath(Config.WRITER_LOCK_PATH)
+        with self._lock:
+            if path not in self._leases:
+                self._leases[path] = WriterLease(path)
+            return self._leases[path]
+
+    def writer(self, owner: str = None):
+        """
+        Hold the writer lease for a block, see WriterLease.hold().
+
+        Raises:
+            RuntimeError: Another process is writing.
+        """
+        return self.lease().hold(owner)
+
+    def refresh(self, store: MemoryStore):
+        """
+        Catch a store up with writes other processes made since it last read
+        or wrote, as told by the persisted write version: re-read its lexical
+        index and, for ChromaDB, which keeps vector indexes cached in the
+        process, reopen the directory's client and re-attach every store that
+        shares it. The manifest and position index are SQLite and always
+        current, and the mmap backend re-reads itself.
+
+        Skipped when the calling thread already holds one of the stores' locks;
+        the next call catches up instead.
+        """
+        if store.manifest.version() == store.loaded_version:
+            return
+        with self._lock:
+            peers = [peer for key, peer in sorted(self._stores.items())
+                     if store.backend == "chroma" and key[:2] == (store.backend, store.path) and peer is not store]
+        peers.append(store)
+        if any(peer.lock.held() for peer in peers):
+            return
+        with ExitStack() as stack:
+            for peer in peers:
+                stack.enter_context(peer.lock.write())
+            if store.manifest.version() == store.loaded_version:
+                return
+            if store.backend == "chroma":
+                # Imported here because core.vectorstore is only needed once a store exists
+                from core.vectorstore import open_vector_store
+                client = self._reopen_client(store.path)
+                for peer in peers:
+                    peer.client = client
+                    peer.collection = open_vector_store(peer.backend, peer.path, peer.name, peer.embedding_function, client)
+            for peer in peers:
+                # Read before reloading, so a write that lands meanwhile is caught by the next call
+                version = peer.manifest.version()
+                if version != peer.loaded_version:
+                    peer.lexical.reload()
+                    peer.loaded_version = version
+
+    def _reopen_client(self, path: str):
+        with self._lock:
+            previous = self._clients.pop(path, None)
+        if previous is not None:
+            previous.close()
+        return self.client(path)
+
+    def clear(self):
+        """
+        Forget all clients and stores (the data on disk is untouched).
+        """
+        with self._lock:
+            self._stores.clear()
+            self._clients.clear()
+
+# Shared instance used by every MemoryManager
+registry = StoreRegistry()
@@ -0,0 +1,262 @@
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from core.config import Config
+
+# Latency buckets in seconds, spanning cache hits to slow LLM calls
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("nexus_current_span", default=None)
+_span_ids = itertools.count(1)
+
+class Span:
+    """
+    One timed stage. Attributes are free-form; numeric ones are also
+    aggregated per stage for the metrics export.
+    """
+    def __init__(self, name: str, parent: Optional["Span"] = None, **attrs):
+        self.name = name
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.attrs: Dict[str, Any] = dict(attrs)
+        self.error: Optional[str] = None
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration = 0.0
+
+    def set(self, **attrs) -> "Span":
+        """
+        Attach attributes (sizes, counts, flags) to the span.
+        """
+        self.attrs.update(attrs)
+        return self
+
+    def fail(self, error: Any) -> "Span":
+        """
+        Mark the span as failed without raising (for code paths that swallow errors).
+        """
+        self.error = f"{type(error).__name__}: {error}" if isinstance(error, BaseException) else str(error)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "error": self.error,
+            "attrs": self.attrs,
+        }
+
+class _StageStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * len(_BUCKETS)
+        self.recent = deque(maxlen=256)
+        self.values: Dict[str, List[float]] = {}  # attr -> [sum, count]
+
+class Telemetry:
+    """
+    Process-wide collector of spans and per-stage metrics.
+
+    Spans nest through a context variable, so a process_query trace groups its
+    retrieval, prompt, generation and parsing spans. Finished spans are kept in
+    a ring buffer, optionally written as JSON lines, and aggregated into
+    Prometheus-style histograms and counters.
+    """
+    def __init__(self, log_path: Optional[str] = None, keep: int = 500):
+        """
+        Args:
+            log_path (str, optional): File to append JSON span records to ("-" for stdout).
+            keep (int): Number of recent spans kept in memory.
+        """
+        self.log_path = log_path
+        self._stages: Dict[str, _StageStats] = {}
+        self._spans = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Span]:
+        """
+        Time a block of code as a named stage.
+
+        Exceptions are recorded on the span and re-raised.
+        """
+        span = Span(name, _current_span.get(), **attrs)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.fail(e)
+            raise
+        finally:
+            span.duration = time.perf_counter() - span._t0
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # A generator span closed from another context (e.g. abandoned stream)
+                pass
+            self._record(span)
+
+    def traced(self, name: str) -> Callable:
+        """
+        Decorator form of span() for whole functions. The function body can
+        reach its span through current() to attach attributes or mark failures.
+        """
+        def decorator(fn: Callable) -> Callable:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def current() -> Span:
+        """
+        The innermost active span (a detached one if there is none, so callers never need to check).
+        """
+        return _current_span.get() or Span("detached")
+
+    def _record(self, span: Span):
+        with self._lock:
+            stats = self._stages.setdefault(span.name, _StageStats())
+            stats.count += 1
+            stats.total += span.duration
+            stats.recent.append(span.duration)
+            if span.error:
+                stats.errors += 1
+            for i, bound in enumerate(_BUCKETS):
+                if span.duration <= bound:
+                    stats.buckets[i] += 1
+            for key, value in span.attrs.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    acc = stats.values.setdefault(key, [0.0, 0])
+                    acc[0] += value
+                    acc[1] += 1
+            self._spans.append(span)
+        if self.log_path:
+            self._log(span)
+
+    def _log(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        try:
+            if self.log_path == "-":
+                print(line, flush=True)
+            else:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except Exception as e:
+            print(f"Error writing trace log: {e}")
+
+    # --- read side ---
+    def recent_spans(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [span.to_dict() for span in list(self._spans)[-limit:]]
+
+    def stage_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-stage count, errors and latency percentiles (over recent calls) in ms,
+        plus the mean of every numeric attribute.
+        """
+        with self._lock:
+            out = {}
+            for name, stats in sorted(self._stages.items()):
+                recent = sorted(stats.recent)
+
+                def pick(q: float) -> float:
+                    return recent[min(len(recent) - 1, int(round(q * (len(recent) - 1))))] * 1000 if recent else 0.0
+
+                out[name] = {
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "mean_ms": stats.total / stats.count * 1000 if stats.count else 0.0,
+                    "p50_ms": pick(0.50),
+                    "p95_ms": pick(0.95),
+                    "p99_ms": pick(0.99),
+                    "attrs_mean": {key: total / count for key, (total, count) in stats.values.items() if count},
+                }
+            return out
+
+    def render_prometheus(self) -> str:
+        """
+        Metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP nexus_stage_duration_seconds Time spent per pipeline stage.",
+            "# TYPE nexus_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            stages = sorted(self._stages.items())
+            for name, stats in stages:
+                for bound, count in zip(_BUCKETS, stats.buckets):
+                    lines.append(f'nexus_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+                lines.append(f'nexus_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {stats.count}')
+                lines.append(f'nexus_stage_duration_seconds_sum{{stage="{name}"}} {stats.total:.6f}')
+                lines.append(f'nexus_stage_duration_seconds_count{{stage="{name}"}} {stats.count}')
+            lines += ["# HELP nexus_stage_errors_total Failed calls per pipeline stage.", "# TYPE nexus_stage_errors_total counter"]
+            for name, stats in stages:
+                lines.append(f'nexus_stage_errors_total{{stage="{name}"}} {stats.errors}')
+            lines += [
+                "# HELP nexus_stage_value Numeric span attributes (prompt/response sizes, document counts).",
+                "# TYPE nexus_stage_value summary",
+            ]
+            for name, stats in stages:
+                for key, (total, count) in sorted(stats.values.items()):
+                    lines.append(f'nexus_stage_value_sum{{stage="{name}",attr="{key}"}} {total:.6f}')
+                    lines.append(f'nexus_stage_value_count{{stage="{name}",attr="{key}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """
+        Write the metrics to a file (for node_exporter's textfile collector).
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def serve_prometheus(self, port: int, host: str = "0.0.0.0"):
+        """
+        Serve /metrics on a background thread.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = telemetry.render_prometheus().encode("utf-8")
+                self.send_response(200 if self.path.startswith("/metrics") else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="nexus-metrics", daemon=True).start()
+        return server
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._spans.clear()
+
+# Shared instance used by every component
+telemetry = Telemetry(log_path=Config.TRACE_LOG_PATH)
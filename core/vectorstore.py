@@ -0,0 +1,679 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within one process
+    fcntl = None
+
+import numpy as np
+
+from core.config import Config
+
+_DEFAULT_INCLUDE = ("documents", "metadatas")
+# Rows scored per step of a scan, bounding the float32 working set (~25 MB at 384 dims)
+_SCAN_ROWS = 16384
+# SQLite's bound-parameter limit is 999 on older builds
+_SQL_BATCH = 500
+_DTYPES = {"int8": np.int8, "float16": np.float16}
+# Rewritten by vacuum(), each through a ".vacuum" sibling
+_VACUUM_FILES = ("vectors.bin", "norms.bin", "lists.bin")
+_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+class VectorStore:
+    """
+    The vector database operations MemoryManager relies on.
+
+    Results use ChromaDB's column layout, {"ids": [...], "documents": [...],
+    "metadatas": [...], "embeddings": [...]}, with None for columns not in
+    `include`. query() returns one such list per query plus "distances"
+    (squared L2, smaller is closer). `where` filters use Chroma's operators
+    ($eq, $ne, $gt, $gte, $lt, $lte, $in, $nin, $and, $or) on metadata.
+    """
+    name = "base"
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None, limit: Optional[int] = None,
+            offset: Optional[int] = None, include: Sequence[str] = _DEFAULT_INCLUDE) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]], embeddings=None):
+        """
+        Insert or replace entries; embeddings are computed from the documents when not given.
+        """
+        raise NotImplementedError
+
+    def update(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        """
+        Replace the metadata of existing entries without re-embedding them.
+        """
+        raise NotImplementedError
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None):
+        raise NotImplementedError
+
+    def vacuum(self) -> int:
+        """
+        Reclaim the space still held by deleted entries.
+
+        Returns:
+            int: Entries reclaimed (0 for backends that manage their own storage).
+        """
+        return 0
+
+    def query(self, query_texts: Optional[List[str]] = None, n_results: int = 10, where: Optional[Dict] = None,
+              include: Sequence[str] = _DEFAULT_INCLUDE, query_embeddings=None) -> Dict[str, Any]:
+        raise NotImplementedError
+
+class ChromaVectorStore(VectorStore):
+    """
+    A ChromaDB collection (HNSW index, float32 embeddings). The default backend.
+    """
+    name = "chroma"
+
+    def __init__(self, client, collection_name: str, embedding_function):
+        self.collection = client.get_or_create_collection(
+            name=collection_name,
+            embedding_function=embedding_function
+        )
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=_DEFAULT_INCLUDE):
+        return self.collection.get(ids=ids, where=where, limit=limit, offset=offset, include=list(include))
+
+    def upsert(self, ids, documents, metadatas, embeddings=None):
+        self.collection.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+    def update(self, ids, metadatas):
+        self.collection.update(ids=ids, metadatas=metadatas)
+
+    def delete(self, ids=None, where=None):
+        self.collection.delete(ids=ids, where=where)
+
+    def query(self, query_texts=None, n_results=10, where=None, include=_DEFAULT_INCLUDE, query_embeddings=None):
+        return self.collection.query(
+            query_texts=query_texts,
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=list(include)
+        )
+
+def _where_sql(where: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """
+    Translate a Chroma-style metadata filter into a SQL condition on the
+    JSON `metadata` column.
+    """
+    parts, params = [], []
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            compiled = [_where_sql(clause) for clause in condition]
+            joiner = " AND " if key == "$and" else " OR "
+            parts.append("(" + (joiner.join(sql for sql, _ in compiled) or "1") + ")")
+            params.extend(param for _, clause_params in compiled for param in clause_params)
+            continue
+        op, value = next(iter(condition.items())) if isinstance(condition, dict) else ("$eq", condition)
+        field = "json_extract(metadata, ?)"
+        path = f'$."{key}"'
+        if op in ("$in", "$nin"):
+            if not value:
+                parts.append("0" if op == "$in" else "1")
+                continue
+            negate = "NOT " if op == "$nin" else ""
+            parts.append(f"{field} {negate}IN ({','.join('?' * len(value))})")
+            params.extend([path, *value])
+        elif op in _OPERATORS:
+            parts.append(f"{field} {_OPERATORS[op]} ?")
+            params.extend([path, value])
+        else:
+            raise ValueError(f"Unsupported where operator '{op}'")
+    return " AND ".join(parts) or "1", params
+
+def _nearest(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """
+    Index of the closest centroid (squared L2) for every row of `data`.
+    """
+    centroid_norms = (centroids * centroids).sum(axis=1)
+    out = np.empty(len(data), dtype=np.int32)
+    for start in range(0, len(data), _SCAN_ROWS):
+        block = np.asarray(data[start:start + _SCAN_ROWS], dtype=np.float32)
+        out[start:start + len(block)] = np.argmin(centroid_norms[None, :] - 2.0 * block @ centroids.T, axis=1)
+    return out
+
+def _kmeans(data: np.ndarray, k: int, rng: np.random.Generator, iterations: int = 10) -> np.ndarray:
+    """
+    Lloyd's k-means; empty clusters are re-seeded from random points.
+    """
+    centroids = data[rng.choice(len(data), k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _nearest(data, centroids)
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=k)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+        centroids[filled] = np.add.reduceat(data[order], starts, axis=0) / counts[filled, None]
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+    return centroids
+
+class MmapVectorStore(VectorStore):
+    """
+    Local index for large corpora. Embeddings are quantized to int8 (one
+    scale per vector) or float16 and appended to a memory-mapped file;
+    documents and metadata live in a SQLite sidecar table keyed by row.
+    Queries are a vectorized brute-force scan until the index reaches
+    `ivf_min_rows`, after which an IVF coarse quantizer limits each query
+    to the `ivf_probes` closest clusters.
+
+    Opening an index maps its files without reading them, so start-up does
+    not grow with the corpus and every process shares one copy of the
+    vectors in the page cache. Deleted and replaced rows stay in the vector
+    file as dead rows until the index is vacuumed. Writers in every process
+    take an exclusive lock on the index directory and start from the row
+    count committed on disk; readers reload when another process has
+    changed the rows since they last looked.
+    """
+    name = "mmap"
+
+    def __init__(self, directory: str, embedding_function: Callable, quantization: str = "int8",
+                 ivf_min_rows: int = 20000, ivf_probes: int = 16):
+        """
+        Args:
+            directory (str): Directory holding this index's files.
+            embedding_function (callable): Maps a list of texts to embeddings.
+            quantization (str): "int8" or "float16"; an existing index keeps the one it was built with.
+            ivf_min_rows (int): Live rows before the IVF index is trained (0 = always brute force).
+            ivf_probes (int): Clusters scanned per query (0 = brute force even if trained).
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.embedding_function = embedding_function
+        self.ivf_min_rows = ivf_min_rows
+        self.ivf_probes = ivf_probes
+        self._lock = threading.RLock()
+        # flock()ed for every write across processes; re-entrant through the depth count
+        self._lock_file = open(os.path.join(directory, "write.lock"), "a+")
+        self._lock_depth = 0
+        self._db = sqlite3.connect(os.path.join(directory, "meta.db"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id TEXT PRIMARY KEY,
+                row INTEGER NOT NULL UNIQUE,
+                document TEXT,
+                metadata TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+        self.quantization = quantization
+        with self._exclusive():
+            self._reload()
+
+    # --- cross-process state ---
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """
+        Hold the index against every other writer: threads of this process
+        through the instance lock, other processes through the file lock.
+        """
+        with self._lock:
+            outer = self._lock_depth == 0
+            if outer and fcntl is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if outer and fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """
+        Exclusive access for a write, starting from the state committed on
+        disk rather than this instance's cached row count.
+        """
+        with self._exclusive():
+            if self._generation_on_disk() != self._generation:
+                self._reload()
+            yield
+
+    def _generation_on_disk(self) -> int:
+        # Bumped by every write that adds, removes or renumbers rows
+        row = self._db.execute("SELECT value FROM info WHERE key = 'generation'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _refresh(self):
+        """
+        Reload if another process changed the rows since this instance last looked.
+        """
+        with self._lock:
+            if self._generation_on_disk() != self._generation:
+                with self._exclusive():
+                    self._reload()
+
+    def _reload(self):
+        # Caller holds the exclusive lock, so no write is half done
+        info = dict(self._db.execute("SELECT key, value FROM info"))
+        self.quantization = info.get("quantization", self.quantization)
+        if self.quantization not in _DTYPES:
+            raise ValueError(f"Unknown quantization '{self.quantization}', expected one of {sorted(_DTYPES)}")
+        self.dim = int(info["dim"]) if "dim" in info else None
+        # Rows written to the vector file, live or dead; the SQLite value is authoritative
+        self._rows = int(info.get("rows", 0))
+        self._ivf_rows = int(info.get("ivf_rows", 0))
+        self._generation = int(info.get("generation", 0))
+        self._finish_vacuum(info.get("vacuum") == "1")
+        self._truncate()
+        self._load()
+
+    def _commit_info(self, **values):
+        """
+        Write info values and bump the generation; the caller holds the
+        exclusive lock and an open transaction.
+        """
+        values["generation"] = self._generation + 1
+        self._db.executemany("INSERT OR REPLACE INTO info VALUES (?, ?)", [(key, str(value)) for key, value in values.items()])
+
+    # --- files ---
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _truncate(self):
+        """
+        Cut off rows a crashed write appended to the files without committing them.
+        """
+        for name, row_bytes in (
+            ("vectors.bin", (self.dim or 0) * np.dtype(_DTYPES[self.quantization]).itemsize),
+            ("norms.bin", 2 * np.dtype(np.float32).itemsize),
+            ("lists.bin", np.dtype(np.int32).itemsize),
+        ):
+            path = self._path(name)
+            if os.path.exists(path) and os.path.getsize(path) > self._rows * row_bytes:
+                with open(path, "r+b") as f:
+                    f.truncate(self._rows * row_bytes)
+
+    def _map(self, name: str, dtype, width: int) -> np.ndarray:
+        """
+        Read-only view of the first self._rows rows of a file.
+        """
+        path = self._path(name)
+        if not self._rows * width:
+            return np.empty((0, width), dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(self._rows, width))
+
+    def _append(self, name: str, array: np.ndarray):
+        with open(self._path(name), "ab") as f:
+            f.write(np.ascontiguousarray(array).tobytes())
+
+    def _finish_vacuum(self, committed: bool):
+        """
+        Complete or discard a vacuum a crash interrupted: once its row
+        renumbering is committed the rewritten files are authoritative,
+        before that they are leftovers.
+        """
+        for name in _VACUUM_FILES:
+            pending = self._path(name) + ".vacuum"
+            if os.path.exists(pending):
+                if committed:
+                    os.replace(pending, self._path(name))
+                else:
+                    os.remove(pending)
+        if committed:
+            with self._db:
+                self._db.execute("DELETE FROM info WHERE key = 'vacuum'")
+
+    def _remap(self):
+        self._vectors = self._map("vectors.bin", _DTYPES[self.quantization], self.dim or 0)
+        # Per row: dequantization scale and squared norm of the dequantized vector
+        self._norms = self._map("norms.bin", np.float32, 2)
+        self._centroids = None
+        self._lists = None
+        if self._ivf_rows and os.path.exists(self._path("centroids.npy")):
+            self._centroids = np.load(self._path("centroids.npy"))
+            self._lists = self._map("lists.bin", np.int32, 1)[:, 0]
+
+    def _load(self):
+        self._remap()
+        live_rows = np.fromiter((row for (row,) in self._db.execute("SELECT row FROM chunks")), dtype=np.int64)
+        self._live = np.zeros(self._rows, dtype=bool)
+        self._live[live_rows] = True
+        self._count = len(live_rows)
+
+    # --- quantization ---
+
+    def _quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.quantization == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        else:
+            codes = vectors.astype(np.float16)
+            scales = np.ones(len(vectors), dtype=np.float32)
+        dequantized = codes.astype(np.float32) * scales[:, None]
+        norms = np.stack([scales, (dequantized * dequantized).sum(axis=1)], axis=1).astype(np.float32)
+        return codes, norms
+
+    def _dequantize(self, rows: np.ndarray) -> np.ndarray:
+        return self._vectors[rows].astype(np.float32) * self._norms[rows, 0][:, None]
+
+    # --- search ---
+
+    def _top_k(self, queries: np.ndarray, k: int, rows: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        For each query, the rows of the k closest live vectors and their
+        squared L2 distances, closest first. Scans `rows` (every row by
+        default) in blocks, converting each block once for all queries.
+        """
+        with self._lock:
+            vectors, norms, live = self._vectors, self._norms, self._live
+        query_norms = (queries * queries).sum(axis=1)
+        best = [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for _ in queries]
+        total = len(live) if rows is None else len(rows)
+        for start in range(0, total, _SCAN_ROWS):
+            if rows is None:
+                block_rows = np.arange(start, min(start + _SCAN_ROWS, total))
+                block = slice(start, start + len(block_rows))
+            else:
+                block_rows = block = rows[start:start + _SCAN_ROWS]
+            # |q - s*v|^2 = |q|^2 + |s*v|^2 - 2*s*(q.v)
+            scaled = norms[block]
+            dots = queries @ vectors[block].astype(np.float32).T
+            distances = scaled[:, 1][None, :] - 2.0 * dots * scaled[:, 0][None, :] + query_norms[:, None]
+            distances[:, ~live[block]] = np.inf
+            for i, (best_rows, best_distances) in enumerate(best):
+                candidate_rows = np.concatenate((best_rows, block_rows))
+                candidates = np.concatenate((best_distances, distances[i]))
+                if len(candidates) > k:
+                    keep = np.argpartition(candidates, k - 1)[:k]
+                    candidate_rows, candidates = candidate_rows[keep], candidates[keep]
+                best[i] = (candidate_rows, candidates)
+        ranked = []
+        for best_rows, best_distances in best:
+            finite = np.isfinite(best_distances)
+            best_rows, best_distances = best_rows[finite], best_distances[finite]
+            order = np.argsort(best_distances, kind="stable")
+            ranked.append((best_rows[order], best_distances[order]))
+        return ranked
+
+    def _probe(self, query: np.ndarray, k: int) -> Optional[np.ndarray]:
+        """
+        Candidate rows from the IVF lists closest to the query, or None to scan everything.
+        """
+        with self._lock:
+            centroids, lists, live = self._centroids, self._lists, self._live
+        if centroids is None or self.ivf_probes <= 0 or self.ivf_probes >= len(centroids):
+            return None
+        distances = (centroids * centroids).sum(axis=1) - 2.0 * centroids @ query
+        probes = np.argpartition(distances, self.ivf_probes - 1)[:self.ivf_probes]
+        candidates = np.flatnonzero(np.isin(lists, probes) & live[:len(lists)])
+        # Rows appended after training and not yet assigned are always scanned
+        candidates = np.concatenate((candidates, np.flatnonzero(live[len(lists):]) + len(lists)))
+        return candidates if len(candidates) >= k else None
+
+    def build_ivf(self, n_lists: Optional[int] = None):
+        """
+        Train the IVF coarse quantizer (k-means on a sample of live vectors)
+        and assign every row to its closest cluster.
+
+        Args:
+            n_lists (int, optional): Number of clusters (default: sqrt of the live rows).
+        """
+        with self._writing():
+            live_rows = np.flatnonzero(self._live)
+            if not len(live_rows):
+                return
+            n_lists = min(n_lists or max(1, int(np.sqrt(len(live_rows)))), len(live_rows))
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(live_rows, min(len(live_rows), n_lists * 64), replace=False))
+            centroids = _kmeans(self._dequantize(sample), n_lists, rng).astype(np.float32)
+            lists = np.concatenate([
+                _nearest(self._dequantize(np.arange(start, min(start + _SCAN_ROWS, self._rows))), centroids)
+                for start in range(0, self._rows, _SCAN_ROWS)
+            ])
+            for name, write in (
+                ("lists.bin", lambda f: f.write(lists.astype(np.int32).tobytes())),
+                ("centroids.npy", lambda f: np.save(f, centroids)),
+            ):
+                with open(self._path(name) + ".tmp", "wb") as f:
+                    write(f)
+                os.replace(self._path(name) + ".tmp", self._path(name))
+            with self._db:
+                self._commit_info(ivf_rows=self._rows)
+            self._ivf_rows = self._rows
+            self._generation += 1
+            self._remap()
+
+    # --- VectorStore ---
+
+    def count(self) -> int:
+        self._refresh()
+        return self._count
+
+    def _select(self, columns: str, ids=None, where=None, limit=None, offset=None) -> List[tuple]:
+        clauses, params = [], []
+        if where:
+            sql, where_params = _where_sql(where)
+            clauses.append(sql)
+            params.extend(where_params)
+        base = f"SELECT {columns} FROM chunks"
+        with self._lock:
+            if ids is None:
+                query = base + (" WHERE " + " AND ".join(clauses) if clauses else "") + " ORDER BY row"
+                if limit is not None or offset:
+                    query += " LIMIT ? OFFSET ?"
+                    params.extend([-1 if limit is None else limit, offset or 0])
+                return self._db.execute(query, params).fetchall()
+            records = []
+            for start in range(0, len(ids), _SQL_BATCH):
+                batch = list(ids[start:start + _SQL_BATCH])
+                condition = " AND ".join(clauses + [f"id IN ({','.join('?' * len(batch))})"])
+                records.extend(self._db.execute(f"{base} WHERE {condition}", params + batch).fetchall())
+        records.sort(key=lambda record: record[1])
+        return records[offset or 0:None if limit is None else (offset or 0) + limit]
+
+    def _records_at(self, rows: np.ndarray) -> Dict[int, tuple]:
+        """
+        Sidecar records of the given rows, keyed by row.
+        """
+        rows = [int(row) for row in rows]
+        found = {}
+        with self._lock:
+            for start in range(0, len(rows), _SQL_BATCH):
+                batch = rows[start:start + _SQL_BATCH]
+                for record in self._db.execute(
+                    f"SELECT id, row, document, metadata FROM chunks WHERE row IN ({','.join('?' * len(batch))})", batch
+                ):
+                    found[record[1]] = record
+        return found
+
+    def _columns(self, records: List[tuple], include: Sequence[str]) -> Dict[str, Any]:
+        rows = np.array([record[1] for record in records], dtype=np.int64)
+        return {
+            "ids": [record[0] for record in records],
+            "documents": [record[2] for record in records] if "documents" in include else None,
+            "metadatas": [json.loads(record[3]) for record in records] if "metadatas" in include else None,
+            "embeddings": self._dequantize(rows) if "embeddings" in include else None,
+        }
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=_DEFAULT_INCLUDE):
+        self._refresh()
+        return self._columns(self._select("id, row, document, metadata", ids, where, limit, offset), include)
+
+    def upsert(self, ids, documents, metadatas, embeddings=None):
+        if not ids:
+            return
+        if embeddings is None:
+            embeddings = self.embedding_function(documents)
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        # The last occurrence of a repeated id wins, as in Chroma
+        latest = list({doc_id: i for i, doc_id in enumerate(ids)}.values())
+        if len(latest) < len(ids):
+            ids, documents, metadatas, vectors = (
+                [ids[i] for i in latest], [documents[i] for i in latest], [metadatas[i] for i in latest], vectors[latest]
+            )
+
+        with self._writing():
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the index ({self.dim})")
+            codes, norms = self._quantize(vectors)
+            first = self._rows
+            # Vectors first: rows past the committed count are discarded on the next open
+            self._append("vectors.bin", codes)
+            self._append("norms.bin", norms)
+            if self._centroids is not None:
+                self._append("lists.bin", _nearest(codes.astype(np.float32) * norms[:, :1], self._centroids))
+            replaced = [row for _, row in self._select("id, row", ids=ids)]
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO chunks (id, row, document, metadata) VALUES (?, ?, ?, ?)",
+                    [
+                        (doc_id, first + i, document, json.dumps(meta or {}))
+                        for i, (doc_id, document, meta) in enumerate(zip(ids, documents, metadatas))
+                    ]
+                )
+                self._commit_info(rows=first + len(ids), dim=self.dim, quantization=self.quantization)
+            self._generation += 1
+            self._rows = first + len(ids)
+            live = np.zeros(self._rows, dtype=bool)
+            live[:first] = self._live
+            live[first:] = True
+            live[replaced] = False
+            self._live = live
+            self._count += len(ids) - len(replaced)
+            self._remap()
+
+            if self.ivf_min_rows > 0 and self._count >= self.ivf_min_rows and self._rows >= 2 * self._ivf_rows:
+                # First training, or the index has doubled since the last one
+                self.build_ivf()
+
+    def update(self, ids, metadatas):
+        # Rows are unchanged, so other processes need not reload
+        with self._writing(), self._db:
+            self._db.executemany(
+                "UPDATE chunks SET metadata = ? WHERE id = ?",
+                [(json.dumps(meta or {}), doc_id) for doc_id, meta in zip(ids, metadatas)]
+            )
+
+    def delete(self, ids=None, where=None):
+        if ids is None and where is None:
+            return
+        with self._writing():
+            rows = [row for _, row in self._select("id, row", ids, where)]
+            if not rows:
+                return
+            with self._db:
+                self._db.executemany("DELETE FROM chunks WHERE row = ?", [(row,) for row in rows])
+                self._commit_info()
+            self._generation += 1
+            live = self._live.copy()
+            live[rows] = False
+            self._live = live
+            self._count -= len(rows)
+
+    def vacuum(self) -> int:
+        """
+        Rewrite the vector files without dead rows and renumber the live
+        ones. The IVF assignment of every live row is kept, so the index
+        does not need retraining.
+        """
+        with self._writing():
+            live_rows = np.flatnonzero(self._live)
+            dead = self._rows - len(live_rows)
+            if not dead:
+                return 0
+            files = [("vectors.bin", self._vectors), ("norms.bin", self._norms)]
+            if self._lists is not None:
+                files.append(("lists.bin", self._lists))
+            for name, data in files:
+                with open(self._path(name) + ".vacuum", "wb") as f:
+                    for start in range(0, len(live_rows), _SCAN_ROWS):
+                        f.write(np.ascontiguousarray(data[live_rows[start:start + _SCAN_ROWS]]).tobytes())
+            ivf_rows = int(np.count_nonzero(live_rows < self._ivf_rows)) if self._lists is not None else 0
+            with self._db:
+                # Ascending order never collides: every row moves to a lower or equal number
+                self._db.executemany(
+                    "UPDATE chunks SET row = ? WHERE row = ?",
+                    [(new_row, int(old_row)) for new_row, old_row in enumerate(live_rows) if new_row != old_row]
+                )
+                self._commit_info(rows=len(live_rows), ivf_rows=ivf_rows, vacuum=1)
+            self._generation += 1
+            self._rows = len(live_rows)
+            self._ivf_rows = ivf_rows
+            self._finish_vacuum(True)
+            self._load()
+            return dead
+
+    def query(self, query_texts=None, n_results=10, where=None, include=_DEFAULT_INCLUDE, query_embeddings=None):
+        self._refresh()
+        if query_embeddings is None:
+            query_embeddings = self.embedding_function(query_texts)
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        allowed = None
+        if where:
+            allowed = np.array([row for _, row in self._select("id, row", where=where)], dtype=np.int64)
+
+        results = {"ids": [], "documents": [], "metadatas": [], "embeddings": [], "distances": []}
+        if self.dim is None or (allowed is not None and not len(allowed)):
+            ranked = [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for _ in queries]
+        elif allowed is not None:
+            ranked = self._top_k(queries, n_results, allowed)
+        else:
+            probed = [self._probe(query, n_results) for query in queries]
+            if all(candidates is None for candidates in probed):
+                # One shared scan for the whole batch
+                ranked = self._top_k(queries, n_results)
+            else:
+                ranked = [self._top_k(query[None, :], n_results, candidates)[0] for query, candidates in zip(queries, probed)]
+        for rows, distances in ranked:
+            found = self._records_at(rows)
+            kept = [i for i, row in enumerate(rows) if row in found]
+            columns = self._columns([found[rows[i]] for i in kept], include)
+            for key in ("ids", "documents", "metadatas", "embeddings"):
+                results[key].append(columns[key])
+            results["distances"].append([float(distances[i]) for i in kept])
+        for key in ("documents", "metadatas", "embeddings", "distances"):
+            if key not in include:
+                results[key] = None
+        return results
+
+VECTOR_STORES = {
+    "chroma": lambda path, name, embedding_function, client: ChromaVectorStore(client, name, embedding_function),
+    "mmap": lambda path, name, embedding_function, client: MmapVectorStore(
+        os.path.join(path, name),
+        embedding_function,
+        Config.VECTOR_QUANTIZATION,
+        Config.VECTOR_IVF_MIN_ROWS,
+        Config.VECTOR_IVF_PROBES
+    ),
+}
+
+def open_vector_store(backend: str, path: str, collection_name: str, embedding_function: Callable, client=None) -> VectorStore:
+    """
+    Open (or create) a collection on the named backend.
+
+    Args:
+        backend (str): "chroma" or "mmap".
+        path (str): The backend's data directory.
+        collection_name (str): Name of the collection.
+        embedding_function (callable): Embeds documents and query texts.
+        client: The chromadb.PersistentClient for `path` (chroma only).
+    """
+    backend = backend.lower()
+    if backend not in VECTOR_STORES:
+        raise ValueError(f"Unknown vector backend '{backend}', expected one of {sorted(VECTOR_STORES)}")
+    return VECTOR_STORES[backend](path, collection_name, embedding_function, client)
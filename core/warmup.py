@@ -0,0 +1,110 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from core.telemetry import telemetry
+
+class _Step:
+    def __init__(self, name: str, fn: Callable[[], Any]):
+        self.name = name
+        self.fn = fn
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.waited = 0.0
+
+class Warmup:
+    """
+    Runs named start-up steps in order on a background thread, so the UI can
+    draw while heavy imports and models load. Callers block in result() only
+    for the step they need, and only while it is still loading.
+
+    Each step is also traced as a 'startup.<name>' span.
+    """
+    def __init__(self):
+        self._steps: Dict[str, _Step] = {}
+        self._created = time.perf_counter()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, name: str, fn: Callable[[], Any]) -> "Warmup":
+        """
+        Register a step. Later steps may call result() on earlier ones.
+        """
+        self._steps[name] = _Step(name, fn)
+        return self
+
+    def start(self) -> "Warmup":
+        """
+        Start the background thread (idempotent).
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="nexus-warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        for step in self._steps.values():
+            step.started = time.perf_counter()
+            with telemetry.span(f"startup.{step.name}") as span:
+                try:
+                    step.result = step.fn()
+                except Exception as e:
+                    print(f"Error warming up {step.name}: {e}")
+                    span.fail(e)
+                    step.error = e
+            step.finished = time.perf_counter()
+            step.done.set()
+        print(self.format_report())
+
+    def ready(self, name: str) -> bool:
+        return self._steps[name].done.is_set()
+
+    def result(self, name: str, timeout: float = None) -> Any:
+        """
+        The value of a step, waiting for it if it is still loading.
+
+        Raises:
+            TimeoutError: If the step did not finish within `timeout` seconds.
+            Exception: Whatever the step raised.
+        """
+        step = self._steps[name]
+        if not step.done.is_set():
+            self.start()
+            t0 = time.perf_counter()
+            finished = step.done.wait(timeout)
+            step.waited += time.perf_counter() - t0
+            if not finished:
+                raise TimeoutError(f"Start-up step '{name}' is still running")
+        if step.error is not None:
+            raise step.error
+        return step.result
+
+    def report(self) -> List[Dict[str, Any]]:
+        """
+        Per-step timings in seconds: when each step started and finished
+        relative to warm-up creation, its duration, and how long callers
+        were blocked waiting for it.
+        """
+        rows = []
+        for step in self._steps.values():
+            if step.done.is_set():
+                status = "failed" if step.error is not None else "ready"
+            else:
+                status = "loading" if step.started is not None else "pending"
+            rows.append({
+                "step": step.name,
+                "status": status,
+                "started_at": round(step.started - self._created, 3) if step.started is not None else None,
+                "seconds": round((step.finished or time.perf_counter()) - step.started, 3) if step.started is not None else None,
+                "waited": round(step.waited, 3),
+            })
+        return rows
+
+    def format_report(self) -> str:
+        lines = ["Startup report:"]
+        for row in self.report():
+            seconds = f"{row['seconds']:.2f}s" if row["seconds"] is not None else "-"
+            lines.append(f"  {row['step']:<20} {row['status']:<8} {seconds:>8}  (callers waited {row['waited']:.2f}s)")
+        return "\n".join(lines)
@@ -1,9 +1,15 @@
 
 import streamlit as st
+import importlib
 import uuid
-import datetime
-from core.orchestrator import Orchestrator
+from core.orchestrator import Orchestrator, submit
+from core.lifecycle import MaintenanceJob
 from core.memory import MemoryManager
+from core.sessions import SessionStore
+from core.store import registry
+from core.config import Config
+from core.telemetry import telemetry
+from core.warmup import Warmup
 
 # --- 1. Page Configuration (Must be first) ---
 st.set_page_config(
@@ -14,35 +20,53 @@ st.set_page_config(
 )
 
 # --- 2. CSS & UI Setup ---
-def load_css():
+@st.cache_resource
+def read_css():
+    # Read once per process; every full run still has to re-emit it
     with open("style.css") as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+        return f"<style>{f.read()}</style>"
+
+def load_css():
+    st.markdown(read_css(), unsafe_allow_html=True)
 
 load_css()
 
 
 
 # --- 3. Session State Management ---
-if "sessions" not in st.session_state:
-    st.session_state.sessions = {}
+@st.cache_resource
+def get_session_store():
+    return SessionStore()
+
+sessions = get_session_store()
+
+def get_client_id():
+    # Chats belong to the browser that created them; the id rides in the URL so reloads keep it.
+    # Streamlit cannot set cookies, so opening the bare URL (e.g. an old bookmark) starts a new chat list
+    if "client_id" not in st.session_state:
+        client = st.query_params.get("client", "")
+        st.session_state.client_id = client if len(client) == 32 else uuid.uuid4().hex
+    if st.query_params.get("client") != st.session_state.client_id:
+        st.query_params["client"] = st.session_state.client_id
+    return st.session_state.client_id
 
-if "current_session_id" not in st.session_state:
-# ... (rest of session init logic) ...
-    new_id = str(uuid.uuid4())
-    st.session_state.current_session_id = new_id
-    st.session_state.sessions[new_id] = {
-        "messages": [], 
-        "title": "New Chat", 
-        "pinned": False, 
-        "created_at": datetime.datetime.now()
-    }
+client_id = get_client_id()
+
+if "current_session_id" not in st.session_state or sessions.get(st.session_state.current_session_id, client_id) is None:
+    # Resume this browser's most recent chat across restarts, or start its first one
+    existing = sessions.list_sessions(client_id)
+    st.session_state.current_session_id = existing[0]["id"] if existing else sessions.create(client_id, "New Chat")
+
+# Number of trailing messages shown per session; "Load earlier" grows it a page at a time
+if "visible_messages" not in st.session_state:
+    st.session_state.visible_messages = {}
 
 
 # Helper Functions
 def create_new_chat():
     # Sequential Naming Logic
     base_title = "New Chat"
-    existing_titles = [data["title"] for data in st.session_state.sessions.values()]
+    existing_titles = set(sessions.titles(client_id))
     
     count = 1
     new_title = f"{base_title} {count}"
@@ -50,105 +74,90 @@ def create_new_chat():
         count += 1
         new_title = f"{base_title} {count}"
         
-    new_id = str(uuid.uuid4())
-    st.session_state.sessions[new_id] = {
-        "messages": [], 
-        "title": new_title, 
-        "pinned": False,
-        "created_at": datetime.datetime.now()
-    }
-    st.session_state.current_session_id = new_id
+    st.session_state.current_session_id = sessions.create(client_id, new_title)
 
 def switch_session(session_id):
     st.session_state.current_session_id = session_id
 
 def delete_session(session_id):
-    if session_id in st.session_state.sessions:
-        del st.session_state.sessions[session_id]
-        if st.session_state.current_session_id == session_id:
-            if st.session_state.sessions:
-                st.session_state.current_session_id = list(st.session_state.sessions.keys())[0]
-            else:
-                create_new_chat()
-        st.rerun()
+    sessions.delete(session_id, client_id)
+    st.session_state.visible_messages.pop(session_id, None)
+    if st.session_state.current_session_id == session_id:
+        remaining = sessions.list_sessions(client_id)
+        if remaining:
+            st.session_state.current_session_id = remaining[0]["id"]
+        else:
+            create_new_chat()
+    st.rerun()
 
-def toggle_pin(session_id):
-    if session_id in st.session_state.sessions:
-        st.session_state.sessions[session_id]["pinned"] = not st.session_state.sessions[session_id]["pinned"]
-        st.rerun()
+def toggle_pin(session_id, pinned):
+    # Button callback: the session list fragment redraws right after it
+    sessions.set_pinned(session_id, client_id, not pinned)
+
+def show_earlier(session_id, visible):
+    # Button callback: the history fragment redraws right after it
+    st.session_state.visible_messages[session_id] = visible + Config.CHAT_PAGE_SIZE
 
 # --- Modal Dialog for Renaming ---
 @st.dialog("Rename Chat")
 def rename_dialog(session_id):
-    current_title = st.session_state.sessions[session_id]["title"]
+    current_title = sessions.get(session_id, client_id)["title"]
     new_title = st.text_input("New Title", value=current_title)
     if st.button("Save", type="primary"):
-        st.session_state.sessions[session_id]["title"] = new_title
+        sessions.rename(session_id, client_id, new_title)
         st.rerun()
 
 def get_current_session_data():
-    # Robust check to prevent KeyErrors if state gets out of sync
-    if st.session_state.current_session_id not in st.session_state.sessions:
-        if st.session_state.sessions:
-            # Fallback to first available
-            st.session_state.current_session_id = list(st.session_state.sessions.keys())[0]
-        else:
-            # No sessions left, create new (but carefully avoid recursion loops if create_new calls this)
-            new_id = str(uuid.uuid4())
-            st.session_state.sessions[new_id] = {
-                "messages": [], 
-                "title": "New Chat", 
-                "pinned": False,
-                "created_at": datetime.datetime.now()
-            }
-            st.session_state.current_session_id = new_id
-            
-    return st.session_state.sessions[st.session_state.current_session_id]
-
-def generate_smart_title(user_message):
-    """
-    Generate a smart title based on the user's message using a lightweight call.
-    """
-    try:
-        model = orchestrator.model 
-        prompt = f"Summarize this user query into a very short 3-5 word title (English or Chinese). Query: {user_message}. Title:"
-        response = model.generate_content(prompt)
-        
-        # Safely check if response has valid text
-        if response and response.candidates and len(response.candidates) > 0:
-            candidate = response.candidates[0]
-            if candidate.content and candidate.content.parts:
-                title = candidate.content.parts[0].text.strip().replace('"', '').replace("Title:", "").strip()
-                return title if title else user_message[:25]
-        
-        return user_message[:25]
-    except Exception:
-        return user_message[:25]
+    # Robust check in case the session was deleted elsewhere
+    session = sessions.get(st.session_state.current_session_id, client_id)
+    if session is None:
+        create_new_chat()
+        session = sessions.get(st.session_state.current_session_id, client_id)
+    return session
 
-def add_message(role, content, auto_title=False):
+def add_message(role, content):
     session = get_current_session_data()
-    session["messages"].append({"role": role, "content": content})
-    
-    # Smart Auto-title: rename if this is the first user message and title starts with "New Chat"
-    if auto_title and role == "user":
-        current_title = session.get("title", "")
-        # Check if title is still a default "New Chat" pattern
-        if current_title == "New Chat" or current_title.startswith("New Chat "):
-            new_title = generate_smart_title(content)
-            if new_title:
-                session["title"] = new_title
+    sessions.append_message(session["id"], role, content)
+
+def needs_title(session):
+    # Still carrying a default "New Chat" pattern title
+    title = session.get("title", "")
+    return title == "New Chat" or title.startswith("New Chat ")
 
 # --- 4. Core Initialization ---
 @st.cache_resource
+def get_warmup():
+    # Heavy imports and models load on a background thread while the UI draws
+    warmup = Warmup()
+    warmup.add("import_chromadb", lambda: importlib.import_module("chromadb"))
+    warmup.add("import_gemini", lambda: importlib.import_module("google.generativeai"))
+    warmup.add("memory", MemoryManager)
+    warmup.add("embedding_model", lambda: warmup.result("memory").embed(["warm-up"]))
+    # One memory store per process, shared by retrieval and the Memory Bank uploads
+    warmup.add("orchestrator", lambda: Orchestrator(memory=warmup.result("memory")))
+    # Retention on a daemon thread, with compaction reporting only unless NEXUS_MAINTENANCE_COMPACTION=apply
+    warmup.add("maintenance", lambda: MaintenanceJob(warmup.result("memory")).start())
+    return warmup.start()
+
+def get_memory_manager():
+    # Blocks only while the memory is still loading
+    return get_warmup().result("memory")
+
 def get_orchestrator():
-    return Orchestrator()
-    
+    return get_warmup().result("orchestrator")
+
 @st.cache_resource
-def get_memory_manager():
-    return MemoryManager()
-    
-orchestrator = get_orchestrator()
-memory_manager = get_memory_manager()
+def start_metrics_server():
+    # Once per process; Streamlit reruns the script on every interaction
+    if Config.METRICS_PORT:
+        try:
+            return telemetry.serve_prometheus(Config.METRICS_PORT)
+        except Exception as e:
+            print(f"Error starting metrics server: {e}")
+    return None
+
+warmup = get_warmup()
+start_metrics_server()
 
 # --- 5. Sidebar (Advanced Navigation) ---
 with st.sidebar:
@@ -158,23 +167,16 @@ with st.sidebar:
 # Inject Nexus Brand (positioned via CSS to main content area)
 st.markdown('<div class="nexus-brand">NEXUS</div>', unsafe_allow_html=True)
 
-with st.sidebar:
-    if st.button("➕ Start New Chat", use_container_width=True, type="primary"):
-        create_new_chat()
-        st.rerun()
-
-    st.divider()
-
-    # Sort sessions logic
-    sessions_items = list(st.session_state.sessions.items())
-    pinned_sessions = [sid for sid, data in sessions_items if data.get("pinned", False)]
-    recent_sessions = [sid for sid, data in sessions_items if not data.get("pinned", False)]
-    
-    # Sort recent by created_at (descending) if available, else standard
-    # (Assuming created_at is in data, if not just reverse list)
-    recent_sessions = recent_sessions[::-1] 
+# Each sidebar section is a fragment: its widgets rerun only that section
+@st.fragment
+def render_session_list():
+    # The index is already ordered pinned first, then newest first
+    session_index = sessions.list_sessions(client_id)
+    pinned_sessions = [data for data in session_index if data["pinned"]]
+    recent_sessions = [data for data in session_index if not data["pinned"]]
 
-    def render_session_item(sid, data):
+    def render_session_item(data):
+        sid = data["id"]
         title = data.get("title", "Untitled")
         is_current = (sid == st.session_state.current_session_id)
         is_pinned = data.get("pinned", False)
@@ -185,6 +187,7 @@ with st.sidebar:
             col1, col2 = st.columns([0.88, 0.12])
             with col1:
                 if st.button(title, key=f"btn_{sid}", use_container_width=True, type=type_str):
+                    # Switching chats changes the whole page
                     switch_session(sid)
                     st.rerun()
             with col2:
@@ -193,44 +196,107 @@ with st.sidebar:
                     if st.button("✏️ Rename", key=f"ren_{sid}", use_container_width=True):
                         rename_dialog(sid)
                     pin_label = "📌 Unpin" if is_pinned else "📌 Pin"
-                    if st.button(pin_label, key=f"pin_{sid}", use_container_width=True):
-                        toggle_pin(sid)
+                    st.button(pin_label, key=f"pin_{sid}", use_container_width=True, on_click=toggle_pin, args=(sid, is_pinned))
                     if st.button("🗑️ Delete", key=f"del_{sid}", use_container_width=True):
                         delete_session(sid)
 
     # Render Pinned
     if pinned_sessions:
         st.caption("📌 Pinned")
-        for sid in pinned_sessions:
-            if sid in st.session_state.sessions:
-                render_session_item(sid, st.session_state.sessions[sid])
+        for data in pinned_sessions:
+            render_session_item(data)
             
     # Render Recent
     if recent_sessions:
         st.caption("🕒 Recent")
-        for sid in recent_sessions:
-            if sid in st.session_state.sessions:
-                render_session_item(sid, st.session_state.sessions[sid])
+        for data in recent_sessions:
+            render_session_item(data)
     
     if not pinned_sessions and not recent_sessions:
         st.info("No chats yet. Start a new one!")
 
-    st.divider()
-    
+@st.fragment
+def render_memory_bank():
     with st.expander("🧠 Memory Bank", expanded=False):
-        tab1, tab2 = st.tabs(["📝 Note", "📂 File"])
-        # (Rest of Memory Code same as before)
-        with tab1:
-            with st.form("mem_form"):
-                note = st.text_area("Note", height=80)
-                if st.form_submit_button("Save"):
-                    if note and memory_manager.add_document(note, {"source": "manual"}):
-                        st.toast("Memory Saved")
-        with tab2:
-            up_file = st.file_uploader("PDF/TXT", type=["pdf", "txt"])
-            if up_file:
-                if memory_manager.process_file(up_file, up_file.name):
-                    st.toast(f"Learned from {up_file.name}")
+        # While a CLI writes to memory the app is read-only: chat keeps working, uploads wait (checked on every rerun)
+        writer = registry.lease().holder()
+        if writer:
+            st.info(f"🔒 Memory is read-only while {writer} writes to it.")
+        else:
+            tab1, tab2 = st.tabs(["📝 Note", "📂 File"])
+            try:
+                with tab1:
+                    with st.form("mem_form"):
+                        note = st.text_area("Note", height=80)
+                        if st.form_submit_button("Save") and note:
+                            with registry.writer("the Nexus app"):
+                                if get_memory_manager().add_document(note, {"source": "manual"}):
+                                    st.toast("Memory Saved")
+                with tab2:
+                    up_file = st.file_uploader("PDF/TXT", type=["pdf", "txt"])
+                    # Reruns re-fire this branch while the file stays selected; ingest each upload once
+                    if "ingested_uploads" not in st.session_state:
+                        st.session_state.ingested_uploads = set()
+                    if up_file and (up_file.name, up_file.size) not in st.session_state.ingested_uploads:
+                        with registry.writer("the Nexus app"):
+                            progress = st.progress(0.0, text=f"Reading {up_file.name}...")
+                            learned = get_memory_manager().process_file(
+                                up_file, up_file.name,
+                                progress_callback=lambda fraction, message: progress.progress(fraction, text=message)
+                            )
+                            progress.empty()
+                        if learned:
+                            st.session_state.ingested_uploads.add((up_file.name, up_file.size))
+                            st.toast(f"Learned from {up_file.name}")
+            except RuntimeError as e:
+                # A CLI claimed memory between the check above and the write
+                st.warning(str(e))
+        if warmup.ready("orchestrator"):
+            if get_orchestrator().cache is not None:
+                cache_stats = get_orchestrator().cache.stats()
+                st.caption(f"⚡ Response cache: {cache_stats['hits']} hits · {cache_stats['misses']} misses · {cache_stats['size']} stored")
+            # The retrieval cache is independent of the response cache and shown whenever memory is up
+            retrieval_stats = get_orchestrator().memory.store.results.stats()
+            st.caption(f"🔎 Retrieval cache: {retrieval_stats['hits']} hits · {retrieval_stats['misses']} misses · {retrieval_stats['size']} stored")
+
+@st.fragment
+def render_diagnostics():
+    with st.expander("🩺 Diagnostics", expanded=False):
+        stages = telemetry.stage_stats()
+        if stages:
+            st.dataframe(
+                [
+                    {"stage": name, "calls": s["count"], "errors": s["errors"],
+                     "p50 ms": round(s["p50_ms"], 1), "p95 ms": round(s["p95_ms"], 1)}
+                    for name, s in stages.items()
+                ],
+                hide_index=True, use_container_width=True
+            )
+            st.download_button("Metrics (Prometheus)", telemetry.render_prometheus(), file_name="nexus_metrics.prom")
+        else:
+            st.caption("No traced calls yet.")
+        if warmup.ready("memory"):
+            emb = warmup.result("memory").embedder.stats()
+            st.caption(
+                f"Embeddings ({emb['model']}, batch {emb['batch_size']} × {emb['threads']} threads): "
+                f"{emb['embeddings_per_s']:.0f}/s · {emb['hit_rate']:.0%} cached · {emb['cached']} stored"
+            )
+        if warmup.ready("memory") and st.button("Memory stats", key="memory_stats"):
+            st.json(warmup.result("memory").stats(), expanded=False)
+        st.caption("Startup")
+        st.dataframe(warmup.report(), hide_index=True, use_container_width=True)
+
+with st.sidebar:
+    if st.button("➕ Start New Chat", use_container_width=True, type="primary"):
+        create_new_chat()
+        st.rerun()
+
+    st.divider()
+    render_session_list()
+    st.divider()
+    render_memory_bank()
+    if Config.DIAGNOSTICS_PANEL:
+        render_diagnostics()
 
 # --- 6. Main Header (Bubble Style Button) ---
 current_session = get_current_session_data()
@@ -243,47 +309,104 @@ with col_center:
         rename_dialog(st.session_state.current_session_id)
 
 # --- 7. Chat Render ---
-current_messages = current_session["messages"]
-
-for message in current_messages:
+@st.cache_data(max_entries=2000, show_spinner=False)
+def message_blocks(message_id, _content):
+    # Stored messages never change, so what to draw is computed once per message id
+    if not isinstance(_content, dict):
+        return [("text", _content)]
+    # Assistant Response
+    blocks = []
+    if _content.get("context_used"):
+        blocks.append(("memory", "\n".join(f"- {doc}" for doc in _content["context_used"])))
+    if _content.get("thought"):
+        blocks.append(("thought", _content["thought"]))
+    blocks.append(("text", _content["answer"]))
+    return blocks
+
+def render_message(message_id, message):
     with st.chat_message(message["role"]):
-        content = message["content"]
-        
-        if isinstance(content, dict): 
-            # Assistant Response
-            if content.get("context_used") and len(content.get("context_used")) > 0:
+        for kind, text in message_blocks(message_id, message["content"]):
+            if kind == "memory":
                 with st.expander("📚 Referenced Memory"):
-                    for doc in content["context_used"]:
-                        st.markdown(f"- {doc}")
-            if content.get("thought"):
+                    st.markdown(text)
+            elif kind == "thought":
                 with st.status("Thought Process", state="complete"):
-                    st.markdown(content["thought"])
-            st.markdown(content["answer"])
-        else:
-            st.markdown(content)
+                    st.markdown(text)
+            else:
+                st.markdown(text)
+
+@st.fragment
+def render_history(session_id):
+    # Only the tail of the conversation is loaded and rendered; "Load earlier" reruns just this part.
+    # The count is read here so a fragment rerun sees messages stored since the last full run.
+    session = sessions.get(session_id, client_id)
+    message_count = session["message_count"] if session else 0
+    visible = st.session_state.visible_messages.get(session_id, Config.CHAT_PAGE_SIZE)
+    if message_count > visible:
+        st.button(
+            f"⬆️ Load earlier messages ({message_count - visible} more)", key="load_earlier",
+            use_container_width=True, on_click=show_earlier, args=(session_id, visible)
+        )
+    for message in sessions.messages(session_id, limit=visible):
+        render_message(f"{session_id}:{message['seq']}", message)
+
+session_id = current_session["id"]
+render_history(session_id)
 
 # --- 8. Input Logic ---
 if prompt := st.chat_input("Message Nexus..."):
-    add_message("user", prompt, auto_title=True)  # Trigger auto-title on user message
+    add_message("user", prompt)
     with st.chat_message("user"):
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
         status = st.status("Nexus is thinking...", expanded=True)
+        thought_box = status.empty()
+        memory_slot = st.container()
+        answer_box = st.empty()
         try:
-            # Pass full chat history to Orchestrator
-            response_dict = orchestrator.process_query(prompt, chat_history=current_messages)
+            # Waits only for whatever is still warming up
+            orchestrator = get_orchestrator()
+            # Smart auto-title for a fresh chat, generated alongside the answer instead of before it
+            title_future = submit(orchestrator.generate_title, prompt) if needs_title(current_session) else None
+            # Pass full chat history to Orchestrator and render deltas as they arrive
+            thought_text, answer_text = "", ""
+            response_dict = None
+            # The prompt builder summarizes older turns itself, so it gets the whole conversation
+            for event in orchestrator.process_query_stream(
+                prompt, chat_history=sessions.messages(session_id), session_id=session_id
+            ):
+                if event["type"] == "thought":
+                    thought_text += event["delta"]
+                    thought_box.markdown(thought_text)
+                elif event["type"] == "answer":
+                    if not answer_text:
+                        status.update(label="Thought Process", state="running", expanded=False)
+                    answer_text += event["delta"]
+                    answer_box.markdown(answer_text + "▌")
+                elif event["type"] == "done":
+                    response_dict = event["response"]
             
-            status.markdown(response_dict.get("thought", "Done."))
+            thought_box.markdown(response_dict.get("thought", "Done."))
             status.update(label="Thought Process", state="complete", expanded=False)
             
             if response_dict.get("context_used"):
-                with st.expander("📚 Referenced Memory", expanded=True):
-                    for doc in response_dict["context_used"]:
-                        st.markdown(f"- {doc}")
+                with memory_slot:
+                    with st.expander("📚 Referenced Memory", expanded=True):
+                        for doc in response_dict["context_used"]:
+                            st.markdown(f"- {doc}")
             
-            st.markdown(response_dict["answer"])
+            answer_box.markdown(response_dict["answer"])
             add_message("assistant", response_dict)
+            if title_future is not None:
+                sessions.rename(session_id, client_id, title_future.result())
+            if Config.METRICS_FILE:
+                try:
+                    telemetry.write_prometheus(Config.METRICS_FILE)
+                except Exception as e:
+                    print(f"Error writing metrics file: {e}")
+            # Redraw from storage so the history, its count and the new title all include this turn
+            st.rerun()
             
         except Exception as e:
             status.update(label="Error", state="error")